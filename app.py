@@ -1,154 +1,56 @@
 import streamlit as st
-import numpy as np
-import pandas as pd
 import plotly.express as px
-import urllib3
-import json
+import pandas as pd
 import datetime
+import json
+import os
+import time
 from datetime import date
+from urllib.parse import urlencode
+from streamlit.proto.PlotlyChart_pb2 import PlotlyChart as PlotlyChartProto
 
-# Set page to wide mode
-st.set_page_config(layout="wide")
-
-# Cache data for quicker loading
-@st.cache 
-
-def load_data(type):
-    ''' Load the most recent COVID-19 data from the Ontario Government through their Datastore API'''
-    # Get URL dependent on data type
-    if type == 'COVID':
-        url = 'https://data.ontario.ca/api/3/action/datastore_search?resource_id=ed270bb8-340b-41f9-a7c6-e8ef587e6d11&limit=100000'
-    elif type == 'Vaccine':
-        url = 'https://data.ontario.ca/api/3/action/datastore_search?resource_id=8a89caa9-511c-4568-af89-7f2174b4378c&limit=100000'
-    # Access Datastore API
-    http = urllib3.PoolManager()
-    response = http.request('GET', url)
-    data = json.loads(response.data.decode('utf-8'))
-    # Flatten JSON
-    df = pd.json_normalize(data['result']['records'])
-    # Fill NA's with 0
-    df = df.fillna(0)
-
-    return df 
-
-def format_data(source_data):
-    ''' Format the COVID-19 data to:
-    1) shorten long column names,
-    2) replace spaces with underscores,
-    3) remove columns not in use 
-
-    Parameters:
-    source_data: the source data called by load_data()
-    '''
-    # Load data
-    df = source_data
-
-    # Rename lengthier column names
-    df_formatted = df.rename(columns = {
-        "Percent positive tests in last day": "Percent_positive_tests", 
-        "Number of patients hospitalized with COVID-19": "Number_hospitalized",
-        "Number of patients in ICU on a ventilator with COVID-19": "Number_ventilator",
-        "Number of patients in ICU due to COVID-19": "Number_ICU",
-        "Reported Date": "Date",
-        'Total patients approved for testing as of Reporting Date': 'Patients_approved_for_testing',
-        'Total tests completed in the last day': 'Total_tests_completed'})
-    
-    # Replace spaces with underscores
-    df_formatted.columns = df_formatted.columns.str.replace(' ', '_')
-
-    # Remove columns with LTC (long-term care)
-    df_formatted = df_formatted[df_formatted.columns.drop(list(df_formatted.filter(regex='LTC')))]
-    # Remove defunct columns (haven't been updated in a long time)
-    df_formatted = df_formatted.drop(columns=['Confirmed_Negative', 'Presumptive_Negative', 'Presumptive_Positive'])
-    # Remove unused columns in application
-    df_formatted = df_formatted.drop(columns=['Under_Investigation', 'Patients_approved_for_testing', '_id'])
-
-    # Create Active Cases column
-    df_formatted['Active_Cases'] = df_formatted['Total_Cases'] - df_formatted['Resolved'] - df_formatted['Deaths']
-
-    # Format Date column
-    df_formatted['Date'] = pd.to_datetime(df_formatted['Date'],format='%Y-%m-%dT%H:%M:%S')
+from src.interactive.modules import pipeline
 
-    return df_formatted
+rerun_start = time.perf_counter()
 
-def create_diff_columns(covid_formatted_data, list_of_columns):
-    '''Create columns using .diff to calculate the difference between numbers today and yesterday.
-    
-    Paramaters:
-    covid_formatted_data: DataFrame that is the result of the function format_data
-    list_of_columns: List of columns that you'd like to know the difference
-    '''
-
-    df = covid_formatted_data
-    column_list = list_of_columns
-    for column_name in column_list:
-        df['New_'+str(column_name)] = df[str(column_name)].diff()
-
-    return df
-
-def refer_data(source_data, column_name, date):
-    '''Function to obtain specific data point in data.'''
-    df = source_data
-
-    if date == 'today':
-        # Obtain last updated 
-        data_point = df[column_name].iloc[-1]
-    elif date == 'yesterday':
-        data_point = df[column_name].iloc[-2]
-
-    return data_point
-
-def date_selection(summary_data, date_range):
-    '''Filter based on date range selection from 
-    daterange_selection selection'''
-
-    df = summary_data
-    
-    if date_range == 'All Weeks':
-        df_filtered = df
-    elif date_range == 'Last Week':
-        df_filtered = df.tail(7)
-    elif date_range == 'Last 2 weeks':
-        df_filtered = df.tail(14)
-    elif date_range == 'Last Month':
-        df_filtered = df.tail(30)
-    elif date_range == 'Last 3 Months':
-        df_filtered = df.tail(90)
-    else:
-        df_filtered = df.tail(180)
-    
-    return df_filtered    
-
-def change_dtypes(summary_data):
+# Set page to wide mode
+st.set_page_config(layout="wide")
 
-    df = summary_data
+# Export endpoint of the Django project (e.g. https://example.org/api/export), no export links if unset
+EXPORT_URL = os.environ.get('DASHBOARD_EXPORT_URL', '')
 
-    date_col = df.pop('Date')
-    perc_col = df.pop('Percent_positive_tests')
+# Chart options st.plotly_chart sends by default
+PLOTLY_CONFIG = json.dumps({'showLink': False, 'linkText': False})
 
-    df_formatted = df.replace(np.nan, 0)
-    df_formatted = df_formatted.astype('int64')
+def plotly_chart(spec, use_container_width=False):
+    '''Show a chart from its Plotly JSON, as cached by pipeline.figures.
+    st.plotly_chart would validate and serialize the figure again on
+    every rerun'''
 
-    df_formatted.insert(0, 'Date', date_col)
-    df_formatted.insert(6, 'Percent_positive_tests', perc_col)
+    proto = PlotlyChartProto()
+    proto.use_container_width = use_container_width
+    proto.figure.spec = spec
+    proto.figure.config = PLOTLY_CONFIG
+    st._main._enqueue('plotly_chart', proto)
 
-    return df_formatted
+def paginated_table(df, label, key):
+    '''Show one page of a frame, picked with a page number, so only
+    the visible rows are sent to the browser'''
 
-def create_pie_chart_df(summary_data):
+    pages = pipeline.tables.page_count(len(df))
+    number = st.number_input(label + ' page (of ' + str(pages) + '):', min_value=1, max_value=pages, value=1, step=1, key=key)
+    st.dataframe(pipeline.tables.page(df, number))
 
-    df = summary_data
+def summary_selection():
+    '''The summary data within the selected dates, stopping
+    the page if there is none'''
 
-    pie_chart_df = df.iloc[:, [0, 11, 12, 15]]
-    pie_chart_df = pie_chart_df.rename(columns={
-        'New_Total_Lineage_B.1.1.7':'B.1.1.7 Variant',
-        'New_Total_Cases':'New Cases',
-        'New_Total_Lineage_B.1.351':'B.1.351 Variant',
-        'New_Total_Lineage_P.1':'P.1 Variant'})
-    pie_chart_df = pie_chart_df.melt(id_vars = ['Date'])
-    pie_chart_df = pie_chart_df[pie_chart_df['Date'].str.contains(today.strftime('%Y-%m-%d'))]
-    
-    
-    return pie_chart_df
+    with pipeline.metrics.timer('date_selection'):
+        subset = pipeline.date_selection(dataset['summary'], daterange_selection, custom_dates)
+    if subset.empty:
+        st.warning('There is no data between the selected dates.')
+        st.stop()
+    return subset
 
 ## Streamlit Date Range Selector ##
 page = st.sidebar.selectbox("Data to display:", ["General Overview", "Cases", "Vaccinations"]) 
@@ -156,57 +58,57 @@ daterange_selection = st.sidebar.selectbox(
     "Date range to visualize:",
     ('All Weeks', 'Last Week', 'Last 2 weeks', 
     'Last Month', 'Last 3 Months', 
-    'Last 6 Months')
+    'Last 6 Months', pipeline.query.CUSTOM_RANGE)
 )
 
-# Load in and format data
-covid_data = load_data('COVID')
-vaccine_data = load_data('Vaccine')
-covid_formatted_data = format_data(covid_data)
-
-# Columns for COVID summary 
-summary_columns = ['Total_Cases', 'Deaths', 'Number_hospitalized','Number_ICU', 
-                    'Resolved', 'Total_tests_completed', 'Active_Cases', 'Total_Lineage_B.1.1.7_Alpha',
-                    'Total_Lineage_B.1.351_Beta', 'Total_Lineage_P.1_Gamma']
-summary_data = create_diff_columns(covid_formatted_data, summary_columns)
-
-# Subset the summary data by user selection from daterange_selection
-subset_summary_data = date_selection(summary_data, daterange_selection)
-
-# Change all column type to int64 except Date and Percent positive cases
-subset_summary_data = change_dtypes(subset_summary_data)
-
-# Data specifically for cases with new variants
-variant_subset = subset_summary_data[['Date', 'New_Total_Cases', 'New_Total_Lineage_B.1.1.7_Alpha',
-                                      'New_Total_Lineage_B.1.351_Beta', 'New_Total_Lineage_P.1_Gamma']]
-# Calculate the number of base strain cases
-variant_subset['New_Base_Strain'] = variant_subset['New_Total_Cases'] - variant_subset['New_Total_Lineage_B.1.1.7_Alpha'] - variant_subset['New_Total_Lineage_B.1.351_Beta'] - variant_subset['New_Total_Lineage_P.1_Gamma'] 
-variant_subset = variant_subset.drop(columns = ['New_Total_Cases'])
-# Rename columns
-variant_subset = variant_subset.rename(columns={
-    'New_Base_Strain':'Base COVID-19 Strain',
-    'New_Total_Lineage_B.1.1.7_Alpha':'B.1.1.7_Alpha Variant (UK)',
-    'New_Total_Lineage_B.1.351':'B.1.351 Variant (South Africa)',
-    'New_Total_Lineage_P.1':'P.1 Variant (Brazil)'})
-# Pivot to long format
-variant_subset_long = variant_subset.melt(id_vars = ['Date'])
-# Sort by date
-variant_subset_long = variant_subset_long.sort_values(by=['Date'])
-# Reset the index to have the data sorted by date
-variant_subset_long = variant_subset_long.reset_index()
-
-# Initialize lists to run for loops for summary_columns
-data_points_today = []
-data_points_yesterday = []
-columns_to_refer = [col for col in summary_data if 'New' in col]
-
-for i in columns_to_refer:
-    data_points_today.append(refer_data(summary_data, i, 'today'))
-    data_points_yesterday.append(refer_data(summary_data, i, 'yesterday'))
-
-# Convert lists to numpy arrays
-data_points_today = np.array(data_points_today, dtype='int64')
-data_points_yesterday = np.array(data_points_yesterday, dtype='int64')
+chart_resolution = st.sidebar.selectbox(
+    "Chart resolution:",
+    [pipeline.resample.AUTO] + list(pipeline.resample.RESOLUTIONS)
+)
+
+# Keep the data up to date in the background if enabled
+if pipeline.refresher.BACKGROUND_REFRESH:
+    pipeline.refresher.start()
+
+# Look up the precomputed data, shared read-only by every session of this process.
+# Each table is only read when a page first uses it.
+with pipeline.metrics.timer('load_dataset'):
+    dataset = pipeline.current_dataset()
+
+# Table the dates of the page are picked from
+page_data = dataset['vaccinations'] if page == "Vaccinations" else dataset['summary']
+
+# Pick the start and end dates in the sidebar for a custom range
+custom_dates = None
+if daterange_selection == pipeline.query.CUSTOM_RANGE:
+    custom_dates = st.sidebar.date_input(
+        "Dates to visualize:",
+        value=(page_data.index[0].date(), page_data.index[-1].date()),
+        min_value=page_data.index[0].date(),
+        max_value=page_data.index[-1].date())
+
+# Public health units to show on the Cases page, once the regional table has been built
+selected_regions = []
+if page == "Cases" and dataset['regions']:
+    selected_regions = st.sidebar.multiselect("Public health units:", dataset['regions'])
+
+# Download links for the selected dates, streamed by the Django export endpoint
+if EXPORT_URL:
+    with st.sidebar.beta_expander('Export data'):
+        export_metrics = st.multiselect("Metrics:", list(pipeline.export.available_metrics(dataset)))
+        export_format = st.selectbox("Format:", list(pipeline.export.FORMATS))
+        if export_metrics:
+            export_start, export_end = pipeline.query.date_range_bounds(daterange_selection, page_data.index[-1], custom_dates)
+            export_query = {'metrics': ','.join(export_metrics), 'format': export_format}
+            for name, value in (('start', export_start), ('end', export_end)):
+                if value is not None:
+                    export_query[name] = pd.Timestamp(value).strftime('%Y-%m-%d')
+            st.markdown('[Download ' + export_format.upper() + '](' + EXPORT_URL + '?' + urlencode(export_query) + ')')
+
+# Latest values of every metric, computed once per data refresh
+snapshot = dataset['snapshot']
+today_values = snapshot['today']
+vaccine_values = snapshot['vaccine']
 
 ### Streamlit UI ###
 
@@ -215,6 +117,8 @@ data_points_yesterday = np.array(data_points_yesterday, dtype='int64')
 st.title('Ontario COVID-19 Dashboard')
 
 if page == "General Overview":
+    # Subset the summary data by user selection from daterange_selection
+    subset_summary_data = summary_selection()
 
     # Set container
     daily_summary = st.beta_container() 
@@ -229,19 +133,21 @@ if page == "General Overview":
             st.text('')
             st.text('')
             st.text('')
-            st.markdown(':small_blue_diamond: ' + 'New cases: ' + str(data_points_today[0]))
-            st.markdown(':small_blue_diamond: ' + 'Resolved cases: ' + str(data_points_today[4]))
-            st.markdown(':small_blue_diamond: ' + 'Active cases: ' + str(subset_summary_data.iloc[-1, 13]))
-            st.markdown(':small_blue_diamond: ' + 'Deaths: ' + str(data_points_today[1]))
-            st.markdown(':small_blue_diamond: ' + 'Hospitalizations: ' + str(subset_summary_data.iloc[-1, 16]))
-            st.markdown(':small_blue_diamond: ' + 'New patients in the ICU: ' + str(subset_summary_data.iloc[-1, -4]))
-            st.markdown(':small_blue_diamond: ' + 'Tests today: ' + str(subset_summary_data.iloc[-1, -5]))
-            st.markdown(':small_blue_diamond: ' + 'Percent positive tests today: ' + str(subset_summary_data.iloc[-1, 6]) + '%')
-            st.markdown(':small_blue_diamond: ' + 'Vaccines administered: ' + str(vaccine_data.iloc[-1, 2]))
-            st.markdown(':small_blue_diamond: ' + 'Total doses administered: ' + str(vaccine_data.iloc[-1, 5]))
-            st.markdown(':small_blue_diamond: ' + 'Fully vaccinated individuals: ' + str(vaccine_data.iloc[-1, -1]))
+            st.markdown(':small_blue_diamond: ' + 'New cases: ' + str(today_values['New_Total_Cases']))
+            st.markdown(':small_blue_diamond: ' + 'Resolved cases: ' + str(today_values['New_Resolved']))
+            st.markdown(':small_blue_diamond: ' + 'Active cases: ' + str(today_values['Active_Cases']))
+            st.markdown(':small_blue_diamond: ' + 'Deaths: ' + str(today_values['New_Deaths']))
+            st.markdown(':small_blue_diamond: ' + 'Hospitalizations: ' + str(today_values['New_Number_hospitalized']))
+            st.markdown(':small_blue_diamond: ' + 'New patients in the ICU: ' + str(today_values['New_Number_ICU']))
+            st.markdown(':small_blue_diamond: ' + 'Tests today: ' + str(today_values['Total_tests_completed']))
+            st.markdown(':small_blue_diamond: ' + 'Percent positive tests today: ' + str(today_values['Percent_positive_tests']) + '%')
+            st.markdown(':small_blue_diamond: ' + 'Vaccines administered: ' + str(vaccine_values['previous_day_total_doses_administered']))
+            st.markdown(':small_blue_diamond: ' + 'Total doses administered: ' + str(vaccine_values['total_doses_administered']))
+            st.markdown(':small_blue_diamond: ' + 'Fully vaccinated individuals: ' + str(vaccine_values['total_individuals_fully_vaccinated']))
         
         with col2:
+            # Cases with new variants over the same dates
+            variant_subset_long = pipeline.date_selection(dataset['variants'], daterange_selection, custom_dates)
             pie_chart_df = variant_subset_long.tail(4)
             pie_chart = px.pie(pie_chart_df, values = 'value', names = 'variable')
             pie_chart.update_layout( xaxis_title='',yaxis_title='')
@@ -258,35 +164,17 @@ if page == "General Overview":
         st.text('')
         st.text('')
 
-        # Create table
-        col1, col2, col3, col4, col5, col6, col7, col8, col9 = st.beta_columns(9)
-        with col1: st.markdown('**Date**')
-        with col2: st.markdown('**Cases**')
-        with col3: st.markdown('**Resolved cases**')
-        with col4: st.markdown('**Active cases**')
-        with col5: st.markdown('**Deaths**')
-        with col6: st.markdown('**Hospitalizations**')
-        with col7: st.markdown('**ICU patients**')
-        with col8: st.markdown('**Tests conducted**')
-        with col9: st.markdown('**% positive tests**')
-
-        for i in range(1, 6):
-            cols = st.beta_columns(9)
-            cols[0].markdown(subset_summary_data.iloc[-i, 0])
-            cols[1].markdown(subset_summary_data.iloc[-i, 4])
-            cols[2].markdown(subset_summary_data.iloc[-i, 2])
-            cols[3].markdown(subset_summary_data.iloc[-i, 13])
-            cols[4].markdown(subset_summary_data.iloc[-i, 3])
-            cols[5].markdown(subset_summary_data.iloc[-i, 7])
-            cols[6].markdown(subset_summary_data.iloc[-i, 8])
-            cols[7].markdown(subset_summary_data.iloc[-i, 5])
-            cols[8].markdown(subset_summary_data.iloc[-i, 6])
-        
-        st.write(subset_summary_data)
-        st.write(vaccine_data)
+        # Create table: one pre-formatted element rather than one per cell
+        st.table(pipeline.recent_days(dataset, daterange_selection, custom_dates))
+
+        # Raw data, one page at a time
+        paginated_table(subset_summary_data, 'COVID-19 data', 'summary_page')
+        paginated_table(dataset['vaccine'], 'Vaccine data', 'vaccine_page')
 
 
 elif page == "Cases":
+    subset_summary_data = summary_selection()
+
     # Set container #
     graph_container = st.beta_container()
     
@@ -295,45 +183,55 @@ elif page == "Cases":
         st.header('Graphs')
         st.text('')
 
-        total_cases_fig = px.bar(subset_summary_data, x = 'Date', y = "Total_Cases")
-        total_cases_fig.update_layout(title="Total Cases", xaxis_title='', yaxis_title='')
-
-        active_cases_fig = px.bar(subset_summary_data, x = "Date", y = "Active_Cases")
-        active_cases_fig.update_layout(title = 'Active Cases', xaxis_title='',yaxis_title='')
-
-        new_cases_fig = px.bar(subset_summary_data, x='Date', y = "New_Total_Cases")
-        new_cases_fig.update_layout(title = "New Cases", xaxis_title="", yaxis_title="")
-
-        total_deaths_fig = px.bar(subset_summary_data, x='Date', y='Deaths')
-        total_deaths_fig.update_layout(title = 'Total Deaths', xaxis_title='', yaxis_title='')
-
-        new_deaths_fig = px.bar(subset_summary_data, x = "Date", y = "New_Deaths")
-        new_deaths_fig.update_layout(title='New Deaths', xaxis_title='',yaxis_title='')
-
-        new_hosp_fig = px.bar(subset_summary_data, x = "Date", y = "New_Number_hospitalized")
-        new_hosp_fig.update_layout(title='New patients hospitalized', xaxis_title='',yaxis_title='')
-
-        new_ICU_fig = px.bar(subset_summary_data, x = "Date", y = "New_Number_ICU")
-        new_ICU_fig.update_layout(title='New number of patients in the ICU', xaxis_title='',yaxis_title='')
-
-        new_resolved_fig = px.bar(subset_summary_data, x = "Date", y = "New_Resolved")
-        new_resolved_fig.update_layout(title='New number of cases resolved', xaxis_title='',yaxis_title='')
-
-        vaccination_fig = px.bar(vaccine_data, x = "report_date", y = "total_individuals_fully_vaccinated")
-        vaccination_fig.update_layout(title = "Fully vaccinated individuals", xaxis_title='', yaxis_title='')
-
-        st.plotly_chart(total_cases_fig, use_container_width=True)
-        st.plotly_chart(active_cases_fig, use_container_width=True)
-        st.plotly_chart(new_cases_fig, use_container_width=True)
-        st.plotly_chart(total_deaths_fig, use_container_width=True)
-        st.plotly_chart(new_deaths_fig, use_container_width=True)
-        st.plotly_chart(new_hosp_fig, use_container_width=True)
-        st.plotly_chart(new_ICU_fig, use_container_width=True)
-        st.plotly_chart(new_resolved_fig, use_container_width=True)
-        st.plotly_chart(vaccination_fig, use_container_width=True)
+        # Figures are cached per dataset version and input slice
+        with pipeline.metrics.timer('render_charts'):
+            if selected_regions:
+                # Daily series summed over the selected public health units
+                regions_data = pipeline.regional_series(dataset, selected_regions, daterange_selection, custom_dates)
+                regions_title = ', '.join(selected_regions)
+                for column, title in pipeline.regional.REGIONAL_CHARTS:
+                    plotly_chart(pipeline.figures.bar_chart(regions_data, 'Date', column, title + ' (' + regions_title + ')',
+                                                   dataset['regional_version'], chart_resolution),
+                                 use_container_width=True)
+
+            for column, title in pipeline.figures.CASES_CHARTS:
+                plotly_chart(pipeline.figures.bar_chart(subset_summary_data, 'Date', column, title, dataset['version'], chart_resolution),
+                             use_container_width=True)
+
+            vaccination_fig = pipeline.figures.bar_chart(dataset['vaccine'], 'report_date', 'total_individuals_fully_vaccinated',
+                                                'Fully vaccinated individuals', dataset['version'], chart_resolution)
+            plotly_chart(vaccination_fig, use_container_width=True)
 
 elif page == "Vaccinations":
-    pass
+    # Every series below is computed once per data refresh
+    vaccinations = dataset['vaccinations']
+    subset_vaccinations = pipeline.date_selection(vaccinations, daterange_selection, custom_dates)
+    latest = vaccinations.iloc[-1]
+
+    vaccination_summary = st.beta_container()
+    with vaccination_summary:
+        st.header('Vaccinations')
+        st.subheader(latest['Date'].strftime('%B %d, %Y'))
+        col1, col2, col3, col4 = st.beta_columns(4)
+        col1.markdown(':small_blue_diamond: ' + 'At least one dose: ' + '{:.1f}%'.format(latest['Coverage_at_least_one']))
+        col2.markdown(':small_blue_diamond: ' + 'Fully vaccinated: ' + '{:.1f}%'.format(latest['Coverage_fully_vaccinated']))
+        col3.markdown(':small_blue_diamond: ' + 'Doses per day (7-day average): ' + '{:,.0f}'.format(latest['New_doses_7day_avg']))
+        col4.markdown(':small_blue_diamond: ' + 'Daily doses per 100,000 people: ' + '{:,.0f}'.format(latest['Doses_per_100k_7day_avg']))
+
+        st.markdown('**Coverage milestones** (projected at the current 7-day average pace)')
+        st.table([{
+            'Measure': milestone['measure'],
+            'Target': str(milestone['target']) + '%',
+            'Date': milestone['date'] or 'Not projected',
+            'Status': 'Projected' if milestone['projected'] else 'Reached'} for milestone in dataset['milestones']])
+
+    if subset_vaccinations.empty:
+        st.warning('There is no vaccination data between the selected dates.')
+    else:
+        with pipeline.metrics.timer('render_charts'):
+            for chart, column, title in pipeline.figures.VACCINATION_CHARTS:
+                figure = getattr(pipeline.figures, chart)(subset_vaccinations, 'Date', column, title, dataset['version'], chart_resolution)
+                plotly_chart(figure, use_container_width=True)
 
 st.text('')
 st.text('')
@@ -348,3 +246,19 @@ st.text('')
 st.text('')
 st.text('')
 st.text("This dashboard uses data from the Government of Ontario, updated daily and available freely through the Open Government License - Ontario.")
+
+## Debug panel, only shown when the app is opened with ?debug=1 ##
+if pipeline.metrics.ENABLED:
+    pipeline.metrics.observe('rerun', time.perf_counter() - rerun_start)
+if 'debug' in st.experimental_get_query_params():
+    with st.sidebar.beta_expander('Debug', expanded=True):
+        if not pipeline.metrics.ENABLED:
+            st.markdown('Timings are off: set DASHBOARD_METRICS=1 to record them.')
+        st.markdown('**Dataset** ' + dataset['version'] + ', loaded: ' + ', '.join(sorted(dataset.computed())))
+        if pipeline.metrics.stage_rows():
+            st.markdown('**Stage timings**')
+            st.table(pipeline.metrics.stage_rows())
+        st.markdown('**Counters**')
+        st.table([dict(row, labels=', '.join(k + '=' + str(v) for k, v in row['labels'].items()))
+                  for row in pipeline.metrics.counter_rows()])
+        st.code(pipeline.metrics.prometheus_text(), language='text')
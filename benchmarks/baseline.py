@@ -0,0 +1,234 @@
+''' The data pipeline of the dashboard as of its baseline commit (43a856e), to check the current one against.
+
+The functions below are those of the baseline app.py, unchanged. run_baseline feeds
+them the same payloads as check_pipeline, loaded the way the baseline load_data did
+(json_normalize, then NA filled with 0), and renders what each page showed.
+
+A few outputs changed on purpose since the baseline; INTENDED_DIFFERENCES lists them,
+and run_baseline applies each of those changes to the baseline outputs, in a step
+marked with the key of the change, so that the rest of the output is still checked.
+'''
+import json
+
+import numpy as np
+import pandas as pd
+
+# Changes made on purpose since the baseline, as {key: description}
+INTENDED_DIFFERENCES = {
+    'calendar_ranges': "'Last Month', 'Last 3 Months' and 'Last 6 Months' are calendar ranges ending on the "
+                       "latest date (query.date_range_bounds), not the last 30, 90 and 180 rows",
+    'stable_variant_order': 'variants are sorted by date with a stable sort, so each day keeps the order of '
+                            'its variants, and are indexed by date instead of carrying the old index as a column',
+    'recent_days_format': 'the "Last 5 days" table shows dates as YYYY-MM-DD, counts with thousands separators '
+                          'and percentages rounded to 2 decimals',
+}
+
+# Columns for COVID summary (the baseline summary_columns)
+SUMMARY_COLUMNS = ['Total_Cases', 'Deaths', 'Number_hospitalized','Number_ICU',
+                   'Resolved', 'Total_tests_completed', 'Active_Cases', 'Total_Lineage_B.1.1.7_Alpha',
+                   'Total_Lineage_B.1.351_Beta', 'Total_Lineage_P.1_Gamma']
+
+# Sidebar date ranges of the baseline
+DATE_RANGES = ['All Weeks', 'Last Week', 'Last 2 weeks', 'Last Month', 'Last 3 Months', 'Last 6 Months']
+
+# Columns of the "Last 5 days" table, as (position in the summary, header)
+RECENT_DAYS_COLUMNS = [(0, 'Date'), (4, 'Cases'), (2, 'Resolved cases'), (13, 'Active cases'), (3, 'Deaths'),
+                       (7, 'Hospitalizations'), (8, 'ICU patients'), (5, 'Tests conducted'), (6, '% positive tests')]
+
+# Vaccine figures of the General Overview, as positions in the vaccine data
+VACCINE_COLUMNS = [2, 5, -1]
+
+
+def load_data(body):
+    ''' Parse a datastore_search response body like the baseline load_data did.'''
+    data = json.loads(body.decode('utf-8'))
+    # Flatten JSON
+    df = pd.json_normalize(data['result']['records'])
+    # Fill NA's with 0
+    df = df.fillna(0)
+
+    return df
+
+
+def format_data(source_data):
+    ''' Format the COVID-19 data to:
+    1) shorten long column names,
+    2) replace spaces with underscores,
+    3) remove columns not in use
+
+    Parameters:
+    source_data: the source data called by load_data()
+    '''
+    # Load data
+    df = source_data
+
+    # Rename lengthier column names
+    df_formatted = df.rename(columns = {
+        "Percent positive tests in last day": "Percent_positive_tests",
+        "Number of patients hospitalized with COVID-19": "Number_hospitalized",
+        "Number of patients in ICU on a ventilator with COVID-19": "Number_ventilator",
+        "Number of patients in ICU due to COVID-19": "Number_ICU",
+        "Reported Date": "Date",
+        'Total patients approved for testing as of Reporting Date': 'Patients_approved_for_testing',
+        'Total tests completed in the last day': 'Total_tests_completed'})
+
+    # Replace spaces with underscores
+    df_formatted.columns = df_formatted.columns.str.replace(' ', '_')
+
+    # Remove columns with LTC (long-term care)
+    df_formatted = df_formatted[df_formatted.columns.drop(list(df_formatted.filter(regex='LTC')))]
+    # Remove defunct columns (haven't been updated in a long time)
+    df_formatted = df_formatted.drop(columns=['Confirmed_Negative', 'Presumptive_Negative', 'Presumptive_Positive'])
+    # Remove unused columns in application
+    df_formatted = df_formatted.drop(columns=['Under_Investigation', 'Patients_approved_for_testing', '_id'])
+
+    # Create Active Cases column
+    df_formatted['Active_Cases'] = df_formatted['Total_Cases'] - df_formatted['Resolved'] - df_formatted['Deaths']
+
+    # Format Date column
+    df_formatted['Date'] = pd.to_datetime(df_formatted['Date'],format='%Y-%m-%dT%H:%M:%S')
+
+    return df_formatted
+
+
+def create_diff_columns(covid_formatted_data, list_of_columns):
+    '''Create columns using .diff to calculate the difference between numbers today and yesterday.
+
+    Paramaters:
+    covid_formatted_data: DataFrame that is the result of the function format_data
+    list_of_columns: List of columns that you'd like to know the difference
+    '''
+
+    df = covid_formatted_data
+    column_list = list_of_columns
+    for column_name in column_list:
+        df['New_'+str(column_name)] = df[str(column_name)].diff()
+
+    return df
+
+
+def refer_data(source_data, column_name, date):
+    '''Function to obtain specific data point in data.'''
+    df = source_data
+
+    if date == 'today':
+        # Obtain last updated
+        data_point = df[column_name].iloc[-1]
+    elif date == 'yesterday':
+        data_point = df[column_name].iloc[-2]
+
+    return data_point
+
+
+def date_selection(summary_data, date_range):
+    '''Filter based on date range selection from
+    daterange_selection selection'''
+
+    df = summary_data
+
+    if date_range == 'All Weeks':
+        df_filtered = df
+    elif date_range == 'Last Week':
+        df_filtered = df.tail(7)
+    elif date_range == 'Last 2 weeks':
+        df_filtered = df.tail(14)
+    elif date_range == 'Last Month':
+        df_filtered = df.tail(30)
+    elif date_range == 'Last 3 Months':
+        df_filtered = df.tail(90)
+    else:
+        df_filtered = df.tail(180)
+
+    return df_filtered
+
+
+def change_dtypes(summary_data):
+
+    df = summary_data
+
+    date_col = df.pop('Date')
+    perc_col = df.pop('Percent_positive_tests')
+
+    df_formatted = df.replace(np.nan, 0)
+    df_formatted = df_formatted.astype('int64')
+
+    df_formatted.insert(0, 'Date', date_col)
+    df_formatted.insert(6, 'Percent_positive_tests', perc_col)
+
+    return df_formatted
+
+
+def variant_data(subset_summary_data, sort_kind='quicksort'):
+    ''' The variant data of the baseline app, for its pie chart.'''
+    # Data specifically for cases with new variants
+    variant_subset = subset_summary_data[['Date', 'New_Total_Cases', 'New_Total_Lineage_B.1.1.7_Alpha',
+                                          'New_Total_Lineage_B.1.351_Beta', 'New_Total_Lineage_P.1_Gamma']]
+    # Calculate the number of base strain cases
+    variant_subset['New_Base_Strain'] = variant_subset['New_Total_Cases'] - variant_subset['New_Total_Lineage_B.1.1.7_Alpha'] - variant_subset['New_Total_Lineage_B.1.351_Beta'] - variant_subset['New_Total_Lineage_P.1_Gamma']
+    variant_subset = variant_subset.drop(columns = ['New_Total_Cases'])
+    # Rename columns
+    variant_subset = variant_subset.rename(columns={
+        'New_Base_Strain':'Base COVID-19 Strain',
+        'New_Total_Lineage_B.1.1.7_Alpha':'B.1.1.7_Alpha Variant (UK)',
+        'New_Total_Lineage_B.1.351':'B.1.351 Variant (South Africa)',
+        'New_Total_Lineage_P.1':'P.1 Variant (Brazil)'})
+    # Pivot to long format
+    variant_subset_long = variant_subset.melt(id_vars = ['Date'])
+    # Sort by date
+    variant_subset_long = variant_subset_long.sort_values(by=['Date'], kind=sort_kind)
+    # Reset the index to have the data sorted by date
+    variant_subset_long = variant_subset_long.reset_index()
+
+    return variant_subset_long
+
+
+def render(df):
+    ''' Render a table as CSV, as check_pipeline does.'''
+    return df.to_csv(index=False, float_format='%.6g', date_format='%Y-%m-%d')
+
+
+def run_baseline(covid_body, vaccine_body):
+    ''' Compute the outputs of the baseline pipeline that the current one still has, as {name: text}.
+
+    Every selection starts from a fresh copy of the summary, like each rerun of the
+    baseline app did (its change_dtypes pops columns off the frame it is given).
+    '''
+    covid_data = load_data(covid_body)
+    vaccine_data = load_data(vaccine_body)
+    summary_data = create_diff_columns(format_data(covid_data), SUMMARY_COLUMNS)
+
+    outputs = {}
+    for date_range in DATE_RANGES:
+        subset_summary_data = change_dtypes(date_selection(summary_data.copy(), date_range))
+        if date_range in ('Last Month', 'Last 3 Months', 'Last 6 Months'):
+            # calendar_ranges
+            latest = summary_data['Date'].iloc[-1]
+            all_weeks = change_dtypes(summary_data.copy())
+            subset_summary_data = all_weeks[all_weeks['Date'] >= latest - pd.DateOffset(months={
+                'Last Month': 1, 'Last 3 Months': 3, 'Last 6 Months': 6}[date_range]) + pd.Timedelta(days=1)]
+        if date_range == 'All Weeks':
+            outputs['summary'] = render(subset_summary_data)
+            # stable_variant_order
+            outputs['variants'] = render(variant_data(subset_summary_data, 'mergesort').drop(columns=['index']))
+        outputs['summary ' + date_range] = render(subset_summary_data[['Date', 'Total_Cases']])
+
+        recent_days = pd.DataFrame({header: subset_summary_data.iloc[-5:, position].iloc[::-1].to_numpy()
+                                    for position, header in RECENT_DAYS_COLUMNS})
+        # recent_days_format
+        recent_days['Date'] = pd.DatetimeIndex(recent_days['Date']).strftime('%Y-%m-%d')
+        for _, header in RECENT_DAYS_COLUMNS[1:-1]:
+            recent_days[header] = recent_days[header].map('{:,}'.format)
+        recent_days['% positive tests'] = recent_days['% positive tests'].round(2)
+        # Each cell was shown as the markdown of its value
+        recent_days = recent_days.astype('str')
+        outputs['recent_days ' + date_range] = render(recent_days)
+
+    # The figures of the General Overview
+    columns_to_refer = [col for col in summary_data if 'New' in col]
+    outputs['snapshot'] = json.dumps({
+        'today': {column: int(refer_data(summary_data, column, 'today')) for column in columns_to_refer},
+        'yesterday': {column: int(refer_data(summary_data, column, 'yesterday')) for column in columns_to_refer},
+        'vaccine': {vaccine_data.columns[position]: int(vaccine_data.iloc[-1, position]) for position in VACCINE_COLUMNS}},
+        indent=1, sort_keys=True)
+
+    return outputs
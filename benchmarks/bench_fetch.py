@@ -0,0 +1,77 @@
+''' Measure throughput and peak RSS of the Datastore loader against the local stub server.
+
+Each loader runs in its own subprocess so that peak RSS is not shared between them:
+
+    python -m benchmarks.bench_fetch --rows 100000
+'''
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import pandas as pd
+import urllib3
+
+from benchmarks.stub_datastore import start_server
+from src.interactive.modules import datastore
+
+
+def load_single_request(resource_id):
+    ''' The original loader: one limit=100000 request decoded and flattened in one go.'''
+    http = urllib3.PoolManager()
+    response = http.request('GET', datastore.DATASTORE_URL + '/datastore_search?resource_id=' + resource_id + '&limit=100000')
+    data = json.loads(response.data.decode('utf-8'))
+    return pd.json_normalize(data['result']['records'])
+
+
+def load_paginated(resource_id):
+    return datastore.fetch_resource(resource_id)
+
+
+LOADERS = {
+    'single_request': load_single_request,
+    'paginated': load_paginated,
+}
+
+
+def run_loader(name, api_url):
+    ''' Run one loader over both resources and print its measurements as JSON.'''
+    datastore.DATASTORE_URL = api_url
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    rows = sum(len(LOADERS[name](resource_id)) for resource_id in datastore.RESOURCE_IDS.values())
+    elapsed = time.perf_counter() - start
+    # Time spent in the loader itself, apart from waiting on the stub server
+    cpu = time.process_time() - cpu_start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(json.dumps({
+        'loader': name,
+        'rows': rows,
+        'seconds': round(elapsed, 4),
+        'rows_per_second': round(rows / elapsed),
+        'cpu_seconds': round(cpu, 4),
+        'rows_per_cpu_second': round(rows / cpu),
+        # ru_maxrss is reported in kilobytes on Linux
+        'peak_rss_mb': round(peak_rss / 1024, 1),
+        'peak_rss_increase_mb': round((peak_rss - baseline_rss) / 1024, 1)}))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--loader', choices=list(LOADERS))
+    parser.add_argument('--api-url')
+    args = parser.parse_args()
+
+    if args.loader:
+        run_loader(args.loader, args.api_url)
+    else:
+        server = start_server(args.rows)
+        for name in LOADERS:
+            subprocess.run([sys.executable, '-m', 'benchmarks.bench_fetch',
+                            '--loader', name, '--api-url', server.api_url], check=True)
+        server.shutdown()
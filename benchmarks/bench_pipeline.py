@@ -0,0 +1,208 @@
+''' Measure wall time and peak memory of each stage of the dashboard pipeline, offline.
+
+The stages run on the fixture payloads of the Ontario resources in the fixtures
+directory, datastore_search responses recorded with
+
+    python -m benchmarks.bench_pipeline --record
+
+which the tests load the same way (load_fixture, then scale_payload and load_payload).
+Each payload is scaled by tiling its records over later dates:
+
+    python -m benchmarks.bench_pipeline --scales 1 10 100 1000 --output results.json
+'''
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import plotly
+
+from src.interactive.modules import build, datastore, figures, query, resample
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Range selected in the sidebar for the date_selection stage
+DATE_RANGE = 'Last 3 Months'
+
+
+def fixture_path(type):
+    return os.path.join(FIXTURES_DIR, type.lower() + '.json')
+
+
+def record_fixtures():
+    ''' Download every record of each resource in one response and save it as its fixture.'''
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    for type, resource_id in datastore.RESOURCE_IDS.items():
+        response = datastore.http.request('GET', datastore.DATASTORE_URL + '/datastore_search',
+                                          fields=datastore.page_fields(resource_id, 0, 1000000))
+        if response.status != 200:
+            raise IOError('Recording ' + type + ' failed with status ' + str(response.status))
+        with open(fixture_path(type), 'w') as f:
+            json.dump(json.loads(response.data), f, indent=1)
+        print('Recorded ' + fixture_path(type))
+
+
+def load_fixture(type):
+    ''' Return the result object of a resource's recorded fixture payload.'''
+    with open(fixture_path(type), 'rb') as f:
+        return json.loads(f.read())['result']
+
+
+def scale_payload(result, scale):
+    ''' Tile the records of a result scale times, each copy starting the day after the previous one ends.
+
+    Raises ValueError if the last copy would end past pd.Timestamp.max, as the dates
+    could not be parsed into datetime64[ns].
+
+    Returns (the payload encoded as a datastore_search response body, its number of records).
+    '''
+    records = result['records']
+    date_fields = [field['id'] for field in result['fields'] if field['type'] == 'timestamp']
+    dates = {name: [datetime.datetime.fromisoformat(record[name]) if record[name] else None for record in records]
+             for name in date_fields}
+    known = [date for values in dates.values() for date in values if date is not None]
+    span = max(known) - min(known) + datetime.timedelta(days=1) if known else datetime.timedelta(0)
+    # Compared as durations, as the end date itself may not be representable
+    if known and (scale - 1) * span > pd.Timestamp.max - pd.Timestamp(max(known)):
+        raise ValueError('Scaling %d records over %d days %d times ends past %s'
+                         % (len(records), span.days, scale, pd.Timestamp.max.date()))
+
+    scaled = []
+    for copy in range(scale):
+        for i, record in enumerate(records):
+            record = dict(record, _id=copy * len(records) + i + 1)
+            for name in date_fields:
+                if dates[name][i] is not None:
+                    record[name] = (dates[name][i] + copy * span).isoformat()
+            scaled.append(record)
+
+    body = json.dumps({'success': True, 'result': dict(result, records=scaled, total=len(scaled))}).encode('utf-8')
+
+    return body, len(scaled)
+
+
+def load_payload(type, body, rows):
+    ''' Parse a response body like load_data does: streamed into typed columns, then NA filled.'''
+    resource_id = datastore.RESOURCE_IDS[type]
+    chunks = (body[i:i + datastore.STREAM_CHUNK_SIZE] for i in range(0, len(body), datastore.STREAM_CHUNK_SIZE))
+    page = datastore.parse_page(chunks, rows, datastore.RESOURCE_SCHEMAS[resource_id])
+    df = datastore.columns_to_frame([page['columns']], page['fields'], datastore.RESOURCE_SCHEMAS[resource_id])
+
+    return df.fillna(0)
+
+
+def date_selection(summary_data):
+    start, end = query.date_range_bounds(DATE_RANGE, summary_data['Date'].iloc[-1])
+    return query.select_dates(summary_data, start, end)
+
+
+def cases_charts(summary_data):
+    return [figures.bar_chart(summary_data, 'Date', column, title, 'bench', resample.AUTO)
+            for column, title in figures.CASES_CHARTS]
+
+
+def build_figures(summary_data):
+    ''' Build and serialize every chart of the Cases page from scratch (the figure cache is emptied first).'''
+    figures.figure_cache = figures.FigureCache(figures.FIGURE_CACHE_BYTES)
+    return cases_charts(summary_data)
+
+
+def rerun_figures(summary_data):
+    ''' Look up every chart of the Cases page again, as a rerun does: their JSON comes from the figure cache.'''
+    return cases_charts(summary_data)
+
+
+def measure(function, *args, repeat=5):
+    ''' Run a stage once under tracemalloc for its peak memory, then repeat times for its wall time.
+
+    Returns (result, {'seconds_min', 'seconds_median', 'peak_mb'}).
+    '''
+    tracemalloc.start()
+    result = function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        seconds.append(time.perf_counter() - start)
+
+    return result, {
+        'seconds_min': round(min(seconds), 6),
+        'seconds_median': round(statistics.median(seconds), 6),
+        'peak_mb': round(peak / 1024 / 1024, 3)}
+
+
+def run_pipeline(bodies, repeat=5):
+    ''' Run every stage on the scaled (body, rows) payloads, yielding (stage, rows in its input, measurements).'''
+    covid_data, stats = measure(load_payload, 'COVID', *bodies['COVID'], repeat=repeat)
+    yield 'load_covid', len(covid_data), stats
+    vaccine_data, stats = measure(load_payload, 'Vaccine', *bodies['Vaccine'], repeat=repeat)
+    yield 'load_vaccine', len(vaccine_data), stats
+
+    formatted, stats = measure(build.format_data, covid_data, repeat=repeat)
+    yield 'format_data', len(covid_data), stats
+    diffed, stats = measure(build.create_diff_columns, formatted, build.SUMMARY_COLUMNS, repeat=repeat)
+    yield 'create_diff_columns', len(formatted), stats
+    summary_data, stats = measure(build.change_dtypes, diffed, repeat=repeat)
+    yield 'change_dtypes', len(diffed), stats
+    summary_data, stats = measure(build.index_by_date, summary_data, repeat=repeat)
+    yield 'index_by_date', len(summary_data), stats
+    _, stats = measure(date_selection, summary_data, repeat=repeat)
+    yield 'date_selection', len(summary_data), stats
+    _, stats = measure(build.create_variant_data, summary_data, repeat=repeat)
+    yield 'variant_melt', len(summary_data), stats
+    _, stats = measure(build.create_snapshot, summary_data, vaccine_data, repeat=repeat)
+    yield 'create_snapshot', len(summary_data), stats
+    _, stats = measure(build.create_vaccination_data, vaccine_data, repeat=repeat)
+    yield 'create_vaccination_data', len(vaccine_data), stats
+
+    _, stats = measure(build_figures, summary_data, repeat=repeat)
+    yield 'build_figures', len(summary_data), stats
+    _, stats = measure(rerun_figures, summary_data, repeat=repeat)
+    yield 'rerun_figures', len(summary_data), stats
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plotly': plotly.__version__,
+        'machine': platform.machine()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='also write the results to this JSON file')
+    parser.add_argument('--record', action='store_true', help='record the fixture payloads from the Datastore API and exit')
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures()
+        raise SystemExit
+
+    fixtures = {type: load_fixture(type) for type in datastore.RESOURCE_IDS}
+    results = []
+    for scale in args.scales:
+        bodies = {type: scale_payload(result, scale) for type, result in fixtures.items()}
+        for stage, rows, stats in run_pipeline(bodies, args.repeat):
+            row = dict({'scale': scale, 'stage': stage, 'rows': rows}, **stats)
+            results.append(row)
+            print(json.dumps(row))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'fixture_records': {type: len(result['records']) for type, result in fixtures.items()},
+                'environment': environment(),
+                'results': results}, f, indent=2)
@@ -0,0 +1,142 @@
+''' Check that the data pipeline still produces the outputs of the baseline app for the fixture payloads.
+
+Runs the pipeline offline on the recorded fixture payloads of bench_pipeline, tiled
+over CHECK_SCALE times as many days, and compares every derived table and the snapshot
+with the expected outputs in the fixtures directory. Those are recorded from the
+pipeline of the baseline commit (benchmarks/baseline.py), with the changes listed in
+baseline.INTENDED_DIFFERENCES applied; the outputs the baseline had no counterpart for
+(NEW_OUTPUTS) are recorded from the pipeline itself, and only catch later changes.
+
+    python -m benchmarks.check_pipeline
+    python -m benchmarks.check_pipeline --update    # record the expected outputs again
+'''
+import argparse
+import gzip
+import json
+import os
+
+from benchmarks import baseline
+from benchmarks.bench_pipeline import FIXTURES_DIR, load_fixture, load_payload, scale_payload
+from src.interactive.modules import build, datastore, pipeline, query
+
+EXPECTED_PATH = os.path.join(FIXTURES_DIR, 'expected.json.gz')
+
+# Copies of the fixture records checked, so that every date range selects different days
+CHECK_SCALE = 30
+
+# Vaccine figures of the baseline General Overview (baseline.VACCINE_COLUMNS of its vaccine data)
+VACCINE_FIGURES = ['previous_day_total_doses_administered', 'total_doses_administered', 'total_individuals_fully_vaccinated']
+
+# Outputs the baseline app did not have, as {name: description}
+NEW_OUTPUTS = {
+    'vaccinations': 'daily vaccination series of the Vaccine Data page',
+    'milestones': 'projected vaccination milestones',
+    'snapshot details': 'snapshot values beyond the New_* columns and vaccine figures the baseline showed, and its dates',
+}
+
+
+def scaled_payloads(fixtures):
+    ''' The payloads checked, as {type: (body, rows)}.'''
+    return {type: scale_payload(result, CHECK_SCALE) for type, result in fixtures.items()}
+
+
+def render(df):
+    ''' Render a table as CSV, so a change of value, column, order or type shows up as a changed line.'''
+    return df.to_csv(index=False, float_format='%.6g', date_format='%Y-%m-%d')
+
+
+def run_pipeline(fixtures):
+    ''' Compute every output of the pipeline from the fixture payloads, as {name: text}.'''
+    payloads = scaled_payloads(fixtures)
+    covid_data = load_payload('COVID', *payloads['COVID'])
+    vaccine_data = load_payload('Vaccine', *payloads['Vaccine'])
+
+    summary_data = build.format_data(covid_data)
+    summary_data = build.create_diff_columns(summary_data, build.SUMMARY_COLUMNS)
+    summary_data = build.index_by_date(build.change_dtypes(summary_data))
+    variants = build.create_variant_data(summary_data)
+    vaccinations = build.create_vaccination_data(vaccine_data)
+
+    texts = {
+        'summary': render(summary_data),
+        'variants': render(variants),
+        'vaccinations': vaccinations.to_csv(float_format='%.6g', date_format='%Y-%m-%d'),
+    }
+    for date_range in query.DATE_RANGE_OFFSETS:
+        selected = pipeline.date_selection(summary_data, date_range)
+        texts['summary ' + date_range] = render(selected[['Date', 'Total_Cases']])
+        texts['recent_days ' + date_range] = render(pipeline.tables.recent_days(selected).reset_index())
+
+    snapshot = build.create_snapshot(summary_data, vaccine_data)
+    shown = {
+        'today': {column: value for column, value in snapshot['today'].items() if 'New' in column},
+        'yesterday': {column: value for column, value in snapshot['yesterday'].items() if 'New' in column},
+        'vaccine': {column: snapshot['vaccine'][column] for column in VACCINE_FIGURES}}
+    texts['snapshot'] = json.dumps(shown, indent=1, sort_keys=True)
+    texts['snapshot details'] = json.dumps(snapshot, indent=1, sort_keys=True, default=str)
+    texts['milestones'] = json.dumps(build.project_milestones(vaccinations), indent=1, default=str)
+
+    return texts
+
+
+def run_baseline(fixtures):
+    ''' Compute the outputs of the baseline pipeline from the fixture payloads, as {name: text}.'''
+    payloads = scaled_payloads(fixtures)
+
+    return baseline.run_baseline(payloads['COVID'][0], payloads['Vaccine'][0])
+
+
+def expected_outputs(fixtures):
+    ''' The outputs to record: those of the baseline, and the NEW_OUTPUTS of the pipeline.'''
+    outputs = run_pipeline(fixtures)
+    expected = run_baseline(fixtures)
+    expected.update({name: outputs[name] for name in NEW_OUTPUTS})
+
+    return expected
+
+
+def first_difference(expected, actual):
+    expected_lines, actual_lines = expected.splitlines(), actual.splitlines()
+    for number, (expected_line, actual_line) in enumerate(zip(expected_lines, actual_lines), 1):
+        if expected_line != actual_line:
+            return 'line %d: expected %r, got %r' % (number, expected_line, actual_line)
+    return 'expected %d lines, got %d' % (len(expected_lines), len(actual_lines))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--update', action='store_true', help='record the expected outputs again')
+    args = parser.parse_args()
+
+    fixtures = {type: load_fixture(type) for type in datastore.RESOURCE_IDS}
+    kind = {type: len(result['records']) * CHECK_SCALE for type, result in fixtures.items()}
+
+    if args.update:
+        expected = expected_outputs(fixtures)
+        os.makedirs(FIXTURES_DIR, exist_ok=True)
+        with open(EXPECTED_PATH, 'wb') as f:
+            f.write(gzip.compress(json.dumps({'fixtures': kind, 'outputs': expected}, indent=1).encode('utf-8'), mtime=0))
+        print('Recorded %d outputs in %s' % (len(expected), EXPECTED_PATH))
+        raise SystemExit
+
+    with open(EXPECTED_PATH, 'rb') as f:
+        expected = json.loads(gzip.decompress(f.read()))
+    if expected['fixtures'] != kind:
+        raise SystemExit('The expected outputs were recorded for %s records, these are %s: run with --update'
+                         % (expected['fixtures'], kind))
+    outputs = run_pipeline(fixtures)
+
+    failures = []
+    for name in sorted(set(expected['outputs']) | set(outputs)):
+        if name not in outputs or name not in expected['outputs']:
+            failures.append('%s: %s' % (name, 'missing' if name not in outputs else 'not expected'))
+        elif outputs[name] != expected['outputs'][name]:
+            failures.append('%s: %s' % (name, first_difference(expected['outputs'][name], outputs[name])))
+
+    for failure in failures:
+        print('FAIL ' + failure)
+    print('%d outputs checked (%d new since the baseline), %d failures' % (len(outputs), len(NEW_OUTPUTS), len(failures)))
+    print('Intended differences from the baseline:')
+    for name, description in baseline.INTENDED_DIFFERENCES.items():
+        print('  %s: %s' % (name, description))
+    raise SystemExit(1 if failures else 0)
@@ -0,0 +1,214 @@
+''' Drive concurrent sessions against a local dashboard and measure rerun latency and memory.
+
+Starts the stub Datastore and a `streamlit run app.py` process reading from it, then
+opens the given number of sessions over the Streamlit websocket, the way browsers do.
+Each session keeps switching page and date range in the sidebar and times every
+rerun until the server reports the script finished; the resident memory of the
+server is sampled throughout:
+
+    python -m benchmarks.load_test --sessions 20 --reruns 30 --output load.json
+
+Needs streamlit (and its tornado and protobuf dependencies) installed.
+'''
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks.stub_datastore import start_server
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+# Sidebar selectboxes the sessions change, as {label: option indexes to pick from}
+# (the custom range is left out: it needs the date picker)
+SELECTIONS = {
+    'Data to display:': range(3),
+    'Date range to visualize:': range(6),
+}
+
+# Seconds to wait for the server to start and for a single rerun
+STARTUP_TIMEOUT = 60
+RERUN_TIMEOUT = 120
+
+# Seconds between two samples of the server memory
+MEMORY_INTERVAL = 0.2
+
+
+def start_app(port, api_url, cache_dir):
+    env = dict(os.environ, ONTARIO_DATASTORE_URL=api_url, ONTARIO_CACHE_DIR=cache_dir)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', APP_PATH, '--server.headless', 'true',
+         '--server.port', str(port), '--browser.gatherUsageStats', 'false'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('streamlit exited with status %d' % process.returncode)
+        try:
+            with urllib.request.urlopen('http://127.0.0.1:%d/healthz' % port, timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('streamlit did not start within %d seconds' % STARTUP_TIMEOUT)
+
+
+def rss_bytes(pid):
+    ''' Resident memory of a process, from /proc (Linux only).'''
+    with open('/proc/%d/status' % pid) as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+async def sample_memory(pid, samples, stop):
+    while not stop.is_set():
+        samples.append(rss_bytes(pid))
+        try:
+            await asyncio.wait_for(stop.wait(), MEMORY_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+class Session:
+    ''' One simulated viewer, connected to the Streamlit websocket.'''
+
+    def __init__(self, port):
+        self.url = 'ws://127.0.0.1:%d/stream' % port
+        self.widgets = {}
+        self.connection = None
+
+    async def connect(self):
+        from tornado.websocket import websocket_connect
+
+        self.connection = await websocket_connect(self.url)
+
+    async def rerun(self, values):
+        ''' Rerun the script with the given {label: option index} and return its duration in seconds.'''
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        message = BackMsg()
+        message.rerun_script.query_string = ''
+        for label, index in values.items():
+            if label in self.widgets:
+                widget = message.rerun_script.widget_states.widgets.add()
+                widget.id = self.widgets[label]
+                widget.int_value = index
+
+        start = time.perf_counter()
+        await self.connection.write_message(message.SerializeToString(), binary=True)
+        while True:
+            data = await asyncio.wait_for(self.connection.read_message(), RERUN_TIMEOUT)
+            if data is None:
+                raise RuntimeError('the server closed the session')
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof('type')
+            if kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                self.collect_widget(forward.delta.new_element)
+            elif kind == 'report_finished':
+                return time.perf_counter() - start
+
+    def collect_widget(self, element):
+        if element.WhichOneof('type') == 'selectbox':
+            self.widgets[element.selectbox.label] = element.selectbox.id
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+
+async def run_session(port, reruns, latencies, seed):
+    choose = random.Random(seed)
+    session = Session(port)
+    await session.connect()
+    try:
+        # The first run only finds the widgets; it is not counted
+        await session.rerun({})
+        for _ in range(reruns):
+            values = {label: choose.choice(options) for label, options in SELECTIONS.items()}
+            latencies.append(await session.rerun(values))
+    finally:
+        session.close()
+
+
+async def load_test(port, pid, sessions, reruns, ramp):
+    latencies = []
+    samples = [rss_bytes(pid)]
+    stop = asyncio.Event()
+    sampler = asyncio.ensure_future(sample_memory(pid, samples, stop))
+
+    # Warm up: one session first, so the dataset build is not part of the measured reruns
+    await run_session(port, 1, [], seed=-1)
+    warm = rss_bytes(pid)
+
+    start = time.perf_counter()
+    tasks = []
+    for i in range(sessions):
+        tasks.append(asyncio.ensure_future(run_session(port, reruns, latencies, seed=i)))
+        await asyncio.sleep(ramp)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await sampler
+    end = rss_bytes(pid)
+    latencies.sort()
+
+    return {
+        'sessions': sessions,
+        'reruns': len(latencies),
+        'seconds': round(elapsed, 2),
+        'reruns_per_second': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+        'max_ms': round(latencies[-1] * 1000, 1),
+        'rss_warm_mb': round(warm / 1e6, 1),
+        'rss_end_mb': round(end / 1e6, 1),
+        'rss_peak_mb': round(max(samples) / 1e6, 1),
+        'rss_growth_mb': round((end - warm) / 1e6, 1)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--reruns', type=int, default=20, help='reruns per session')
+    parser.add_argument('--rows', type=int, default=1000, help='records served per stub resource')
+    parser.add_argument('--case-rows', type=int, default=0, help='case records served, to include the regional table')
+    parser.add_argument('--port', type=int, default=8599)
+    parser.add_argument('--ramp', type=float, default=0.1, help='seconds between two sessions starting')
+    parser.add_argument('--output', help='also write the results to this JSON file')
+    args = parser.parse_args()
+
+    server = start_server(args.rows, case_rows=args.case_rows)
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        if args.case_rows:
+            # Build the regional table up front, so the Cases page offers PHUs
+            subprocess.run([sys.executable, '-m', 'src.interactive.modules.regional'], check=True,
+                           env=dict(os.environ, ONTARIO_DATASTORE_URL=server.api_url, ONTARIO_CACHE_DIR=cache_dir))
+        app = start_app(args.port, server.api_url, cache_dir)
+        try:
+            for sessions in args.sessions:
+                result = asyncio.get_event_loop().run_until_complete(
+                    load_test(args.port, app.pid, sessions, args.reruns, args.ramp))
+                results.append(result)
+                print(json.dumps(result))
+        finally:
+            app.terminate()
+            app.wait()
+            server.shutdown()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'rows': args.rows, 'case_rows': args.case_rows, 'results': results}, f, indent=2)
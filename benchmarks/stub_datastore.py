@@ -0,0 +1,260 @@
+''' Local stand-in for the Ontario Government Datastore API.
+
+Serves synthetic records shaped like the COVID-19 status and vaccine resources
+through the same datastore_search offset/limit, datastore_search_sql (for the
+content digests only) and resource_show interfaces (with ETags and gzip), so the
+loader can be measured without network access:
+
+    python -m benchmarks.stub_datastore --rows 100000 --port 8765
+    ONTARIO_DATASTORE_URL=http://127.0.0.1:8765/api/3/action streamlit run app.py
+'''
+import argparse
+import datetime
+import gzip
+import hashlib
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from src.interactive.modules.datastore import RESOURCE_IDS
+from src.interactive.modules.regional import CASES_RESOURCE_ID
+
+# Field names and CKAN types of the stubbed resources, in upstream order
+COVID_FIELDS = [
+    ('_id', 'int'), ('Reported Date', 'timestamp'),
+    ('Confirmed Negative', 'numeric'), ('Presumptive Negative', 'numeric'),
+    ('Presumptive Positive', 'numeric'), ('Confirmed Positive', 'numeric'),
+    ('Resolved', 'numeric'), ('Deaths', 'numeric'), ('Total Cases', 'numeric'),
+    ('Total patients approved for testing as of Reporting Date', 'numeric'),
+    ('Total tests completed in the last day', 'numeric'),
+    ('Percent positive tests in last day', 'numeric'),
+    ('Under Investigation', 'numeric'),
+    ('Number of patients hospitalized with COVID-19', 'numeric'),
+    ('Number of patients in ICU due to COVID-19', 'numeric'),
+    ('Number of patients in ICU on a ventilator with COVID-19', 'numeric'),
+    ('Total Positive LTC Resident Cases', 'numeric'), ('Total Positive LTC HCW Cases', 'numeric'),
+    ('Total LTC Resident Deaths', 'numeric'), ('Total LTC HCW Deaths', 'numeric'),
+    ('Total_Lineage_B.1.1.7_Alpha', 'numeric'), ('Total_Lineage_B.1.351_Beta', 'numeric'),
+    ('Total_Lineage_P.1_Gamma', 'numeric'),
+]
+VACCINE_FIELDS = [
+    ('_id', 'int'), ('report_date', 'timestamp'),
+    ('previous_day_total_doses_administered', 'numeric'),
+    ('previous_day_at_least_one', 'numeric'), ('previous_day_fully_vaccinated', 'numeric'),
+    ('total_doses_administered', 'numeric'), ('total_individuals_at_least_one', 'numeric'),
+    ('total_individuals_partially_vaccinated', 'numeric'),
+    ('total_doses_in_fully_vaccinated_individuals', 'numeric'),
+    ('total_individuals_fully_vaccinated', 'numeric'),
+]
+CASE_FIELDS = [
+    ('_id', 'int'), ('Row_ID', 'numeric'), ('Accurate_Episode_Date', 'timestamp'),
+    ('Case_Reported_Date', 'timestamp'), ('Test_Reported_Date', 'timestamp'),
+    ('Specimen_Date', 'timestamp'), ('Age_Group', 'text'), ('Client_Gender', 'text'),
+    ('Case_AcquisitionInfo', 'text'), ('Outcome1', 'text'), ('Outbreak_Related', 'text'),
+    ('Reporting_PHU_ID', 'numeric'), ('Reporting_PHU', 'text'), ('Reporting_PHU_City', 'text'),
+]
+FIELDS = {
+    RESOURCE_IDS['COVID']: COVID_FIELDS,
+    RESOURCE_IDS['Vaccine']: VACCINE_FIELDS,
+    CASES_RESOURCE_ID: CASE_FIELDS,
+}
+
+# Public health units of the synthetic case records, as (ID, name, city)
+PHUS = [
+    (2251, 'Ottawa Public Health', 'Ottawa'),
+    (2253, 'Peel Public Health', 'Mississauga'),
+    (2260, 'Waterloo Region Health Unit', 'Waterloo'),
+    (3895, 'Toronto Public Health', 'Toronto'),
+    (2270, 'York Region Public Health Services', 'Newmarket'),
+]
+
+# Resource and bound of the digest query of datastore.digest_sql
+SQL_RESOURCE = re.compile(r'FROM "([^"]+)"')
+SQL_KNOWN_LAST_ID = re.compile(r'WHERE _id <= (\d+)')
+
+# Synthetic cases reported per day
+CASES_PER_DAY = 20
+
+START_DATE = datetime.datetime(2020, 1, 26)
+
+
+def make_record(fields, i):
+    ''' Build the i-th synthetic record: cumulative counts grow with i, daily counts vary.'''
+    if fields is CASE_FIELDS:
+        return make_case_record(i)
+    record = {}
+    for position, (name, kind) in enumerate(fields):
+        if name == '_id':
+            record[name] = i + 1
+        elif kind == 'timestamp':
+            record[name] = (START_DATE + datetime.timedelta(days=i)).strftime('%Y-%m-%dT%H:%M:%S')
+        elif name.startswith('Percent'):
+            record[name] = round((i % 97) / 10, 1)
+        elif name.startswith(('Total', 'total', 'Resolved', 'Deaths', 'Confirmed')):
+            record[name] = i * (position + 3) + (i * i) % 11
+        elif i % 50 == 7:
+            # Upstream leaves some daily values empty
+            record[name] = None
+        else:
+            record[name] = (i * (position + 1)) % 1000
+    return record
+
+
+def make_case_record(i):
+    ''' Build the i-th synthetic case: CASES_PER_DAY cases a day, spread over PHUS.'''
+    phu_id, phu, city = PHUS[(i * 7 + i // 13) % len(PHUS)]
+    date = (START_DATE + datetime.timedelta(days=i // CASES_PER_DAY)).strftime('%Y-%m-%dT%H:%M:%S')
+    return {
+        '_id': i + 1, 'Row_ID': i + 1, 'Accurate_Episode_Date': date, 'Case_Reported_Date': date,
+        'Test_Reported_Date': date, 'Specimen_Date': date, 'Age_Group': '%d0s' % (2 + i % 6),
+        'Client_Gender': ('FEMALE', 'MALE')[i % 2], 'Case_AcquisitionInfo': 'CC',
+        'Outcome1': ('Resolved', 'Resolved', 'Not Resolved', 'Resolved', 'Fatal')[i % 5],
+        'Outbreak_Related': 'Yes' if i % 9 == 0 else None,
+        'Reporting_PHU_ID': phu_id, 'Reporting_PHU': phu, 'Reporting_PHU_City': city}
+
+
+def make_records(fields, rows):
+    ''' Build a list of synthetic records for a resource.'''
+    return [make_record(fields, i) for i in range(rows)]
+
+
+def records_digest(records):
+    ''' Digest of some records, standing in for the Postgres md5 of their rows.'''
+    return hashlib.md5('|'.join(json.dumps(record, sort_keys=True) for record in records).encode('utf-8')).hexdigest()
+
+
+def digest_result(records, sql):
+    ''' Answer the digest query of datastore.digest_sql, the only SQL the stub understands.'''
+    match = SQL_KNOWN_LAST_ID.search(sql)
+    if not sql.startswith('SELECT count(*) AS rows') or match is None:
+        return None
+    known_last_id = int(match.group(1))
+    known = [record for record in records if record['_id'] <= known_last_id]
+
+    return {
+        'fields': [{'id': 'rows', 'type': 'int8'}, {'id': 'last_id', 'type': 'int4'},
+                   {'id': 'digest', 'type': 'text'}, {'id': 'known_digest', 'type': 'text'}],
+        'records': [{
+            'rows': len(records),
+            'last_id': max((record['_id'] for record in records), default=None),
+            'digest': records_digest(records) if records else None,
+            'known_digest': records_digest(known) if known else None}]}
+
+
+def make_handler(resources, sql_enabled):
+    ''' Create a request handler class serving the given {resource_id: records} mapping.
+
+    SQL queries are refused while sql_enabled[0] is False, as on Datastores that do not allow them.
+    '''
+
+    class DatastoreHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            resource_id = query.get('resource_id', query.get('id'))
+            if resource_id is None and 'sql' in query:
+                match = SQL_RESOURCE.search(query['sql'])
+                resource_id = match and match.group(1)
+            if resource_id not in resources:
+                self.send_error(404)
+                return
+
+            records = resources[resource_id]
+            if url.path.endswith('/resource_show'):
+                # The resource changes whenever records are added, revised or removed
+                result = {'id': resource_id, 'last_modified': '%s-%d-%s' % (
+                    START_DATE.isoformat(), len(records), records_digest(records)[:12])}
+            elif url.path.endswith('/datastore_search_sql'):
+                if not sql_enabled[0]:
+                    self.send_error(403)
+                    return
+                result = digest_result(records, query.get('sql', ''))
+                if result is None:
+                    self.send_error(409)
+                    return
+            elif url.path.endswith('/datastore_search'):
+                offset = int(query.get('offset', 0))
+                limit = int(query.get('limit', 100))
+                fields = FIELDS[resource_id]
+                page = records[offset:offset + limit]
+                if query.get('fields'):
+                    # Only the requested columns, in resource order
+                    requested = query['fields'].split(',')
+                    fields = [(name, kind) for name, kind in fields if name in requested]
+                    page = [{name: record[name] for name, _ in fields} for record in page]
+                result = {
+                    'resource_id': resource_id,
+                    'fields': [{'id': name, 'type': kind} for name, kind in fields],
+                    'records': page,
+                    'total': len(records)}
+            else:
+                self.send_error(404)
+                return
+            body = json.dumps({'success': True, 'result': result}).encode('utf-8')
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('ETag', etag)
+            if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                body = gzip.compress(body, compresslevel=5)
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return DatastoreHandler
+
+
+def start_server(rows, port=0, case_rows=0):
+    ''' Start a stub server in a background thread.
+
+    Parameters:
+    rows: number of records served for the COVID and vaccine resources
+    port: port to listen on, 0 picks a free port
+    case_rows: number of records served for the case-level resource (CASES_PER_DAY a day)
+
+    Returns the server; its API base URL is server.api_url and the served
+    {resource_id: records} mapping is server.resources (edit it to simulate upstream changes).
+    Set server.sql_enabled[0] to False to refuse datastore_search_sql requests.
+    '''
+    resources = {resource_id: make_records(fields, rows) for resource_id, fields in FIELDS.items()
+                 if resource_id != CASES_RESOURCE_ID}
+    resources[CASES_RESOURCE_ID] = make_records(CASE_FIELDS, case_rows)
+    sql_enabled = [True]
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(resources, sql_enabled))
+    server.daemon_threads = True
+    server.resources = resources
+    server.sql_enabled = sql_enabled
+    server.api_url = 'http://127.0.0.1:%d/api/3/action' % server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--case-rows', type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_server(args.rows, args.port, args.case_rows)
+    print('Serving stub Datastore API at ' + server.api_url)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -3,14 +3,44 @@ ASGI config for covid19_dashboard project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Before Django 4.2, the ASGI handler iterates streaming responses on the event loop,
+where an export waiting for its next chunk would hold up every other request. On
+those versions, exports are served by the WSGI handler in a thread of their own.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/3.1/howto/deployment/asgi/
 """
 
 import os
 
+import django
 from django.core.asgi import get_asgi_application
+from django.urls import reverse
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'covid19_dashboard.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+if django.VERSION >= (4, 2):
+    application = django_application
+else:
+    from asgiref.sync import sync_to_async
+    from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+    from django.core.wsgi import get_wsgi_application
+
+    EXPORT_PATH = reverse('export')
+
+    class ExportInstance(WsgiToAsgiInstance):
+        # Outside the thread Django runs its sync views in, so a slow download only holds up itself
+        run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__['run_wsgi_app'].func, thread_sensitive=False)
+
+    class ExportApplication(WsgiToAsgi):
+        async def __call__(self, scope, receive, send):
+            await ExportInstance(self.wsgi_application)(scope, receive, send)
+
+    export_application = ExportApplication(get_wsgi_application())
+
+    async def application(scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == EXPORT_PATH:
+            return await export_application(scope, receive, send)
+        return await django_application(scope, receive, send)
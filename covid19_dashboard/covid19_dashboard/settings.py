@@ -10,11 +10,18 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.1/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# The dashboard data pipeline lives in the repository root (src/interactive/modules)
+REPO_DIR = BASE_DIR.parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.insert(0, str(REPO_DIR))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/3.1/howto/deployment/checklist/
@@ -81,6 +88,10 @@ DATABASES = {
     }
 }
 
+# Answer /api/series from the time-series table filled by `manage.py ingest`
+# instead of the in-memory dataset
+DASHBOARD_SERIES_FROM_DB = os.environ.get('DASHBOARD_SERIES_FROM_DB', '') not in ('', '0')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
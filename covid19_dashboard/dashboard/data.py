@@ -0,0 +1,8 @@
+"""
+Process-wide access to the dataset built by the dashboard pipeline.
+
+Every request thread shares one read-only copy of the current dataset, see
+src.interactive.modules.pipeline; its tables are only read when a view first
+needs them.
+"""
+from src.interactive.modules.pipeline import current_dataset
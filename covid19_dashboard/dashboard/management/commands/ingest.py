@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from src.interactive.modules import build, timeseries_db
+
+from dashboard.models import IngestedDataset, Observation
+
+# Insert new observations and update the ones whose value changed, in one statement
+UPSERT_SQL = (
+    'INSERT INTO {table} (source, metric, date, value) VALUES (%s, %s, %s, %s) '
+    'ON CONFLICT (metric, date) DO UPDATE SET value = excluded.value, source = excluded.source '
+    'WHERE value IS NOT excluded.value'
+)
+
+# Number of rows sent to the database per executemany call
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = 'Load the dashboard COVID-19 and vaccine series into the time-series table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refresh', action='store_true',
+                            help='Sync with the Ontario Datastore API even if the local copy is fresh.')
+
+    def handle(self, *args, **options):
+        if options['refresh']:
+            build.build_dataset(refresh=True)
+        dataset = build.load_dataset()
+
+        sql = UPSERT_SQL.format(table=Observation._meta.db_table)
+        rows = timeseries_db.observation_rows(dataset)
+        with transaction.atomic(), connection.cursor() as cursor:
+            for start in range(0, len(rows), BATCH_SIZE):
+                cursor.executemany(sql, rows[start:start + BATCH_SIZE])
+            # Committed with the rows, so the version always describes the table
+            IngestedDataset.objects.update_or_create(pk=1, defaults={
+                'version': dataset['version'], 'metrics': timeseries_db.metric_names(dataset)})
+
+        self.stdout.write(self.style.SUCCESS(
+            'Upserted %d observations from dataset version %s' % (len(rows), dataset['version'])))
@@ -0,0 +1,32 @@
+# Generated by Django 3.1.5 on 2026-10-16 23:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Observation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=16)),
+                ('metric', models.CharField(max_length=64)),
+                ('date', models.DateField()),
+                ('value', models.FloatField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='observation',
+            index=models.Index(fields=['metric', 'date', 'value'], name='observation_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='observation',
+            constraint=models.UniqueConstraint(fields=('metric', 'date'), name='observation_metric_date'),
+        ),
+    ]
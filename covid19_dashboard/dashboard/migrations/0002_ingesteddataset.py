@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-17 00:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestedDataset',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(max_length=64)),
+                ('metrics', models.JSONField()),
+                ('ingested_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
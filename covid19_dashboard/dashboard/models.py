@@ -0,0 +1,44 @@
+from django.db import models
+
+
+class Observation(models.Model):
+    """One value of one dashboard metric on one day.
+
+    Metrics come from the summary table (e.g. New_Total_Cases) and the vaccine
+    table (e.g. total_doses_administered); source tells them apart.
+    """
+    source = models.CharField(max_length=16)
+    metric = models.CharField(max_length=64)
+    date = models.DateField()
+    value = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'date'], name='observation_metric_date'),
+        ]
+        indexes = [
+            # Covers the range queries of the dashboard: they never need to visit the table
+            models.Index(fields=['metric', 'date', 'value'], name='observation_range'),
+        ]
+
+    def __str__(self):
+        return '%s %s: %s' % (self.metric, self.date, self.value)
+
+
+class IngestedDataset(models.Model):
+    """The dataset `manage.py ingest` last loaded into the Observation table, as a single row.
+
+    Responses read from the Observation table take their version and ETag from it,
+    so they change exactly when the table does.
+    """
+    version = models.CharField(max_length=64)
+    metrics = models.JSONField()
+    ingested_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def current(cls):
+        """The row of the last ingest, None before the first one."""
+        return cls.objects.filter(pk=1).first()
+
+    def __str__(self):
+        return 'Dataset version %s, ingested at %s' % (self.version, self.ingested_at)
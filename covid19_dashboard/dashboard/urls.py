@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('summary', views.summary, name='summary'),
+    path('series', views.series, name='series'),
+    path('variants', views.variants, name='variants'),
+    path('export', views.export, name='export'),
+    path('metrics', views.metrics, name='metrics'),
+]
@@ -0,0 +1,206 @@
+"""
+Read-only JSON API over the dashboard dataset.
+
+Successful responses carry an ETag derived from the dataset version and the query,
+so pollers get a 304 until the data is rebuilt, and may be cached for MAX_AGE seconds;
+error responses are never cached. All are gzipped for clients that accept it.
+
+Exports are streamed. Under ASGI, Django 4.2 and later consume them as an async
+iterator; older versions iterate responses on the event loop, so covid19_dashboard.asgi
+serves exports through the WSGI handler in a thread instead.
+
+With DASHBOARD_SERIES_FROM_DB, /api/series is read from the time-series table and
+its version is the one `manage.py ingest` last loaded there (IngestedDataset).
+"""
+import functools
+
+import django
+import pandas as pd
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition, require_GET
+
+from src.interactive.modules import metrics as pipeline_metrics, pipeline, query, resample
+
+from .data import current_dataset
+from .models import IngestedDataset, Observation
+
+# Seconds clients and proxies may reuse a response before revalidating it
+MAX_AGE = 300
+
+# Whether StreamingHttpResponse takes async iterators, and ASGI consumes them without blocking the event loop
+ASYNC_STREAMING = django.VERSION >= (4, 2)
+
+
+def dataset_etag(request, *args, **kwargs):
+    return current_dataset()['version'] + '?' + request.GET.urlencode()
+
+
+def ingested_dataset(request):
+    """The IngestedDataset row, read once per request (None before the first ingest)."""
+    if not hasattr(request, 'ingested_dataset'):
+        request.ingested_dataset = IngestedDataset.current()
+    return request.ingested_dataset
+
+
+def series_etag(request, *args, **kwargs):
+    if not settings.DASHBOARD_SERIES_FROM_DB:
+        return dataset_etag(request)
+    ingested = ingested_dataset(request)
+
+    return ingested and ingested.version + '?' + request.GET.urlencode()
+
+
+def cache_success(view):
+    """Let clients and proxies cache the successful responses of a view (including 304s), and no others."""
+    @functools.wraps(view)
+    def wrapped(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            patch_cache_control(response, public=True, max_age=MAX_AGE)
+        elif response.has_header('ETag'):
+            # Set by condition whatever the status
+            del response['ETag']
+        return response
+
+    return wrapped
+
+
+def api_view(etag_func=dataset_etag):
+    """Wrap a view with the caching, compression and method rules shared by the API.
+
+    etag_func computes the ETag of a request, by default from the version of the current dataset.
+    """
+    def decorator(view):
+        return require_GET(gzip_page(cache_success(condition(etag_func=etag_func)(view))))
+
+    return decorator
+
+
+def bad_request(message):
+    return JsonResponse({'error': message}, status=400)
+
+
+def parse_dates(request):
+    """Read the optional start and end query parameters as timestamps."""
+    return tuple(pd.Timestamp(request.GET[name]) if request.GET.get(name) else None for name in ('start', 'end'))
+
+
+@api_view()
+def summary(request):
+    """Latest values of every metric: /api/summary"""
+    dataset = current_dataset()
+
+    return JsonResponse(dict(dataset['snapshot'], version=dataset['version']))
+
+
+def stored_series(metric, start, end):
+    """Read one metric from the time-series table as a (Date, metric) frame."""
+    observations = Observation.objects.filter(metric=metric)
+    if start is not None:
+        observations = observations.filter(date__gte=start)
+    if end is not None:
+        observations = observations.filter(date__lte=end)
+
+    df = pd.DataFrame(list(observations.order_by('date').values_list('date', 'value')), columns=['Date', metric])
+    df['Date'] = pd.to_datetime(df['Date'])
+
+    return df
+
+
+@api_view(etag_func=series_etag)
+def series(request):
+    """One metric over a date range: /api/series?metric=&start=&end=&resolution="""
+    metric = request.GET.get('metric', '')
+    resolution = request.GET.get('resolution', resample.AUTO).capitalize()
+    if resolution != resample.AUTO and resolution not in resample.RESOLUTIONS:
+        return bad_request('Unknown resolution: ' + resolution)
+    try:
+        start, end = parse_dates(request)
+    except ValueError:
+        return bad_request('Dates must be given as YYYY-MM-DD')
+
+    if settings.DASHBOARD_SERIES_FROM_DB:
+        ingested = ingested_dataset(request)
+        if ingested is None:
+            return JsonResponse({'error': 'No data has been ingested yet'}, status=503)
+        if metric not in ingested.metrics:
+            return bad_request('Unknown metric: ' + metric)
+        df, x, version = stored_series(metric, start, end), 'Date', ingested.version
+    else:
+        dataset = current_dataset()
+        version = dataset['version']
+        # The metrics that can be exported, from the column names alone (no '_id')
+        tables = pipeline.export.available_metrics(dataset)
+        if metric not in tables:
+            return bad_request('Unknown metric: ' + metric)
+        df = query.select_dates(dataset[tables[metric]], start, end)
+        x = dict(pipeline.export.EXPORT_TABLES)[tables[metric]]
+
+    resolution = resample.choose_resolution(len(df), resolution)
+    aggregated = resample.aggregate(df, x, metric, resolution)
+
+    return JsonResponse({
+        'metric': metric,
+        'resolution': resolution,
+        'version': version,
+        'dates': aggregated[x].dt.strftime('%Y-%m-%d').tolist(),
+        'values': aggregated[metric].tolist()})
+
+
+@api_view()
+def variants(request):
+    """New cases split by variant over a date range: /api/variants?start=&end="""
+    dataset = current_dataset()
+    try:
+        start, end = parse_dates(request)
+    except ValueError:
+        return bad_request('Dates must be given as YYYY-MM-DD')
+
+    df = query.select_dates(dataset['variants'], start, end)
+
+    return JsonResponse({
+        'version': dataset['version'],
+        'dates': df['Date'].dt.strftime('%Y-%m-%d').tolist(),
+        'variants': df['variable'].tolist(),
+        'values': df['value'].tolist()})
+
+
+@require_GET
+def export(request):
+    """Metrics over a date range as a streamed file: /api/export?metrics=a,b&start=&end=&format=csv|parquet|arrow"""
+    dataset = current_dataset()
+    metric_names = [name for name in request.GET.get('metrics', '').split(',') if name]
+    format = request.GET.get('format', 'csv')
+    if not metric_names:
+        return bad_request('No metrics given')
+    if format not in pipeline.export.FORMATS:
+        return bad_request('Unknown format: ' + format)
+    if not pipeline.export.format_available(format):
+        return JsonResponse({'error': format + ' exports need pyarrow, which is not installed'}, status=501)
+    try:
+        start, end = parse_dates(request)
+        df = pipeline.export.export_frame(dataset, metric_names, start, end)
+    except ValueError as error:
+        # Bad dates, or unknown metrics (UnknownMetricError)
+        return bad_request(str(error) if isinstance(error, pipeline.export.UnknownMetricError)
+                           else 'Dates must be given as YYYY-MM-DD')
+
+    if ASYNC_STREAMING and isinstance(request, ASGIRequest):
+        chunks = pipeline.export.astream_export(df, format)
+    else:
+        chunks = pipeline.export.stream_export(df, format)
+    response = StreamingHttpResponse(chunks, content_type=pipeline.export.FORMATS[format][0])
+    response['Content-Disposition'] = 'attachment; filename="' + pipeline.export.file_name(metric_names, format) + '"'
+    response['X-Dataset-Version'] = dataset['version']
+
+    return response
+
+
+@require_GET
+def metrics(request):
+    """Stage timings and cache counters of this process in the Prometheus text format: /api/metrics"""
+    return HttpResponse(pipeline_metrics.prometheus_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
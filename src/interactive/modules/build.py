@@ -0,0 +1,359 @@
+import numpy as np
+import pandas as pd
+
+from src.interactive.modules import colstore, datastore, ingest, metrics, products, regional, sync
+
+# Columns for COVID summary
+SUMMARY_COLUMNS = ['Total_Cases', 'Deaths', 'Number_hospitalized','Number_ICU',
+                   'Resolved', 'Total_tests_completed', 'Active_Cases', 'Total_Lineage_B.1.1.7_Alpha',
+                   'Total_Lineage_B.1.351_Beta', 'Total_Lineage_P.1_Gamma']
+
+# Names of the artifacts written by build_dataset, all with the version of the build. The
+# summary is published last: once it is current, the others of its build are all on disk.
+SUMMARY_ARTIFACT = 'summary'
+VARIANTS_ARTIFACT = 'variants'
+VACCINATIONS_ARTIFACT = 'vaccinations'
+# The vaccine source data the build was computed from
+VACCINE_ARTIFACT = 'vaccine'
+DERIVED_ARTIFACTS = [VARIANTS_ARTIFACT, VACCINATIONS_ARTIFACT, VACCINE_ARTIFACT]
+
+# Bump when the layout of the derived tables changes, so older builds are not served
+BUILD_FORMAT = 5
+
+# Population of Ontario (Statistics Canada estimate for Q1 2021), for vaccination coverage
+ONTARIO_POPULATION = 14789778
+
+# Coverage targets (percent of the population) projected on the Vaccinations page
+MILESTONE_TARGETS = [50, 75, 90]
+
+# Targets further away than this at the current pace are not projected
+PROJECTION_HORIZON_DAYS = 3650
+
+
+def load_data(type, refresh=False):
+    ''' Load the most recent COVID-19 data from the Ontario Government through their Datastore API
+
+    Parameters:
+    type: 'COVID' or 'Vaccine'
+    refresh: sync with the Datastore API even if the on-disk copy is still fresh
+    '''
+    resource_id = datastore.RESOURCE_IDS[type]
+    # Use the synced local copy shared by every worker as is if it is newer than the last publish time
+    cached = None if refresh else colstore.read_fresh_frame(sync.local_copy_name(resource_id))
+    metrics.cache_lookup('source', cached is not None)
+    if cached is None:
+        # Fetch the records published since the last refresh and append them to the local copy
+        with metrics.timer('sync_' + type):
+            df = sync.sync_resource(resource_id)
+    else:
+        df = cached[0]
+
+    # Fill NA's with 0
+    return df.fillna(0)
+
+def format_data(source_data):
+    ''' Format the COVID-19 data to:
+    1) shorten long column names,
+    2) replace spaces with underscores,
+    3) remove columns not in use
+
+    Parameters:
+    source_data: the source data called by load_data()
+    '''
+    # Load data
+    df = source_data
+
+    # Rename lengthier column names
+    df_formatted = df.rename(columns = {
+        "Percent positive tests in last day": "Percent_positive_tests",
+        "Number of patients hospitalized with COVID-19": "Number_hospitalized",
+        "Number of patients in ICU on a ventilator with COVID-19": "Number_ventilator",
+        "Number of patients in ICU due to COVID-19": "Number_ICU",
+        "Reported Date": "Date",
+        'Total patients approved for testing as of Reporting Date': 'Patients_approved_for_testing',
+        'Total tests completed in the last day': 'Total_tests_completed'})
+
+    # Replace spaces with underscores
+    df_formatted.columns = df_formatted.columns.str.replace(' ', '_')
+
+    # Remove columns with LTC (long-term care)
+    df_formatted = df_formatted[df_formatted.columns.drop(list(df_formatted.filter(regex='LTC')))]
+    # Remove defunct columns (haven't been updated in a long time)
+    df_formatted = df_formatted.drop(columns=['Confirmed_Negative', 'Presumptive_Negative', 'Presumptive_Positive'])
+    # Remove unused columns in application
+    df_formatted = df_formatted.drop(columns=['Under_Investigation', 'Patients_approved_for_testing', '_id'])
+
+    # Create Active Cases column
+    df_formatted['Active_Cases'] = df_formatted['Total_Cases'] - df_formatted['Resolved'] - df_formatted['Deaths']
+
+    return df_formatted
+
+def create_diff_columns(covid_formatted_data, list_of_columns):
+    '''Create columns using .diff to calculate the difference between numbers today and yesterday.
+
+    Paramaters:
+    covid_formatted_data: DataFrame that is the result of the function format_data
+    list_of_columns: List of columns that you'd like to know the difference
+
+    Returns a new DataFrame, the input is left untouched.
+    '''
+
+    df = covid_formatted_data
+    new_columns = {'New_'+str(column_name): df[str(column_name)].diff() for column_name in list_of_columns}
+
+    return df.assign(**new_columns)
+
+def change_dtypes(summary_data):
+    ''' Cast the New_* difference columns back to int32 (diff turns them into floats),
+    with 0 for the first day. Every other column already has its schema dtype.'''
+
+    df = summary_data
+    new_columns = [column for column in df.columns if column.startswith('New_')]
+
+    return df.assign(**{column: df[column].fillna(0).astype('int32') for column in new_columns})
+
+def create_variant_data(summary_data):
+    ''' Split new cases into each variant and the base strain, in long format sorted by date.
+
+    Parameters:
+    summary_data: DataFrame that is the result of change_dtypes
+    '''
+    # Data specifically for cases with new variants
+    variant_subset = summary_data[['Date', 'New_Total_Cases', 'New_Total_Lineage_B.1.1.7_Alpha',
+                                   'New_Total_Lineage_B.1.351_Beta', 'New_Total_Lineage_P.1_Gamma']].copy()
+    # Calculate the number of base strain cases
+    variant_subset['New_Base_Strain'] = variant_subset['New_Total_Cases'] - variant_subset['New_Total_Lineage_B.1.1.7_Alpha'] - variant_subset['New_Total_Lineage_B.1.351_Beta'] - variant_subset['New_Total_Lineage_P.1_Gamma']
+    variant_subset = variant_subset.drop(columns = ['New_Total_Cases'])
+    # Rename columns
+    variant_subset = variant_subset.rename(columns={
+        'New_Base_Strain':'Base COVID-19 Strain',
+        'New_Total_Lineage_B.1.1.7_Alpha':'B.1.1.7_Alpha Variant (UK)',
+        'New_Total_Lineage_B.1.351':'B.1.351 Variant (South Africa)',
+        'New_Total_Lineage_P.1':'P.1 Variant (Brazil)'})
+    # Pivot to long format
+    variant_subset_long = variant_subset.melt(id_vars = ['Date'])
+    # Sort by date (stable, so each day keeps the variable order)
+    variant_subset_long = variant_subset_long.sort_values(by=['Date'], kind='mergesort')
+
+    return index_by_date(variant_subset_long)
+
+def index_by_date(df):
+    ''' Index a frame by its Date column (kept as a column too), sorted for range queries.'''
+    df = df.set_index(pd.DatetimeIndex(df['Date']).rename(None))
+
+    return df if df.index.is_monotonic_increasing else df.sort_index(kind='mergesort')
+
+def metric_values(rows):
+    ''' Convert rows of a frame into one {column: value} record per row, with native Python values.
+
+    Each dtype block is converted in one go: integer columns as ints, float columns
+    rounded to 2 decimals. Date columns are left out.
+    '''
+    records = [{} for _ in range(len(rows))]
+    integers = rows.select_dtypes('integer')
+    floats = rows.select_dtypes('floating')
+    for block, values in ((integers, integers.to_numpy('int64')), (floats, floats.to_numpy('float64').round(2))):
+        for record, row in zip(records, values.tolist()):
+            record.update(zip(block.columns, row))
+
+    return records
+
+def create_snapshot(summary_data, vaccine_data):
+    ''' Summarize the latest day of data: every metric for today and yesterday, and the
+    latest vaccine figures, keyed by column name.
+
+    Parameters:
+    summary_data: DataFrame that is the result of change_dtypes
+    vaccine_data: vaccine DataFrame from load_data('Vaccine')
+    '''
+    yesterday, today = metric_values(summary_data.iloc[-2:])
+    vaccine, = metric_values(vaccine_data.iloc[-1:])
+
+    return {
+        'date': summary_data['Date'].iloc[-1].strftime('%Y-%m-%d'),
+        'today': today,
+        'yesterday': yesterday,
+        'vaccine_date': vaccine_data['report_date'].iloc[-1].strftime('%Y-%m-%d'),
+        'vaccine': vaccine}
+
+def create_vaccination_data(vaccine_data):
+    ''' Derive the daily vaccination series: doses per day, their 7-day rolling averages,
+    the dose rate per 100,000 people and the population coverage, indexed by date.
+
+    Parameters:
+    vaccine_data: vaccine DataFrame from load_data('Vaccine')
+    '''
+    df = vaccine_data.set_index(pd.DatetimeIndex(vaccine_data['report_date']).rename(None)).sort_index(kind='mergesort')
+    daily = pd.DataFrame({
+        'New_doses': df['previous_day_total_doses_administered'],
+        'New_first_doses': df['previous_day_at_least_one'],
+        'New_fully_vaccinated': df['previous_day_fully_vaccinated']})
+    # Time-based window, so a missing report does not stretch the average over 8 days
+    averages = daily.rolling('7D').mean().add_suffix('_7day_avg')
+    coverage = pd.DataFrame({
+        'Coverage_at_least_one': df['total_individuals_at_least_one'] / ONTARIO_POPULATION * 100,
+        'Coverage_fully_vaccinated': df['total_individuals_fully_vaccinated'] / ONTARIO_POPULATION * 100})
+
+    vaccinations = pd.concat([daily.astype('int32'), averages.astype('float32'), coverage.astype('float32')], axis=1)
+    vaccinations.insert(0, 'Date', vaccinations.index)
+    vaccinations['Doses_per_100k_7day_avg'] = (averages['New_doses_7day_avg'] / ONTARIO_POPULATION * 100000).astype('float32')
+
+    return vaccinations
+
+def project_milestones(vaccinations, targets=MILESTONE_TARGETS):
+    ''' Date each coverage target was reached, or is projected to be reached at the current
+    7-day average pace (None if nothing is moving, or too slowly to project).
+
+    Parameters:
+    vaccinations: DataFrame that is the result of create_vaccination_data
+    targets: coverage targets, in percent of the population
+    '''
+    milestones = []
+    if not len(vaccinations):
+        return milestones
+    latest_date = vaccinations.index[-1]
+    for measure, coverage_column, pace_column in (
+            ('At least one dose', 'Coverage_at_least_one', 'New_first_doses_7day_avg'),
+            ('Fully vaccinated', 'Coverage_fully_vaccinated', 'New_fully_vaccinated_7day_avg')):
+        # Running maximum, so the first day past a target can be found by binary search
+        coverage = np.maximum.accumulate(vaccinations[coverage_column].to_numpy('float64'))
+        pace = float(vaccinations[pace_column].iloc[-1]) / ONTARIO_POPULATION * 100
+        for target in targets:
+            reached = int(np.searchsorted(coverage, target, side='left'))
+            if reached < len(coverage):
+                date, projected = vaccinations.index[reached], False
+            elif pace > 0 and (target - coverage[-1]) / pace <= PROJECTION_HORIZON_DAYS:
+                date, projected = latest_date + pd.Timedelta(days=int(np.ceil((target - coverage[-1]) / pace))), True
+            else:
+                date, projected = None, True
+            milestones.append({
+                'measure': measure,
+                'target': target,
+                'date': None if date is None else date.strftime('%Y-%m-%d'),
+                'projected': projected})
+
+    return milestones
+
+def build_dataset(refresh=False):
+    ''' Compute the derived COVID-19 tables once per data refresh and write them to the on-disk cache.
+
+    Parameters:
+    refresh: sync the source data with the Datastore API even if the on-disk copy is still fresh
+
+    Returns the dataset version, which is shared by every artifact of one build.
+    '''
+    # Both resources are fetched at the same time
+    with metrics.timer('load_resources'):
+        resources = ingest.load_resources(load_data, ['COVID', 'Vaccine'], refresh=refresh)
+    covid_data, vaccine_data = resources['COVID'], resources['Vaccine']
+    with metrics.timer('format_data'):
+        summary_data = format_data(covid_data)
+    with metrics.timer('create_diff_columns'):
+        summary_data = create_diff_columns(summary_data, SUMMARY_COLUMNS)
+    with metrics.timer('change_dtypes'):
+        summary_data = index_by_date(change_dtypes(summary_data))
+    with metrics.timer('create_variant_data'):
+        variant_data = create_variant_data(summary_data)
+    with metrics.timer('create_snapshot'):
+        snapshot = create_snapshot(summary_data, vaccine_data)
+    with metrics.timer('create_vaccination_data'):
+        vaccination_data = create_vaccination_data(vaccine_data)
+        milestones = project_milestones(vaccination_data)
+
+    with metrics.timer('write_dataset'):
+        version = colstore.new_version()
+        colstore.write_frame(VARIANTS_ARTIFACT, variant_data, {'dataset_version': version}, version)
+        colstore.write_frame(VACCINATIONS_ARTIFACT, vaccination_data, {'dataset_version': version}, version)
+        colstore.write_frame(VACCINE_ARTIFACT, vaccine_data, {'dataset_version': version}, version)
+        # Published last, see SUMMARY_ARTIFACT
+        colstore.write_frame(SUMMARY_ARTIFACT, summary_data,
+                             {'format': BUILD_FORMAT, 'snapshot': snapshot, 'milestones': milestones}, version)
+
+    return version
+
+def current_version():
+    ''' Return the version of the current derived tables without reading them.'''
+    return colstore.current_version(SUMMARY_ARTIFACT)
+
+def consistent_build():
+    ''' Return the summary metadata of the newest build whose artifacts are all still cached, or None.'''
+    current = colstore.current_version(SUMMARY_ARTIFACT)
+    # Versions newer than the current one are still being written
+    for version in colstore.list_versions(SUMMARY_ARTIFACT):
+        if current is None or version > current:
+            continue
+        summary = colstore.read_meta(SUMMARY_ARTIFACT, version)
+        if summary is None or summary.get('format') != BUILD_FORMAT:
+            continue
+        if all(colstore.read_info(name, version) is not None for name in DERIVED_ARTIFACTS):
+            return summary
+
+    return None
+
+def load_dataset(allow_stale=False):
+    ''' Look up the derived tables, building them first if they predate the last publish time.
+
+    Parameters:
+    allow_stale: serve the newest complete build whatever its age, only building one if there
+    is none at all (used when a background refresher keeps them up to date, so requests
+    never wait on the Datastore API)
+
+    Returns a products.Dataset with the 'snapshot' from create_snapshot, the vaccination
+    'milestones' from project_milestones, and the dataset 'version' and the time it was
+    'written_at'. Its read-only 'summary', 'variants', 'vaccinations', 'vaccine',
+    'vaccine_by_date' and 'regional' DataFrames are only read when first used, and their
+    'columns' are known without reading them. Every table but the vaccine one is indexed by date.
+    '''
+    with metrics.timer('read_dataset'):
+        summary = consistent_build()
+    stale = summary is None or not (allow_stale or colstore.is_fresh(summary))
+    metrics.cache_lookup('dataset', not stale)
+    if stale:
+        with metrics.timer('build_dataset'):
+            version = build_dataset()
+        summary = colstore.read_meta(SUMMARY_ARTIFACT, version)
+    version = summary['version']
+
+    return products.Dataset(
+        {
+            # Every table is pinned to the build, so a concurrent rebuild cannot mix two builds
+            'summary': lambda dataset: read_artifact(SUMMARY_ARTIFACT, version),
+            'variants': lambda dataset: read_artifact(VARIANTS_ARTIFACT, version),
+            'vaccinations': lambda dataset: read_artifact(VACCINATIONS_ARTIFACT, version),
+            'vaccine': lambda dataset: read_artifact(VACCINE_ARTIFACT, version),
+            # Column names of every table, from the cached layouts, without reading the tables
+            'columns': lambda dataset: artifact_columns(version),
+            # Vaccine series are queried by date like the summary
+            'vaccine_by_date': lambda dataset: dataset['vaccine'].set_index(
+                pd.DatetimeIndex(dataset['vaccine']['report_date']).rename(None)),
+            # Per-PHU series, their version and the PHU names, None when the regional table has not been built
+            'regional_cache': lambda dataset: colstore.read_frame(regional.REGIONAL_ARTIFACT),
+            'regional': lambda dataset: dataset['regional_cache'] and dataset['regional_cache'][0],
+            'regional_version': lambda dataset: dataset['regional_cache'] and dataset['regional_cache'][1]['version'],
+            'regions': lambda dataset: dataset['regional_cache'] and sorted(dataset['regional']['PHU'].unique()),
+        },
+        snapshot=summary['snapshot'],
+        milestones=summary['milestones'],
+        version=version,
+        written_at=summary['written_at'])
+
+def artifact_columns(version):
+    ''' Return {table: column names} of the tables of a build, reading only their layouts.'''
+    columns = {}
+    for name in [SUMMARY_ARTIFACT] + DERIVED_ARTIFACTS:
+        info = colstore.read_info(name, version)
+        if info is None:
+            raise LookupError(name + ' version ' + version + ' is no longer cached')
+        columns[name] = info['columns']
+    columns['vaccine_by_date'] = columns[VACCINE_ARTIFACT]
+
+    return columns
+
+
+def read_artifact(name, version):
+    ''' Read one version of a derived table, which must still be cached.'''
+    cached = colstore.read_frame(name, version)
+    if cached is None:
+        raise LookupError(name + ' version ' + version + ' is no longer cached')
+
+    return cached[0]
@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# Directory holding the on-disk cache (shared by every worker on the host)
+CACHE_DIR = os.environ.get('ONTARIO_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'ont-covid19-dashboard'))
+
+# Ontario publishes the daily update at this local time; cached frames expire at the next one
+PUBLISH_TIME = os.environ.get('ONTARIO_PUBLISH_TIME', '10:30')
+PUBLISH_TIMEZONE = 'America/Toronto'
+
+# Older versions are kept for the readers that still have them pinned (a products.Dataset
+# reads its tables lazily, during a rerun that may outlast a rebuild): at least KEEP_VERSIONS
+# of them, and every version replaced less than RETAIN_SECONDS ago
+KEEP_VERSIONS = 2
+RETAIN_SECONDS = int(os.environ.get('ONTARIO_RETAIN_SECONDS', 600))
+
+# Versions without a meta.json are still being written, unless they are this old: then
+# their writer died and they are removed
+ABANDONED_SECONDS = 3600
+
+# pandas 3 never copies the blocks it concatenates, and warns about the copy argument
+CONCAT_OPTIONS = {'copy': False} if int(pd.__version__.split('.')[0]) < 3 else {}
+
+
+def frame_dir(name):
+    return os.path.join(CACHE_DIR, name)
+
+
+def next_publish_time(after):
+    ''' Return the first daily publish time strictly after the given UTC timestamp.'''
+    local = pd.Timestamp(after).tz_convert(PUBLISH_TIMEZONE)
+    hour, minute = (int(part) for part in PUBLISH_TIME.split(':'))
+    publish = local.normalize().replace(hour=hour, minute=minute)
+    if publish <= local:
+        publish = (local.normalize() + pd.Timedelta(days=1)).replace(hour=hour, minute=minute)
+
+    return publish.tz_convert('UTC')
+
+
+def is_fresh(meta, now=None):
+    ''' Check whether a cached frame was written after the most recent publish time.'''
+    now = pd.Timestamp.now(tz='UTC') if now is None else now
+    return now < next_publish_time(pd.Timestamp(meta['written_at']))
+
+
+def column_blocks(df):
+    ''' Split a frame into runs of adjacent columns sharing a dtype, each as a 2D array
+    of shape (columns, rows).
+
+    Keeping the runs in column order lets them be put back together without reordering.
+    Text columns are stored as fixed-width unicode so that every block can be memory-mapped.
+    '''
+    dtypes = df.dtypes.astype(str).tolist()
+    blocks = []
+    start = 0
+    for end in range(1, len(dtypes) + 1):
+        if end < len(dtypes) and dtypes[end] == dtypes[start]:
+            continue
+        values = df.iloc[:, start:end]
+        if df.dtypes.iloc[start].kind not in 'biufmM':
+            array = np.array(values.fillna('').astype(str).to_numpy().T, dtype='U')
+        else:
+            array = np.ascontiguousarray(values.to_numpy().T)
+        blocks.append((list(df.columns[start:end]), array))
+        start = end
+
+    return blocks
+
+
+def new_version():
+    ''' Return a new version name; versions sort in the order they were created.'''
+    return pd.Timestamp.now(tz='UTC').strftime('%Y%m%dT%H%M%S%f') + '-' + str(os.getpid())
+
+
+def write_frame(name, df, meta=None, version=None):
+    ''' Write a frame to the cache as a new version and make it the current one.
+
+    The version is written to its own directory and the CURRENT pointer is then
+    replaced atomically, so readers see either the old or the new version in full.
+
+    Parameters:
+    name: name of the cached frame
+    df: DataFrame to cache (a non-default index is stored next to the columns and restored on read)
+    meta: JSON-serializable dictionary stored alongside the frame
+    version: version to write, from new_version (a new one by default), e.g. to give
+        the frames written together by one build the same version
+    '''
+    index = None
+    if not isinstance(df.index, pd.RangeIndex):
+        index = {'name': df.index.name}
+
+    written_at = pd.Timestamp.now(tz='UTC')
+    version = version or new_version()
+    version_dir = os.path.join(frame_dir(name), version)
+    os.makedirs(version_dir)
+
+    if index is not None:
+        np.save(os.path.join(version_dir, 'index.npy'), df.index.to_numpy())
+    block_meta = []
+    for i, (columns, array) in enumerate(column_blocks(df)):
+        np.save(os.path.join(version_dir, 'block%d.npy' % i), array)
+        block_meta.append(columns)
+
+    # Written last and atomically: a version is complete once its meta.json exists
+    meta_file = meta_path(name, version)
+    with open(meta_file + '.tmp', 'w') as f:
+        json.dump({
+            'columns': list(df.columns),
+            'blocks': block_meta,
+            'index': index,
+            'written_at': written_at.isoformat(),
+            'meta': meta or {}}, f)
+    os.replace(meta_file + '.tmp', meta_file)
+
+    pointer = os.path.join(frame_dir(name), 'CURRENT')
+    with open(pointer + '.' + version, 'w') as f:
+        f.write(version)
+    os.replace(pointer + '.' + version, pointer)
+
+    remove_old_versions(name, version)
+
+    return version
+
+
+def remove_old_versions(name, current, now=None):
+    ''' Remove the versions of a frame older than current that no reader can still need.
+
+    See KEEP_VERSIONS and RETAIN_SECONDS; versions still being written by another
+    worker are left alone, see ABANDONED_SECONDS.
+    '''
+    now = time.time() if now is None else now
+    versions = sorted(entry for entry in os.listdir(frame_dir(name))
+                      if entry < current and os.path.isdir(os.path.join(frame_dir(name), entry)))
+    complete = [version for version in versions if os.path.exists(meta_path(name, version))]
+
+    # Each version was replaced when the next complete one was written
+    successors = complete[1:] + [current]
+    for version, successor in list(zip(complete, successors))[:-KEEP_VERSIONS or None]:
+        if now - os.path.getmtime(meta_path(name, successor)) > RETAIN_SECONDS:
+            shutil.rmtree(os.path.join(frame_dir(name), version), ignore_errors=True)
+
+    for version in set(versions) - set(complete):
+        if now - os.path.getmtime(os.path.join(frame_dir(name), version)) > ABANDONED_SECONDS:
+            shutil.rmtree(os.path.join(frame_dir(name), version), ignore_errors=True)
+
+
+def meta_path(name, version):
+    return os.path.join(frame_dir(name), version, 'meta.json')
+
+
+def list_versions(name):
+    ''' Return the versions of a cached frame still on disk, newest first.'''
+    try:
+        entries = os.listdir(frame_dir(name))
+    except FileNotFoundError:
+        return []
+
+    return sorted((entry for entry in entries if os.path.isdir(os.path.join(frame_dir(name), entry))), reverse=True)
+
+
+def current_version(name):
+    ''' Return the current version of a cached frame without reading it, or None if nothing is cached.'''
+    try:
+        with open(os.path.join(frame_dir(name), 'CURRENT')) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def read_info(name, version=None):
+    ''' Read the layout and metadata of a version of a cached frame (the current one by default).
+
+    Returns None if nothing is cached or the version has been removed.
+    '''
+    version = version or current_version(name)
+    if version is None:
+        return None
+    try:
+        with open(meta_path(name, version)) as f:
+            info = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    info['meta']['written_at'] = info['written_at']
+    info['meta']['version'] = version
+
+    return info
+
+
+def read_meta(name, version=None):
+    ''' Read only the metadata of a cached frame, as returned by read_frame, or None.'''
+    info = read_info(name, version)
+
+    return None if info is None else info['meta']
+
+
+def read_frame(name, version=None):
+    ''' Read a version of a cached frame (the current one by default).
+
+    Numeric and datetime blocks are memory-mapped read-only, so every process reading
+    the same version shares the page cache instead of holding its own copy. Text blocks
+    are loaded into memory, also read-only.
+
+    Returns a tuple (DataFrame, metadata dictionary), or None if nothing is cached.
+    '''
+    info = read_info(name, version)
+    if info is None:
+        return None
+    version_dir = os.path.join(frame_dir(name), info['meta']['version'])
+
+    blocks = []
+    for i, columns in enumerate(info['blocks']):
+        array = np.load(os.path.join(version_dir, 'block%d.npy' % i), mmap_mode='r')
+        if array.dtype.kind == 'U':
+            array = array.astype('object')
+            # Read-only like the mapped blocks, so the frame can be shared without copies
+            array.setflags(write=False)
+        # The transpose is a (rows, columns) view, which pandas keeps as a single block
+        blocks.append(pd.DataFrame(array.T, columns=columns, copy=False))
+    df = pd.concat(blocks, axis=1, **CONCAT_OPTIONS) if blocks else pd.DataFrame()
+
+    if info['index'] is not None:
+        # Assigning the index keeps the mapped column blocks as they are
+        df.index = pd.Index(np.load(os.path.join(version_dir, 'index.npy'), mmap_mode='r'), name=info['index']['name'])
+
+    return df, info['meta']
+
+
+def read_fresh_frame(name):
+    ''' Read a cached frame, returning None if nothing is cached or it predates the last publish time.'''
+    cached = read_frame(name)
+    if cached is None or not is_fresh(cached[1]):
+        return None
+
+    return cached
@@ -0,0 +1,42 @@
+''' Process-wide cache of the dataset, keyed on its version instead of on hashes of its contents.
+
+The dataset version is assigned once when build_dataset writes the derived tables,
+so checking whether the cached copy is still current is a read of the CURRENT
+pointer, with no hashing of inputs or outputs. Every caller shares the same
+read-only frames: their column blocks are memory-mapped read-only, so a write to
+them raises instead of silently changing what other sessions see.
+'''
+import threading
+
+from src.interactive.modules import build, colstore, metrics, refresher
+
+_lock = threading.Lock()
+_current = {}
+
+
+def current_dataset():
+    ''' Return the current dataset, as returned by build.load_dataset.
+
+    It is only reloaded when a rebuild produced a new version, or when it predates the
+    last Ontario publish time and no background refresher is keeping it up to date.
+    '''
+    dataset = _current.get('dataset')
+    if dataset is not None and is_current(dataset):
+        metrics.cache_lookup('process_dataset', True)
+        return dataset
+
+    with _lock:
+        dataset = _current.get('dataset')
+        current = dataset is not None and is_current(dataset)
+        metrics.cache_lookup('process_dataset', current)
+        if not current:
+            dataset = build.load_dataset(allow_stale=refresher.BACKGROUND_REFRESH)
+            _current['dataset'] = dataset
+
+    return dataset
+
+
+def is_current(dataset):
+    if dataset['version'] != build.current_version():
+        return False
+    return refresher.BACKGROUND_REFRESH or colstore.is_fresh({'written_at': dataset['written_at']})
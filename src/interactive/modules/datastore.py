@@ -0,0 +1,551 @@
+import os
+import re
+import json
+import time
+import codecs
+import operator
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import urllib3
+
+from src.interactive.modules.schema import SCHEMAS, check_fields, check_numeric, convert_column
+
+# Base URL of the Ontario Government CKAN API (overridable to point at a local stub)
+DATASTORE_URL = os.environ.get('ONTARIO_DATASTORE_URL', 'https://data.ontario.ca/api/3/action')
+
+# Datastore resource IDs for each data type
+RESOURCE_IDS = {
+    'COVID': 'ed270bb8-340b-41f9-a7c6-e8ef587e6d11',
+    'Vaccine': '8a89caa9-511c-4568-af89-7f2174b4378c',
+}
+
+# Declared column dtypes of each resource
+RESOURCE_SCHEMAS = {RESOURCE_IDS[type]: SCHEMAS[type] for type in SCHEMAS}
+
+# Number of records requested per page and number of pages requested at once
+PAGE_SIZE = 5000
+MAX_WORKERS = 4
+
+# Fetches that may run at once in one process: both dashboard resources during
+# ingest, plus the case-level resource of the regional table
+CONCURRENT_FETCHES = 3
+
+# Records parsed before their values are copied into the column arrays together
+BATCH_RECORDS = 1000
+
+# CKAN field types that are loaded as numbers when a column has no declared dtype
+NUMERIC_TYPES = ('int', 'int4', 'int8', 'float8', 'numeric')
+
+# Bytes read from the socket at a time when a page is streamed
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Start of the records array in a datastore_search response
+RECORDS_START = re.compile(r'"records"\s*:\s*\[')
+
+# One connection pool shared by every request made from this process, sized for every
+# fetch at once; a request beyond that waits for a free connection instead of opening
+# one that would be discarded
+http = urllib3.PoolManager(maxsize=MAX_WORKERS * CONCURRENT_FETCHES, block=True,
+                           retries=urllib3.Retry(3, backoff_factor=0.5),
+                           timeout=urllib3.Timeout(connect=10, read=60))
+
+# Transfer counters for every request made from this process
+stats = {'requests': 0, 'bytes_on_wire': 0, 'bytes_decoded': 0, 'not_modified': 0}
+stats_lock = threading.Lock()
+
+# Time (time.monotonic) by which the requests of a thread must be done, see deadline
+_deadline = threading.local()
+
+
+@contextlib.contextmanager
+def deadline(seconds):
+    ''' Make the requests of this thread, and of the page fetches it starts, give up after seconds in all.
+
+    Each request is sent with what is left as its total socket timeout, without retries of
+    its own, and a page still streaming at the deadline is abandoned: past it, requests raise
+    TimeoutError instead of running on in the background.
+    '''
+    previous = getattr(_deadline, 'at', None)
+    at = time.monotonic() + seconds
+    _deadline.at = at if previous is None else min(at, previous)
+    try:
+        yield
+    finally:
+        _deadline.at = previous
+
+
+def check_deadline():
+    ''' Raise TimeoutError if the deadline of this thread has passed, else return the seconds left (None without one).'''
+    at = getattr(_deadline, 'at', None)
+    if at is None:
+        return None
+    remaining = at - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError('Datastore requests exceeded their deadline')
+
+    return remaining
+
+
+def request_options():
+    ''' Timeout and retry options of a request made now by this thread.'''
+    remaining = check_deadline()
+    if remaining is None:
+        return {}
+    return {'timeout': urllib3.Timeout(total=remaining, connect=min(10, remaining), read=min(60, remaining)),
+            'retries': False}
+
+
+def with_deadline(function):
+    ''' Wrap a function run in a worker thread so its requests keep the deadline of the calling thread.'''
+    at = getattr(_deadline, 'at', None)
+
+    def run(*args):
+        _deadline.at = at
+        try:
+            return function(*args)
+        finally:
+            _deadline.at = None
+
+    return run
+
+
+def request_json(action, fields, validators=None):
+    ''' Request a CKAN API action with compression, optionally as a conditional request.
+
+    Parameters:
+    action: name of the API action, e.g. 'datastore_search'
+    fields: query string parameters
+    validators: {'etag': ..., 'last_modified': ...} from an earlier response to the same request
+
+    Returns a tuple (result object, validators of this response). The result is None
+    if the server answered 304 Not Modified, in which case nothing was downloaded or parsed.
+    '''
+    response = http.request('GET', DATASTORE_URL + '/' + action, fields=fields, headers=conditional_headers(validators),
+                            **request_options())
+    count_transfer(response, len(response.data))
+
+    if response.status == 304:
+        return None, validators
+    if response.status != 200:
+        raise IOError('Request to ' + action + ' failed with status ' + str(response.status))
+    data = json.loads(response.data)
+
+    return data['result'], response_validators(response)
+
+
+def conditional_headers(validators=None):
+    headers = {'Accept-Encoding': 'gzip, deflate'}
+    if validators and validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators and validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+
+    return headers
+
+
+def response_validators(response):
+    return {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+
+
+def count_transfer(response, bytes_decoded):
+    with stats_lock:
+        stats['requests'] += 1
+        stats['bytes_on_wire'] += response.tell()
+        stats['bytes_decoded'] += bytes_decoded
+        if response.status == 304:
+            stats['not_modified'] += 1
+
+
+def request_page(resource_id, offset, limit, validators=None):
+    ''' Request a single page of records from the Datastore API and return the result object.
+
+    If validators are given the request is conditional and None is returned when the page
+    has not changed; use request_json directly to also get the new validators.
+    '''
+    result, _ = request_json('datastore_search', page_fields(resource_id, offset, limit), validators)
+
+    return result
+
+
+def page_fields(resource_id, offset, limit, columns=None):
+    fields = {'resource_id': resource_id, 'offset': offset, 'limit': limit, 'sort': '_id'}
+    if columns:
+        # Only these columns are sent, which shrinks wide resources a lot
+        fields['fields'] = ','.join(columns)
+
+    return fields
+
+
+def resource_metadata(resource_id):
+    ''' Request the CKAN metadata of a resource (including its last_modified timestamp).'''
+    result, _ = request_json('resource_show', {'id': resource_id})
+
+    return result
+
+
+def last_modified(resource_id):
+    ''' Return when a resource last changed, from its CKAN metadata.
+
+    Resources whose data was never replaced have no last_modified timestamp, their
+    metadata_modified one is used instead. None if CKAN sends neither.
+    '''
+    metadata = resource_metadata(resource_id)
+
+    return metadata.get('last_modified') or metadata.get('metadata_modified')
+
+
+def digest_sql(resource_id, known_last_id):
+    ''' SQL computing digests of a resource on the Datastore: its number of rows, its last _id,
+    an md5 of every row and an md5 of the rows up to known_last_id, each row as Postgres text.'''
+    return (
+        'SELECT count(*) AS rows, max(_id) AS last_id, '
+        "md5(string_agg(t::text, '|' ORDER BY _id)) AS digest, "
+        "md5(string_agg(t::text, '|' ORDER BY _id) FILTER (WHERE _id <= %d)) AS known_digest "
+        'FROM "%s" t') % (int(known_last_id), resource_id)
+
+
+def content_digests(resource_id, known_last_id=0, validators=None):
+    ''' Ask the Datastore for digests of the whole content of a resource, see digest_sql.
+
+    Any revised, deleted or added row changes the digest, without a single record being
+    downloaded. Raises IOError where the Datastore does not allow SQL queries.
+
+    Parameters:
+    resource_id: Datastore resource ID
+    known_last_id: _id of the last row already ingested, bounding known_digest
+    validators: as for request_json, to make the request conditional
+
+    Returns a tuple ({'rows', 'last_id', 'digest', 'known_digest'}, validators), the
+    digests being None on 304 Not Modified.
+    '''
+    result, validators = request_json('datastore_search_sql', {'sql': digest_sql(resource_id, known_last_id)}, validators)
+    if result is None:
+        return None, validators
+    row = result['records'][0]
+
+    return {
+        'rows': int(row['rows']),
+        'last_id': int(row['last_id'] or 0),
+        'digest': row['digest'],
+        'known_digest': row['known_digest']}, validators
+
+
+def parse_records(chunks, on_record):
+    ''' Parse a datastore_search response incrementally, as its chunks arrive.
+
+    Records are decoded as soon as their bytes have arrived and handed to on_record,
+    so parsing overlaps with the transfer and the records array is never held in memory.
+
+    Parameters:
+    chunks: iterable of response body chunks (bytes)
+    on_record: function called with each record dictionary, in order
+
+    Returns the result object without its records (fields, total, ...).
+    '''
+    # The C scanner behind JSONDecoder.raw_decode, without its per-call wrapper
+    scan_once = json.JSONDecoder().scan_once
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buffer = ''
+
+    def read_more():
+        nonlocal buffer
+        chunk = next(chunks, None)
+        if chunk is None:
+            return False
+        buffer += text_decoder.decode(chunk)
+        return True
+
+    # Everything up to the opening bracket of the records array
+    while True:
+        match = RECORDS_START.search(buffer)
+        if match:
+            head, buffer = buffer[:match.end()], buffer[match.end():]
+            break
+        if not read_more():
+            raise ValueError('Datastore response has no records')
+
+    position = 0
+    # Whether the records received since the last read were already tried as one batch
+    batched = False
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position == len(buffer):
+            buffer, position, batched = '', 0, False
+            if not read_more():
+                raise ValueError('Datastore response ended inside its records')
+            continue
+        if buffer[position] == ']':
+            break
+        if not batched:
+            # Records are flat objects, so when the last '}' received ends a record every
+            # complete record decodes in a single call. Otherwise (the brace is in a string,
+            # or closes the result) the text is invalid, and records are scanned one by one.
+            batched = True
+            end = buffer.rfind('}') + 1
+            if end > position:
+                try:
+                    records = json.loads('[' + buffer[position:end] + ']')
+                except json.JSONDecodeError:
+                    records = None
+                if records is not None:
+                    for record in records:
+                        on_record(record)
+                    position = end
+                    continue
+        try:
+            record, position = scan_once(buffer, position)
+        except (StopIteration, json.JSONDecodeError):
+            # The record is incomplete: keep its beginning and wait for the rest
+            buffer, position, batched = buffer[position:], 0, False
+            if not read_more():
+                raise ValueError('Datastore response ended inside its records')
+            continue
+        on_record(record)
+
+    # The rest of the result, with an empty records array in place of the streamed one
+    buffer = buffer[position:]
+    while read_more():
+        pass
+
+    return json.loads(head + buffer)['result']
+
+
+def stream_page(resource_id, offset, limit, validators=None, columns=None):
+    ''' Request a page of records and parse it into column arrays while it downloads.
+
+    Values of declared numeric columns are written straight into arrays preallocated for
+    the whole page, so peak memory stays close to the size of the resulting columns.
+
+    Parameters:
+    resource_id: Datastore resource ID
+    offset: offset of the first record
+    limit: maximum number of records in the page
+    validators: as for request_json, to make the request conditional
+    columns: names of the columns to request, None for all of them
+
+    Returns a tuple (page, validators of this response), page being None on 304 Not Modified.
+    The page is the result object with, instead of its records, the typed 'columns',
+    their length 'count' and the raw 'first_record' and 'last_record' (None when empty).
+    '''
+    schema = RESOURCE_SCHEMAS.get(resource_id, {})
+    response = http.request('GET', DATASTORE_URL + '/datastore_search', fields=page_fields(resource_id, offset, limit, columns),
+                            headers=conditional_headers(validators), preload_content=False, **request_options())
+    try:
+        if response.status != 200:
+            response.drain_conn()
+            count_transfer(response, 0)
+            if response.status == 304:
+                return None, validators
+            raise IOError('Request to datastore_search failed with status ' + str(response.status))
+
+        decoded = 0
+
+        def chunks():
+            nonlocal decoded
+            for chunk in response.stream(STREAM_CHUNK_SIZE):
+                check_deadline()
+                decoded += len(chunk)
+                yield chunk
+
+        result = parse_page(chunks(), limit, schema)
+        count_transfer(response, decoded)
+    finally:
+        response.release_conn()
+
+    return result, response_validators(response)
+
+
+def parse_page(chunks, limit, schema=None):
+    ''' Parse the body of a datastore_search response into typed column arrays.
+
+    Parameters:
+    chunks: iterable of response body chunks (bytes)
+    limit: maximum number of records in the page, the length of the preallocated arrays
+    schema: declared {column: dtype} of the resource
+
+    Returns the page described in stream_page. Values of the declared numeric columns
+    that are not numbers raise SchemaDriftError, with their count per column.
+    '''
+    schema = schema or {}
+    columns = {name: np.full(limit, np.nan) for name, dtype in schema.items() if np.dtype(dtype).kind in 'biuf'}
+    rejected = dict.fromkeys(columns, 0)
+    page = {'count': 0, 'first_record': None, 'last_record': None}
+    batch = []
+
+    def flush():
+        # The batch is transposed into columns in one go, rather than record by record
+        start = page['count']
+        names = list(columns)
+        for name, values in zip(names, transpose(batch, names)):
+            column = columns[name]
+            if isinstance(column, list):
+                column.extend(values)
+            else:
+                column[start:start + len(values)], count = numeric_values(values)
+                rejected[name] += count
+        page['count'] = start + len(batch)
+        page['last_record'] = batch[-1]
+        batch.clear()
+
+    def on_record(record):
+        if page['first_record'] is None:
+            page['first_record'] = record
+            for name in record:
+                columns.setdefault(name, [])
+        batch.append(record)
+        if len(batch) == BATCH_RECORDS:
+            flush()
+
+    result = parse_records(chunks, on_record)
+    if batch:
+        flush()
+    check_numeric(rejected)
+    result.pop('records', None)
+    result.update(page)
+    result['columns'] = type_columns(columns, page['count'], result['fields'], schema)
+
+    return result
+
+
+def transpose(records, names):
+    ''' Return the values of each of the named columns of a list of records, in order.'''
+    if len(names) > 1:
+        try:
+            return zip(*map(operator.itemgetter(*names), records))
+        except KeyError:
+            # Some record lacks a column; it is missing there
+            pass
+    return ([record.get(name) for record in records] for name in names)
+
+
+def numeric_values(values):
+    ''' Convert the raw values of a numeric column to float64, missing values to NaN.
+
+    Returns the array and the number of values that are not numbers, which are left as NaN.
+    '''
+    try:
+        return np.array(values, dtype='float64'), 0
+    except (TypeError, ValueError):
+        array = np.full(len(values), np.nan)
+        rejected = 0
+        for row, value in enumerate(values):
+            if value is not None:
+                try:
+                    array[row] = value
+                except (TypeError, ValueError):
+                    rejected += 1
+        return array, rejected
+
+
+def type_columns(columns, count, fields, schema=None):
+    ''' Convert the raw column values of a streamed page to their dtypes.
+
+    Parameters:
+    columns: {column: preallocated array or list of raw values}
+    count: number of records in the page
+    fields: list of field descriptions ({'id': ..., 'type': ...}) of the resource
+    schema: declared {column: dtype} of the resource; other columns are typed from their CKAN type
+    '''
+    schema = schema or {}
+    typed = {}
+    for field in fields:
+        name = field['id']
+        values = columns.get(name, [None] * count)[:count]
+        if name in schema:
+            typed[name] = convert_column(name, values, schema[name])
+        elif field['type'] in NUMERIC_TYPES:
+            typed[name] = convert_column(name, values, 'float64')
+        else:
+            typed[name] = np.array(values, dtype='object')
+
+    return typed
+
+
+def columns_to_frame(pages, fields, schema=None):
+    ''' Concatenate the column arrays of every page into one DataFrame.
+
+    Numeric columns outside the schema without missing or fractional values are
+    stored as int64, matching the dtypes pd.json_normalize would have inferred.
+    '''
+    schema = schema or {}
+    df = pd.DataFrame({
+        field['id']: np.concatenate([page[field['id']] for page in pages])
+        for field in fields})
+    for field in fields:
+        column = df[field['id']]
+        if field['id'] not in schema and field['type'] in NUMERIC_TYPES and len(column) and column.notna().all() and (column % 1 == 0).all():
+            df[field['id']] = column.astype('int64')
+
+    return df
+
+
+def fetch_resource(resource_id, start=0, page_size=PAGE_SIZE, max_workers=MAX_WORKERS):
+    ''' Fetch the records of a Datastore resource into a DataFrame.
+
+    The first page is requested on its own to learn the total number of records,
+    the remaining pages are then requested concurrently over the shared connection pool.
+    Every page is parsed as it streams in, see stream_page.
+
+    Parameters:
+    resource_id: Datastore resource ID
+    start: offset of the first record to fetch (records are sorted by _id)
+    page_size: number of records per request
+    max_workers: maximum number of requests in flight at once
+    '''
+    first, _ = stream_page(resource_id, start, page_size)
+
+    return fetch_remaining(resource_id, first, start, page_size, max_workers)
+
+
+def fetch_remaining(resource_id, first, start=0, page_size=PAGE_SIZE, max_workers=MAX_WORKERS):
+    ''' Fetch the pages following an already streamed first page and build the DataFrame.
+
+    Resources with a declared schema are checked against it and typed as they are ingested.
+    '''
+    fields = first['fields']
+    schema = RESOURCE_SCHEMAS.get(resource_id)
+    if schema is not None:
+        check_fields(fields, schema)
+    pages = [first['columns']]
+
+    offsets = range(start + page_size, first.get('total', 0), page_size)
+    if offsets:
+        def fetch_page(offset):
+            return stream_page(resource_id, offset, page_size)[0]['columns']
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # map() keeps the pages in offset order
+            pages.extend(pool.map(with_deadline(fetch_page), offsets))
+
+    return columns_to_frame(pages, fields, schema)
+
+
+def iter_pages(resource_id, page_size=PAGE_SIZE, max_workers=MAX_WORKERS, columns=None):
+    ''' Stream the pages of a resource in order, for resources too large to hold in memory at once.
+
+    At most max_workers pages are requested ahead of the one being consumed, so memory
+    stays bounded by the page size whatever the size of the resource.
+
+    Parameters:
+    resource_id: Datastore resource ID
+    page_size: number of records per request
+    max_workers: maximum number of requests in flight at once
+    columns: names of the columns to request, None for all of them
+
+    Yields the pages as returned by stream_page.
+    '''
+    first, _ = stream_page(resource_id, 0, page_size, columns=columns)
+    yield first
+
+    offsets = list(range(page_size, first.get('total', 0), page_size))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for batch in range(0, len(offsets), max_workers):
+            pages = pool.map(with_deadline(lambda offset: stream_page(resource_id, offset, page_size, columns=columns)[0]),
+                             offsets[batch:batch + max_workers])
+            yield from pages
@@ -0,0 +1,259 @@
+''' Streaming export of dashboard series as CSV, Parquet or Arrow IPC.
+
+Exports come straight from the cached, typed tables of the dataset and are written
+a chunk of rows at a time, each chunk handed to the caller as soon as it is encoded,
+so a file is never built whole in memory. Files are produced in a small worker pool:
+a burst of large exports queues there instead of competing with page views.
+
+From the command line:
+
+    python -m src.interactive.modules.export --metrics New_Total_Cases,total_doses_administered --format parquet --output cases.parquet
+'''
+import io
+import os
+import queue
+import asyncio
+import argparse
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from src.interactive.modules import metrics, query
+
+# Export formats, as {format: (content type, file extension)}; Parquet and Arrow need pyarrow
+FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+    'arrow': ('application/vnd.apache.arrow.file', '.arrow'),
+}
+
+# Rows encoded at a time (one Parquet row group or Arrow record batch each)
+CHUNK_ROWS = int(os.environ.get('EXPORT_CHUNK_ROWS', 10000))
+
+# Exports produced at once; later ones wait for a free worker
+EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', 2))
+
+# Encoded chunks buffered ahead of a slow client
+QUEUE_CHUNKS = 4
+
+# Tables metrics can be exported from, with the column holding their dates
+EXPORT_TABLES = [('summary', 'Date'), ('vaccine_by_date', 'report_date'), ('vaccinations', 'Date')]
+
+_pool = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix='export')
+
+# Last item of the queue of an export
+EXPORT_DONE = object()
+
+
+class UnknownMetricError(ValueError):
+    ''' Raised when an export asks for a metric no table has.'''
+
+
+def available_metrics(dataset):
+    ''' Return {metric: table name} for every metric that can be exported from a dataset.
+
+    Only the column names of the dataset are needed, so no table is read.
+    '''
+    columns = {}
+    for table, date_column in EXPORT_TABLES:
+        for column in dataset['columns'][table]:
+            if column not in (date_column, '_id') and column not in columns:
+                columns[column] = table
+
+    return columns
+
+
+def export_frame(dataset, metric_names, start=None, end=None):
+    ''' Select some metrics between two dates (inclusive) as one frame with a Date column.
+
+    Metrics of a single table are a view of it; metrics of several tables are joined on the date.
+
+    Parameters:
+    dataset: dataset from build.load_dataset
+    metric_names: metrics to export, see available_metrics
+    start: first date to include, None for no lower bound
+    end: last date to include, None for no upper bound
+    '''
+    tables = available_metrics(dataset)
+    unknown = [name for name in metric_names if name not in tables]
+    if unknown:
+        raise UnknownMetricError('Unknown metrics: ' + ', '.join(unknown))
+
+    frames = []
+    for table, _ in EXPORT_TABLES:
+        columns = [name for name in metric_names if tables[name] == table]
+        if columns:
+            frames.append(query.select_dates(dataset[table], start, end)[columns])
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, axis=1, join='outer').sort_index()
+    df = df[list(metric_names)]
+
+    return pd.concat([pd.DataFrame({'Date': df.index}, index=df.index), df], axis=1)
+
+
+class ChunkSink(io.RawIOBase):
+    ''' Write-only file collecting what a writer produces until it is drained.'''
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_chunks(df):
+    for start in range(0, len(df), CHUNK_ROWS):
+        yield df.iloc[start:start + CHUNK_ROWS]
+
+
+def iter_csv(df):
+    yield df.iloc[:0].to_csv(index=False, date_format='%Y-%m-%d').encode('utf-8')
+    for chunk in iter_chunks(df):
+        yield chunk.to_csv(index=False, header=False, date_format='%Y-%m-%d').encode('utf-8')
+
+
+def iter_arrow_writer(df, open_writer):
+    import pyarrow as pa
+
+    sink = ChunkSink()
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    writer = open_writer(sink, schema)
+    for chunk in iter_chunks(df):
+        writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def iter_parquet(df):
+    import pyarrow.parquet as pq
+
+    return iter_arrow_writer(df, lambda sink, schema: pq.ParquetWriter(sink, schema))
+
+
+def iter_arrow(df):
+    import pyarrow as pa
+
+    return iter_arrow_writer(df, lambda sink, schema: pa.ipc.new_file(sink, schema))
+
+
+ENCODERS = {
+    'csv': iter_csv,
+    'parquet': iter_parquet,
+    'arrow': iter_arrow,
+}
+
+
+def start_export(df, format):
+    ''' Start encoding a frame in the worker pool.
+
+    Returns the queue the encoded chunks are put on, which ends with EXPORT_DONE (or
+    the exception the encoder raised), and a function to call once the consumer is
+    gone, which lets the worker stop at its next chunk.
+    '''
+    encoder = ENCODERS[format]
+    chunks = queue.Queue(maxsize=QUEUE_CHUNKS)
+    cancelled = []
+
+    def produce():
+        try:
+            with metrics.timer('export_' + format):
+                for chunk in encoder(df):
+                    if cancelled:
+                        return
+                    if chunk:
+                        chunks.put(chunk)
+        except Exception as error:
+            chunks.put(error)
+        chunks.put(EXPORT_DONE)
+
+    def cancel():
+        cancelled.append(True)
+        while not chunks.empty():
+            chunks.get_nowait()
+        # Wakes up a consumer thread still waiting for a chunk
+        chunks.put_nowait(EXPORT_DONE)
+
+    _pool.submit(produce)
+
+    return chunks, cancel
+
+
+def stream_export(df, format):
+    ''' Encode a frame in the worker pool, yielding the file a chunk at a time.
+
+    At most QUEUE_CHUNKS encoded chunks wait for the consumer, so a slow download
+    holds back its worker instead of buffering the file. Waiting for a chunk blocks
+    the calling thread: on an event loop, use astream_export.
+
+    Parameters:
+    df: frame to export, e.g. from export_frame
+    format: one of FORMATS
+    '''
+    chunks, cancel = start_export(df, format)
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is EXPORT_DONE:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        cancel()
+
+
+async def astream_export(df, format):
+    ''' Like stream_export, as an async iterator whose waits for a chunk do not block the event loop.'''
+    loop = asyncio.get_running_loop()
+    chunks, cancel = start_export(df, format)
+    try:
+        while True:
+            chunk = await loop.run_in_executor(None, chunks.get)
+            if chunk is EXPORT_DONE:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        cancel()
+
+
+def format_available(format):
+    ''' Check that the libraries a format needs are installed.'''
+    return format == 'csv' or importlib.util.find_spec('pyarrow') is not None
+
+
+def file_name(metric_names, format):
+    return '-'.join(metric_names)[:100] + FORMATS[format][1]
+
+
+if __name__ == '__main__':
+    from src.interactive.modules import dataset_cache
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--metrics', required=True, help='comma-separated metric names')
+    parser.add_argument('--format', choices=list(FORMATS), default='csv')
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    parser.add_argument('--output', required=True)
+    args = parser.parse_args()
+
+    df = export_frame(dataset_cache.current_dataset(), args.metrics.split(','), args.start, args.end)
+    with open(args.output, 'wb') as f:
+        for chunk in stream_export(df, args.format):
+            f.write(chunk)
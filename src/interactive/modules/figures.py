@@ -0,0 +1,140 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+
+import plotly.utils
+import plotly.express as px
+
+from src.interactive.modules import metrics, resample
+
+# Upper bound on the size of the cached figure JSON
+FIGURE_CACHE_BYTES = int(os.environ.get('FIGURE_CACHE_MB', 64)) * 1024 * 1024
+
+# Bar charts of the Cases page, as (column, title)
+CASES_CHARTS = [
+    ('Total_Cases', 'Total Cases'),
+    ('Active_Cases', 'Active Cases'),
+    ('New_Total_Cases', 'New Cases'),
+    ('Deaths', 'Total Deaths'),
+    ('New_Deaths', 'New Deaths'),
+    ('New_Number_hospitalized', 'New patients hospitalized'),
+    ('New_Number_ICU', 'New number of patients in the ICU'),
+    ('New_Resolved', 'New number of cases resolved'),
+]
+
+# Charts of the Vaccinations page, as (chart function name, column, title)
+VACCINATION_CHARTS = [
+    ('bar_chart', 'New_doses', 'Doses administered per day'),
+    ('line_chart', 'New_doses_7day_avg', 'Doses administered per day (7-day average)'),
+    ('line_chart', 'Doses_per_100k_7day_avg', 'Daily doses per 100,000 people (7-day average)'),
+    ('line_chart', 'Coverage_at_least_one', 'Population with at least one dose (%)'),
+    ('line_chart', 'Coverage_fully_vaccinated', 'Population fully vaccinated (%)'),
+]
+
+
+class FigureCache:
+    ''' Thread-safe LRU cache of figures, evicting the least recently used ones
+    once their total size exceeds max_bytes.'''
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, figure, size):
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+            self.entries[key] = (figure, size)
+            self.size += size
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                self.size -= self.entries.popitem(last=False)[1][1]
+
+
+figure_cache = FigureCache(FIGURE_CACHE_BYTES)
+
+
+def bar_chart(df, x, y, title, version, resolution=resample.AUTO):
+    ''' Return the Plotly JSON of a bar chart of one column, built once per dataset version and input slice.
+
+    The figure is cached serialized, so a rerun sends the cached JSON as is instead of
+    validating and serializing the figure again (see app.plotly_chart).
+
+    The cache key holds the dates the slice covers rather than the selected range, so
+    range selections that give the same rows (or charts that ignore the range) reuse
+    the same figure. Long ranges are aggregated into weekly or monthly bars.
+
+    Parameters:
+    df: DataFrame to plot, one row per day
+    x: column with the dates
+    y: column to plot
+    title: chart title
+    version: version of the dataset df comes from
+    resolution: resample.AUTO or one of resample.RESOLUTIONS
+    '''
+    resolution = resample.choose_resolution(len(df), resolution)
+    key = ('bar', version, y, title, resolution) + slice_key(df, x)
+    figure = figure_cache.get(key)
+    metrics.cache_lookup('figure', figure is not None)
+    if figure is None:
+        with metrics.timer('build_figure'):
+            plotted = resample.aggregate(df, x, y, resolution)
+            figure = px.bar(plotted, x=x, y=y)
+            figure.update_layout(title=chart_title(title, resolution), xaxis_title='', yaxis_title='')
+            figure = to_json(figure)
+            figure_cache.put(key, figure, len(figure))
+
+    return figure
+
+
+def line_chart(df, x, y, title, version, resolution=resample.AUTO):
+    ''' Return the Plotly JSON of a line chart of one column, cached like bar_chart.
+
+    With resample.AUTO, lines past resample.MAX_POINTS points are downsampled with LTTB,
+    which keeps their shape; a Weekly or Monthly resolution aggregates them into
+    buckets like bar_chart, and Daily keeps every point.
+    '''
+    key = ('line', version, y, title, resolution) + slice_key(df, x)
+    figure = figure_cache.get(key)
+    metrics.cache_lookup('figure', figure is not None)
+    if figure is None:
+        with metrics.timer('build_figure'):
+            if resolution == resample.AUTO:
+                plotted = resample.downsample_line(df, x, y)
+            else:
+                plotted = resample.aggregate(df, x, y, resolution)
+                title = chart_title(title, resolution)
+            figure = px.line(plotted, x=x, y=y)
+            figure.update_layout(title=title, xaxis_title='', yaxis_title='')
+            figure = to_json(figure)
+            figure_cache.put(key, figure, len(figure))
+
+    return figure
+
+
+def to_json(figure):
+    ''' Serialize a figure the way st.plotly_chart does.'''
+    return json.dumps(figure, cls=plotly.utils.PlotlyJSONEncoder)
+
+
+def slice_key(df, x):
+    ''' Identify the rows of a slice by its length and first and last dates.'''
+    if not len(df):
+        return (0, None, None)
+    return (len(df), df[x].iloc[0], df[x].iloc[-1])
+
+
+def chart_title(title, resolution):
+    if resolution == 'Daily':
+        return title
+    return title + ' (' + resolution.lower() + ')'
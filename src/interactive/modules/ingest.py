@@ -0,0 +1,90 @@
+import os
+import asyncio
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import urllib3
+
+from src.interactive.modules import datastore
+
+# Seconds the requests of one attempt at loading a resource may take in all
+TIMEOUT = float(os.environ.get('ONTARIO_INGEST_TIMEOUT', 120))
+
+# Share of the timeout an attempt still gets to finish its work (e.g. writing the local
+# copy) after its deadline; past that it is abandoned, and not retried
+GRACE = 0.25
+
+# Attempts after the first one, and the delay before the first retry (doubled for each next one)
+RETRIES = int(os.environ.get('ONTARIO_INGEST_RETRIES', 2))
+BACKOFF = float(os.environ.get('ONTARIO_INGEST_BACKOFF', 1))
+
+# Errors worth another attempt; anything else (e.g. schema drift) fails straight away
+RETRYABLE_ERRORS = (OSError, urllib3.exceptions.HTTPError, asyncio.TimeoutError)
+
+logger = logging.getLogger(__name__)
+
+
+def run_attempt(loader, type, timeout):
+    with datastore.deadline(timeout):
+        return loader(type)
+
+
+async def load_resource(loader, type, executor, timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF):
+    ''' Load one resource in the executor, with a timeout per attempt and retries with backoff.
+
+    The timeout is enforced on the requests of the attempt (see datastore.deadline), so a
+    timed out attempt has stopped by the time the next one starts and the two never write
+    the local copy at once. An attempt still running GRACE after its timeout, stuck outside
+    of its requests, is abandoned to its worker thread and the load fails without a retry.
+
+    Parameters:
+    loader: function loading a resource by type, e.g. build.load_data
+    type: resource type, passed to the loader
+    executor: executor running the loader, so fetching and parsing stay off the event loop
+    '''
+    loop = asyncio.get_running_loop()
+    for attempt in range(retries + 1):
+        future = loop.run_in_executor(executor, run_attempt, loader, type, timeout)
+        done, _ = await asyncio.wait([future], timeout=timeout * (1 + GRACE))
+        if not done:
+            raise asyncio.TimeoutError('Loading ' + type + ' is stuck, abandoning it')
+        try:
+            return future.result()
+        except RETRYABLE_ERRORS as error:
+            if attempt == retries:
+                raise
+            delay = backoff * 2 ** attempt
+            logger.warning('Loading %s failed (%r), retrying in %.1f seconds', type, error, delay)
+            await asyncio.sleep(delay)
+
+
+async def load_all(loader, types, **options):
+    ''' Load every resource concurrently, returning {type: result}.
+
+    Parameters:
+    loader: function loading a resource by type
+    types: resource types to load
+    options: timeout, retries or backoff, see load_resource
+    '''
+    executor = ThreadPoolExecutor(max_workers=len(types), thread_name_prefix='ingest')
+    try:
+        results = await asyncio.gather(*(load_resource(loader, type, executor, **options) for type in types))
+    finally:
+        # Do not wait for an abandoned attempt
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return dict(zip(types, results))
+
+
+def load_resources(loader, types, **loader_kwargs):
+    ''' Load several resources concurrently from synchronous code.
+
+    Cold start then costs about as much as the slowest resource instead of the sum of all.
+
+    Parameters:
+    loader: function loading a resource by type, e.g. build.load_data
+    types: resource types to load
+    loader_kwargs: extra keyword arguments passed to the loader
+    '''
+    return asyncio.run(load_all(functools.partial(loader, **loader_kwargs), list(types)))
@@ -0,0 +1,148 @@
+''' Timings of the pipeline stages and cache counters, for finding out where a slow page spends its time.
+
+Turned on with DASHBOARD_METRICS=1. When off, timer() hands out a shared no-op
+context manager and increment() returns straight away, so instrumented code pays
+one function call per stage.
+
+Measurements are kept per process and can be read as a table (the debug panel of
+the Streamlit app, opened with ?debug=1), in the Prometheus text format (the
+/api/metrics endpoint of the Django project), or as DEBUG log lines of this module.
+'''
+import os
+import time
+import logging
+import threading
+import contextlib
+
+from src.interactive.modules import datastore
+
+# Whether measurements are recorded
+ENABLED = os.environ.get('DASHBOARD_METRICS', '') not in ('', '0')
+
+# Prefix of every exported metric name
+PREFIX = 'dashboard_'
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+# {stage: [count, total seconds, max seconds, last seconds]}
+_timings = {}
+# {(name, ((label, value), ...)): value}
+_counters = {}
+
+_null_timer = contextlib.nullcontext()
+
+
+class Timer:
+    ''' Context manager recording the wall time of a stage.'''
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe(self.stage, time.perf_counter() - self.start)
+
+
+def timer(stage):
+    ''' Time a block of code as the given stage: with metrics.timer('format_data'): ...'''
+    if not ENABLED:
+        return _null_timer
+    return Timer(stage)
+
+
+def observe(stage, seconds):
+    with _lock:
+        timing = _timings.setdefault(stage, [0, 0.0, 0.0, 0.0])
+        timing[0] += 1
+        timing[1] += seconds
+        timing[2] = max(timing[2], seconds)
+        timing[3] = seconds
+    logger.debug('stage=%s seconds=%.6f', stage, seconds)
+
+
+def increment(name, amount=1, **labels):
+    ''' Add to a counter, e.g. increment('cache_misses', cache='figure').'''
+    if not ENABLED:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def cache_lookup(cache, hit):
+    ''' Count a lookup in one of the caches, and whether it was served from the cache.'''
+    if not ENABLED:
+        return
+    increment('cache_requests', cache=cache)
+    if not hit:
+        increment('cache_misses', cache=cache)
+
+
+def reset():
+    with _lock:
+        _timings.clear()
+        _counters.clear()
+
+
+def stage_rows():
+    ''' Return one {stage, count, total_seconds, mean_seconds, max_seconds, last_seconds} row per stage.'''
+    with _lock:
+        timings = sorted(_timings.items())
+
+    return [{
+        'stage': stage,
+        'count': count,
+        'total_seconds': round(total, 6),
+        'mean_seconds': round(total / count, 6),
+        'max_seconds': round(maximum, 6),
+        'last_seconds': round(last, 6)} for stage, (count, total, maximum, last) in timings]
+
+
+def counter_rows():
+    ''' Return one {name, labels, value} row per counter, including the Datastore transfer counters.'''
+    with _lock:
+        counters = sorted(_counters.items())
+    with datastore.stats_lock:
+        transfer = sorted(datastore.stats.items())
+
+    rows = [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in counters]
+    rows.extend({'name': 'datastore_' + name, 'labels': {}, 'value': value} for name, value in transfer)
+
+    return rows
+
+
+def prometheus_text():
+    ''' Render every measurement in the Prometheus text exposition format (version 0.0.4).'''
+    lines = []
+    stages = stage_rows()
+    if stages:
+        lines.append('# TYPE ' + PREFIX + 'stage_seconds summary')
+        for row in stages:
+            labels = format_labels({'stage': row['stage']})
+            lines.append(PREFIX + 'stage_seconds_count' + labels + ' ' + str(row['count']))
+            lines.append(PREFIX + 'stage_seconds_sum' + labels + ' ' + repr(row['total_seconds']))
+        lines.append('# TYPE ' + PREFIX + 'stage_seconds_max gauge')
+        for row in stages:
+            lines.append(PREFIX + 'stage_seconds_max' + format_labels({'stage': row['stage']}) + ' ' + repr(row['max_seconds']))
+
+    typed = set()
+    for row in counter_rows():
+        name = PREFIX + row['name'] + '_total'
+        if name not in typed:
+            lines.append('# TYPE ' + name + ' counter')
+            typed.add(name)
+        lines.append(name + format_labels(row['labels']) + ' ' + str(row['value']))
+
+    return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(name + '="' + value + '"' for name, value in zip(labels, escaped)) + '}'
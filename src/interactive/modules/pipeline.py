@@ -0,0 +1,133 @@
+''' The dashboard data pipeline, as one module for the Streamlit app, the Django project and batch jobs.
+
+Importing it only loads pandas and the date range helpers: the data modules are
+imported the first time they are used (pipeline.build, pipeline.export, ...), and
+Plotly only once a chart is built through pipeline.figures. Nothing here needs
+Streamlit or Django.
+
+From the command line:
+
+    python -m src.interactive.modules.pipeline build --refresh
+    python -m src.interactive.modules.pipeline recent --date-range 'Last Month'
+    python -m src.interactive.modules.pipeline series --metric New_Total_Cases --start 2021-03-01
+'''
+import os
+import argparse
+import importlib
+
+from src.interactive.modules import query
+
+# Whether series() reads the time-series table that `manage.py ingest` loads, instead of the dataset
+SERIES_FROM_DB = os.environ.get('DASHBOARD_SERIES_FROM_DB', '') not in ('', '0')
+
+# Modules of the pipeline, imported on first attribute access
+LAZY_MODULES = ['build', 'dataset_cache', 'export', 'figures', 'metrics', 'refresher', 'regional', 'resample', 'tables']
+
+
+def __getattr__(name):
+    if name in LAZY_MODULES:
+        module = importlib.import_module('src.interactive.modules.' + name)
+        globals()[name] = module
+        return module
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+
+def build_dataset(refresh=False):
+    ''' Recompute the derived tables and write them to the on-disk cache, see build.build_dataset.'''
+    from src.interactive.modules import build
+
+    return build.build_dataset(refresh=refresh)
+
+
+def current_dataset():
+    ''' Return the current dataset, shared read-only by every caller of this process.'''
+    from src.interactive.modules import dataset_cache
+
+    return dataset_cache.current_dataset()
+
+
+def date_selection(df, date_range, custom_dates=None):
+    ''' Select the rows of a date-indexed table within a sidebar date range.
+
+    Parameters:
+    df: table of the dataset, indexed by date
+    date_range: one of query.DATE_RANGE_OFFSETS or query.CUSTOM_RANGE
+    custom_dates: (start, end) dates picked for query.CUSTOM_RANGE
+    '''
+    start, end = query.date_range_bounds(date_range, df.index[-1], custom_dates)
+
+    return query.select_dates(df, start, end)
+
+
+def selection_key(name, date_range, custom_dates, *args):
+    return (name, date_range, tuple(custom_dates or ())) + args
+
+
+def recent_days(dataset, date_range, custom_dates=None):
+    ''' The "Last 5 days" table of a date range, computed once per process for each range.'''
+    from src.interactive.modules import tables
+
+    return dataset.derived(
+        selection_key('recent_days', date_range, custom_dates),
+        lambda: tables.recent_days(date_selection(dataset['summary'], date_range, custom_dates)))
+
+
+def series(dataset, metric, start=None, end=None):
+    ''' One metric between two dates (inclusive), as a Series indexed by date.
+
+    With SERIES_FROM_DB it is an indexed query of the time-series table (see
+    timeseries_db.read_series), which holds the dataset last ingested rather than
+    the given one.
+
+    Parameters:
+    dataset: dataset from current_dataset
+    metric: one of export.available_metrics
+    start: first date to include, None for no lower bound
+    end: last date to include, None for no upper bound
+    '''
+    if SERIES_FROM_DB:
+        from src.interactive.modules import timeseries_db
+
+        return timeseries_db.read_series(metric, start, end)
+
+    from src.interactive.modules import export
+
+    table = export.available_metrics(dataset)[metric]
+    selected = query.select_dates(dataset[table], start, end)
+
+    return selected[metric].astype('float64').rename(metric)
+
+
+def regional_series(dataset, phus, date_range, custom_dates=None):
+    ''' The daily series summed over some PHUs within a date range, computed once per process for each selection.'''
+    from src.interactive.modules import regional
+
+    return dataset.derived(
+        selection_key('regions', date_range, custom_dates, tuple(phus)),
+        lambda: regional.select_regions(
+            date_selection(dataset['regional'], date_range, custom_dates), phus))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command')
+    build_parser = commands.add_parser('build', help='rebuild the dataset in the on-disk cache')
+    build_parser.add_argument('--refresh', action='store_true', help='sync with the Datastore API even if the local copy is fresh')
+    recent_parser = commands.add_parser('recent', help='print the "Last 5 days" table')
+    recent_parser.add_argument('--date-range', choices=list(query.DATE_RANGE_OFFSETS), default='All Weeks')
+    series_parser = commands.add_parser('series', help='print one metric over a date range')
+    series_parser.add_argument('--metric', required=True)
+    series_parser.add_argument('--start', help='first date to include (YYYY-MM-DD)')
+    series_parser.add_argument('--end', help='last date to include (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        print(build_dataset(refresh=args.refresh))
+    elif args.command == 'recent':
+        print(recent_days(current_dataset(), args.date_range).to_string())
+    elif args.command == 'series':
+        # Reading the time-series table needs no dataset
+        dataset = None if SERIES_FROM_DB else current_dataset()
+        print(series(dataset, args.metric, args.start, args.end).to_string())
+    else:
+        parser.print_help()
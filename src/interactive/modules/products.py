@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from collections.abc import Mapping
+
+from src.interactive.modules import metrics
+
+# Results of derived() kept per dataset, least recently used dropped first
+MAX_DERIVED = 256
+
+
+class Dataset(Mapping):
+    ''' Read-only mapping of the data products of one dataset version, each computed on first use.
+
+    A page only pays for the products it reads: dataset['variants'] is loaded the first
+    time some page asks for it, then served from memory to every later caller, across
+    threads. Iterating over the mapping (e.g. dict(dataset)) computes every product.
+
+    Parameters:
+    loaders: {name: function(dataset)} computing each lazy product, which may read other products
+    values: products known up front, e.g. the version
+    '''
+
+    def __init__(self, loaders, **values):
+        self.loaders = dict(loaders)
+        self.values = values
+        self.derived_values = OrderedDict()
+        # {key: Future} of the derived results being computed
+        self.derived_pending = {}
+        # Reentrant, as a product may be computed from other products
+        self.lock = threading.RLock()
+
+    def __getitem__(self, name):
+        try:
+            return self.values[name]
+        except KeyError:
+            pass
+        loader = self.loaders[name]
+        with self.lock:
+            if name not in self.values:
+                with metrics.timer('product_' + name):
+                    self.values[name] = loader(self)
+            return self.values[name]
+
+    def __iter__(self):
+        return iter(list(self.values) + [name for name in self.loaders if name not in self.values])
+
+    def __len__(self):
+        return len(set(self.values) | set(self.loaders))
+
+    def computed(self):
+        ''' Return the names of the products available without computing anything.'''
+        return set(self.values)
+
+    def derived(self, key, compute):
+        ''' Return a result derived from this dataset, computed once per process for each key.
+
+        For selections that depend on widget values, e.g. the series of some PHUs over a
+        date range: every session asking for the same key shares one read-only result.
+
+        Parameters:
+        key: hashable description of the result, e.g. ('regions', phus, start, end)
+        compute: function without arguments computing the result
+
+        Sessions asking for a key while it is being computed wait for that computation
+        (and get its exception, if it fails) rather than starting their own.
+        '''
+        with self.lock:
+            if key in self.derived_values:
+                self.derived_values.move_to_end(key)
+                metrics.cache_lookup('derived', True)
+                return self.derived_values[key]
+            pending = self.derived_pending.get(key)
+            if pending is None:
+                future = self.derived_pending[key] = Future()
+        metrics.cache_lookup('derived', pending is not None)
+        if pending is not None:
+            return pending.result()
+
+        # Computed outside the lock, so sessions asking for other keys are not held up
+        try:
+            value = compute()
+        except BaseException as error:
+            with self.lock:
+                del self.derived_pending[key]
+            future.set_exception(error)
+            raise
+        with self.lock:
+            del self.derived_pending[key]
+            self.derived_values[key] = value
+            while len(self.derived_values) > MAX_DERIVED:
+                self.derived_values.popitem(last=False)
+        future.set_result(value)
+
+        return value
@@ -0,0 +1,55 @@
+import pandas as pd
+
+# Calendar length of each date range in the sidebar ('All Weeks' has no bound)
+DATE_RANGE_OFFSETS = {
+    'All Weeks': None,
+    'Last Week': pd.DateOffset(weeks=1),
+    'Last 2 weeks': pd.DateOffset(weeks=2),
+    'Last Month': pd.DateOffset(months=1),
+    'Last 3 Months': pd.DateOffset(months=3),
+    'Last 6 Months': pd.DateOffset(months=6),
+}
+
+# Sidebar option for picking the start and end dates by hand
+CUSTOM_RANGE = 'Custom range'
+
+
+def date_range_bounds(date_range, latest, custom_dates=None):
+    ''' Turn a sidebar date range into inclusive (start, end) dates.
+
+    Parameters:
+    date_range: one of DATE_RANGE_OFFSETS or CUSTOM_RANGE
+    latest: most recent date in the data; calendar ranges end on it
+    custom_dates: (start, end) picked in the sidebar when date_range is CUSTOM_RANGE,
+    either end may be missing while the user is still picking
+    '''
+    if date_range == CUSTOM_RANGE:
+        custom_dates = tuple(custom_dates or ())
+        start = custom_dates[0] if len(custom_dates) > 0 else None
+        end = custom_dates[1] if len(custom_dates) > 1 else None
+        return start, end
+
+    offset = DATE_RANGE_OFFSETS[date_range]
+    if offset is None:
+        return None, None
+
+    latest = pd.Timestamp(latest)
+    return latest - offset + pd.Timedelta(days=1), latest
+
+
+def select_dates(df, start=None, end=None):
+    ''' Select the rows of a frame between two dates (inclusive).
+
+    The frame must have a sorted DatetimeIndex: the boundaries are found by binary
+    search and the rows are returned as a positional slice, which pandas serves as
+    a view of the frame instead of a copy.
+
+    Parameters:
+    df: DataFrame with a sorted DatetimeIndex
+    start: first date to include, None for no lower bound
+    end: last date to include, None for no upper bound
+    '''
+    first = 0 if start is None else df.index.searchsorted(pd.Timestamp(start), side='left')
+    last = len(df) if end is None else df.index.searchsorted(pd.Timestamp(end), side='right')
+
+    return df.iloc[first:last]
@@ -0,0 +1,103 @@
+''' Background refresher that keeps the derived tables up to date before users ask for them.
+
+It polls the CKAN metadata of every resource and only syncs and rebuilds when a
+resource's modification timestamp (see datastore.last_modified) has moved. New tables are swapped in atomically
+by the on-disk cache, so page views never wait on the network.
+
+Run it next to the app on the same host (it needs to share ONTARIO_CACHE_DIR):
+
+    python -m src.interactive.modules.refresher
+
+or in-process by setting ONTARIO_BACKGROUND_REFRESH=1 for the Streamlit app.
+'''
+import os
+import json
+import time
+import logging
+import threading
+
+from src.interactive.modules import build, colstore, datastore, regional
+
+# Seconds between two polls of the resource metadata
+REFRESH_INTERVAL = int(os.environ.get('ONTARIO_REFRESH_INTERVAL', 900))
+
+# Whether the Streamlit app starts the refresher in a background thread
+BACKGROUND_REFRESH = os.environ.get('ONTARIO_BACKGROUND_REFRESH', '') not in ('', '0')
+
+logger = logging.getLogger(__name__)
+
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def state_path():
+    return os.path.join(colstore.CACHE_DIR, 'refresher.json')
+
+
+def read_state():
+    ''' Read the last_modified timestamps seen at the last rebuild.'''
+    try:
+        with open(state_path()) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def write_state(state):
+    os.makedirs(colstore.CACHE_DIR, exist_ok=True)
+    tmp_path = state_path() + '.' + str(os.getpid())
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path())
+
+
+def upstream_state():
+    ''' Request the modification timestamp of every resource.'''
+    return {type: datastore.last_modified(resource_id) for type, resource_id in datastore.RESOURCE_IDS.items()}
+
+
+def refresh_once():
+    ''' Rebuild the derived tables if upstream changed since the last rebuild.
+
+    Returns True if the tables were rebuilt. The regional table, when enabled, is
+    checked and rebuilt afterwards, on its own: its failures are logged and never
+    hold back the other tables.
+    '''
+    state = upstream_state()
+    rebuilt = state != read_state() or build.current_version() is None
+    if rebuilt:
+        version = build.build_dataset(refresh=True)
+        write_state(state)
+        logger.info('Rebuilt dataset version %s', version)
+
+    if regional.ENABLED:
+        try:
+            regional.refresh()
+        except Exception:
+            logger.exception('Refreshing the regional table failed, retrying at the next poll')
+
+    return rebuilt
+
+
+def run_forever(interval=REFRESH_INTERVAL):
+    ''' Poll upstream every interval seconds, never letting a failed poll stop the loop.'''
+    while True:
+        try:
+            refresh_once()
+        except Exception:
+            logger.exception('Refreshing the dataset failed, retrying in %d seconds', interval)
+        time.sleep(interval)
+
+
+def start():
+    ''' Start the refresher in a daemon thread, once per process.'''
+    global _thread
+    with _thread_lock:
+        if _thread is None:
+            _thread = threading.Thread(target=run_forever, name='dataset-refresher', daemon=True)
+            _thread.start()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    run_forever()
@@ -0,0 +1,157 @@
+''' Daily COVID-19 series per public health unit (PHU), aggregated from the per-case dataset.
+
+The case-level resource has millions of rows, so it is never loaded whole: its pages
+are streamed a few at a time, only the columns needed are requested, and each page
+is reduced to per-PHU daily counts before the next one arrives. Memory stays bounded
+by the page size and the number of PHUs and days, whatever the size of the source.
+The compact result is written to the on-disk cache as the 'regional' table.
+
+Turned on for the refresher with ONTARIO_REGIONAL=1, or built by hand with
+
+    python -m src.interactive.modules.regional
+'''
+import os
+import logging
+
+import pandas as pd
+
+from src.interactive.modules import colstore, datastore, metrics
+
+# Whether the refresher also keeps the regional table up to date
+ENABLED = os.environ.get('ONTARIO_REGIONAL', '') not in ('', '0')
+
+# Confirmed positive cases of COVID-19 in Ontario, one record per case
+CASES_RESOURCE_ID = '455fd63b-603d-4608-8216-7d8647f43350'
+
+# Columns of the case records the aggregation needs
+CASE_COLUMNS = ['Case_Reported_Date', 'Reporting_PHU_ID', 'Reporting_PHU', 'Outcome1']
+
+# Records per request (the Datastore API caps a page at 32,000 records)
+PAGE_SIZE = 32000
+
+# Partial aggregates kept before they are merged, bounding memory between merges
+MERGE_EVERY = 16
+
+# Name of the derived table in the on-disk cache
+REGIONAL_ARTIFACT = 'regional'
+
+# Daily count columns, by case outcome (None counts every case)
+OUTCOME_COLUMNS = {
+    'New_cases': None,
+    'New_resolved': 'Resolved',
+    'New_deaths': 'Fatal',
+}
+
+# Bar charts of the selected PHUs on the Cases page, as (column, title)
+REGIONAL_CHARTS = [
+    ('New_cases', 'New cases'),
+    ('Total_cases', 'Total cases'),
+    ('New_resolved', 'Resolved cases, by reported date'),
+    ('New_deaths', 'Fatal cases, by reported date'),
+]
+
+logger = logging.getLogger(__name__)
+
+
+def aggregate_page(columns):
+    ''' Count the cases of one page per day, PHU and outcome.
+
+    Parameters:
+    columns: column arrays of a page, as returned by datastore.stream_page
+
+    Returns a Series of counts indexed by (Date, PHU_ID, PHU, Outcome).
+    '''
+    cases = pd.DataFrame({
+        'Date': pd.to_datetime(columns['Case_Reported_Date']).normalize(),
+        'PHU_ID': pd.Series(columns['Reporting_PHU_ID']).fillna(0).astype('int32'),
+        'PHU': pd.Series(columns['Reporting_PHU']).fillna('Unknown').astype('str'),
+        'Outcome': pd.Series(columns['Outcome1']).fillna('').astype('str')})
+
+    return cases.groupby(['Date', 'PHU_ID', 'PHU', 'Outcome'], sort=False).size()
+
+
+def merge_counts(counts):
+    return pd.concat(counts).groupby(level=[0, 1, 2, 3], sort=False).sum()
+
+
+def counts_to_series(counts):
+    ''' Turn (Date, PHU_ID, PHU, Outcome) counts into one row per PHU and day, with a
+    column of new cases per outcome and the running total of cases, sorted by date.
+
+    Every PHU gets a row for every day, so totals summed over PHUs have no gaps.
+    '''
+    by_outcome = counts.unstack('Outcome', fill_value=0).groupby(level=[0, 1, 2]).sum()
+    dates = by_outcome.index.get_level_values('Date')
+    phus = by_outcome.index.droplevel('Date').unique()
+    days = pd.date_range(dates.min(), dates.max(), freq='D', name='Date')
+    grid = pd.MultiIndex.from_tuples([(day,) + phu for day in days for phu in phus], names=by_outcome.index.names)
+    by_outcome = by_outcome.reindex(grid, fill_value=0)
+
+    regional = pd.DataFrame(index=by_outcome.index)
+    for column, outcome in OUTCOME_COLUMNS.items():
+        if outcome is None:
+            regional[column] = by_outcome.sum(axis=1)
+        else:
+            regional[column] = by_outcome[outcome] if outcome in by_outcome.columns else 0
+    regional = regional.astype('int32').reset_index().sort_values(['Date', 'PHU_ID'], kind='mergesort')
+    regional['Total_cases'] = regional.groupby('PHU_ID')['New_cases'].cumsum().astype('int32')
+
+    return regional.set_index(pd.DatetimeIndex(regional['Date']).rename(None))
+
+
+def build_regional(last_modified=None):
+    ''' Stream the case-level resource, aggregate it per PHU and day and cache the result.
+
+    Returns the version of the regional table.
+    '''
+    counts = []
+    rows = 0
+    with metrics.timer('build_regional'):
+        for page in datastore.iter_pages(CASES_RESOURCE_ID, PAGE_SIZE, columns=CASE_COLUMNS):
+            if page['count']:
+                counts.append(aggregate_page(page['columns']))
+            rows += page['count']
+            if len(counts) >= MERGE_EVERY:
+                counts = [merge_counts(counts)]
+        regional = counts_to_series(merge_counts(counts)) if counts else pd.DataFrame(
+            columns=['Date', 'PHU_ID', 'PHU'] + list(OUTCOME_COLUMNS) + ['Total_cases'])
+
+        version = colstore.write_frame(REGIONAL_ARTIFACT, regional, {'source_rows': rows, 'last_modified': last_modified})
+    logger.info('Aggregated %d cases into %d regional rows', rows, len(regional))
+
+    return version
+
+
+def refresh(force=False):
+    ''' Rebuild the regional table if the case-level resource changed since it was built.
+
+    Returns True if it was rebuilt.
+    '''
+    last_modified = datastore.last_modified(CASES_RESOURCE_ID)
+    meta = colstore.read_meta(REGIONAL_ARTIFACT)
+    if not force and meta is not None and last_modified is not None and meta.get('last_modified') == last_modified:
+        return False
+
+    build_regional(last_modified)
+
+    return True
+
+
+def select_regions(regional, phus):
+    ''' Sum the daily series of the given PHUs into one row per day, indexed by date.
+
+    Parameters:
+    regional: regional table (or a date selection of it)
+    phus: names of the PHUs to include
+    '''
+    selected = regional[regional['PHU'].isin(phus)]
+    columns = list(OUTCOME_COLUMNS) + ['Total_cases']
+    series = selected.groupby(level=0, sort=True)[columns].sum()
+    series.insert(0, 'Date', series.index)
+
+    return series
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    refresh(force=True)
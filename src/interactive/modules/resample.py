@@ -0,0 +1,125 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Charts with more points than this are aggregated to a coarser resolution
+MAX_POINTS = int(os.environ.get('CHART_MAX_POINTS', 365))
+
+# Chart resolutions, with the bucket each one aggregates to
+AUTO = 'Auto'
+RESOLUTIONS = {
+    'Daily': None,
+    'Weekly': pd.offsets.Week(weekday=6),
+    'Monthly': pd.offsets.MonthEnd(),
+}
+
+# Stock columns holding a level (people in hospital, active cases) rather than a running total:
+# a bucket shows its peak. Other stocks show their value at the end of the bucket.
+PEAK_COLUMNS = ['Active_Cases', 'Number_hospitalized', 'Number_ICU', 'Number_ventilator']
+
+
+def aggregation_for(column):
+    ''' Return how a column is aggregated into a bucket.
+
+    Flows (daily counts) are summed, rates and rolling averages are averaged, levels
+    keep their peak and running totals keep their last value.
+    '''
+    if column.endswith('_7day_avg'):
+        return 'mean'
+    if column.startswith(('New_', 'previous_day_')):
+        return 'sum'
+    if column.startswith('Percent'):
+        return 'mean'
+    if column in PEAK_COLUMNS:
+        return 'max'
+    return 'last'
+
+
+def choose_resolution(points, resolution=AUTO, max_points=MAX_POINTS):
+    ''' Pick the finest resolution that keeps a chart of daily points under max_points.
+
+    Parameters:
+    points: number of daily points in the chart
+    resolution: AUTO or one of RESOLUTIONS to force it
+    max_points: point-count threshold for AUTO
+    '''
+    if resolution != AUTO:
+        return resolution
+    if points <= max_points:
+        return 'Daily'
+    if points / 7 <= max_points:
+        return 'Weekly'
+    return 'Monthly'
+
+
+def aggregate(df, x, y, resolution):
+    ''' Aggregate one column of a daily frame into buckets.
+
+    Parameters:
+    df: DataFrame with one row per day
+    x: column with the dates
+    y: column to aggregate, see aggregation_for
+    resolution: one of RESOLUTIONS
+
+    Returns a DataFrame with the x and y columns, one row per bucket.
+    '''
+    bucket = RESOLUTIONS[resolution]
+    if bucket is None:
+        return df[[x, y]]
+
+    series = pd.Series(df[y].to_numpy(), index=pd.DatetimeIndex(df[x]))
+    aggregated = series.resample(bucket).agg(aggregation_for(y))
+
+    return pd.DataFrame({x: aggregated.index, y: aggregated.to_numpy()})
+
+
+def lttb(x, y, threshold):
+    ''' Downsample a line to threshold points with Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept; from each bucket in between, the point forming
+    the largest triangle with the previously kept point and the mean of the next bucket
+    is kept, which preserves the visual shape of the line.
+
+    Parameters:
+    x: sorted array of x values (dates are compared as integers)
+    y: array of y values
+    threshold: number of points to keep
+
+    Returns the indices of the kept points.
+    '''
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x).astype('int64' if np.asarray(x).dtype.kind == 'M' else 'float64').astype('float64')
+    y = np.asarray(y, dtype='float64')
+
+    # Bucket boundaries for every point but the first and last
+    edges = np.linspace(1, n - 1, threshold - 1).astype('int64')
+    kept = np.empty(threshold, dtype='int64')
+    kept[0] = 0
+    kept[-1] = n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean() if next_end > end else x[-1]
+        next_y = y[end:next_end].mean() if next_end > end else y[-1]
+
+        # Twice the triangle areas between the previous point, each candidate and the next bucket mean
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        kept[i + 1] = previous
+
+    return kept
+
+
+def downsample_line(df, x, y, max_points=MAX_POINTS):
+    ''' Keep at most max_points rows of a frame for a line chart of y against x, using LTTB.'''
+    if len(df) <= max_points:
+        return df[[x, y]]
+
+    return df[[x, y]].iloc[lttb(df[x].to_numpy(), df[y].to_numpy(), max_points)]
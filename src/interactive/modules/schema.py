@@ -0,0 +1,139 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from pandas.errors import OutOfBoundsDatetime
+
+# Bump when a schema changes, so copies ingested with the old one are reloaded
+SCHEMA_VERSION = 1
+
+# Format of the timestamps sent by the Datastore API
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+# Declared dtype of every column of the COVID-19 status resource
+COVID_SCHEMA = {
+    '_id': 'int32',
+    'Reported Date': 'datetime64[ns]',
+    'Confirmed Negative': 'int32',
+    'Presumptive Negative': 'int32',
+    'Presumptive Positive': 'int32',
+    'Confirmed Positive': 'int32',
+    'Resolved': 'int32',
+    'Deaths': 'int32',
+    'Total Cases': 'int32',
+    'Total patients approved for testing as of Reporting Date': 'int32',
+    'Total tests completed in the last day': 'int32',
+    'Percent positive tests in last day': 'float32',
+    'Under Investigation': 'int32',
+    'Number of patients hospitalized with COVID-19': 'int32',
+    'Number of patients in ICU due to COVID-19': 'int32',
+    'Number of patients in ICU on a ventilator with COVID-19': 'int32',
+    'Total Positive LTC Resident Cases': 'int32',
+    'Total Positive LTC HCW Cases': 'int32',
+    'Total LTC Resident Deaths': 'int32',
+    'Total LTC HCW Deaths': 'int32',
+    'Total_Lineage_B.1.1.7_Alpha': 'int32',
+    'Total_Lineage_B.1.351_Beta': 'int32',
+    'Total_Lineage_P.1_Gamma': 'int32',
+}
+
+# Declared dtype of every column of the vaccine doses resource
+VACCINE_SCHEMA = {
+    '_id': 'int32',
+    'report_date': 'datetime64[ns]',
+    'previous_day_total_doses_administered': 'int32',
+    'previous_day_at_least_one': 'int32',
+    'previous_day_fully_vaccinated': 'int32',
+    'total_doses_administered': 'int32',
+    'total_individuals_at_least_one': 'int32',
+    'total_individuals_partially_vaccinated': 'int32',
+    'total_doses_in_fully_vaccinated_individuals': 'int32',
+    'total_individuals_fully_vaccinated': 'int32',
+}
+
+SCHEMAS = {
+    'COVID': COVID_SCHEMA,
+    'Vaccine': VACCINE_SCHEMA,
+}
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaDriftError(ValueError):
+    ''' Raised when upstream data no longer fits the declared schema.'''
+
+
+def check_fields(fields, schema):
+    ''' Compare the fields sent by the Datastore API with a declared schema.
+
+    Missing columns raise SchemaDriftError; columns the schema does not know about
+    are logged and loaded with the dtypes inferred from their CKAN type.
+    '''
+    names = [field['id'] for field in fields]
+    missing = [name for name in schema if name not in names]
+    if missing:
+        raise SchemaDriftError('Columns missing upstream: ' + ', '.join(missing))
+    unexpected = [name for name in names if name not in schema]
+    if unexpected:
+        logger.warning('Columns not in the declared schema: %s', ', '.join(unexpected))
+
+
+def check_numeric(rejected):
+    ''' Raise SchemaDriftError if numeric columns held values that are not numbers.
+
+    Parameters:
+    rejected: {column: number of its values that could not be read as a number}
+    '''
+    rejected = {name: count for name, count in rejected.items() if count}
+    if rejected:
+        raise SchemaDriftError('Values that are not numbers in ' + ', '.join(
+            '%s (%d)' % (name, count) for name, count in rejected.items()))
+
+
+def parse_dates(values):
+    ''' Parse timestamps in the Datastore format, or in any format pandas recognizes.'''
+    try:
+        return pd.to_datetime(values, format=DATE_FORMAT)
+    except OutOfBoundsDatetime:
+        raise
+    except ValueError:
+        return pd.to_datetime(values)
+
+
+def convert_column(name, values, dtype):
+    ''' Convert the raw values of one column to its declared dtype.
+
+    Missing values become 0 in integer columns and NaN in float columns; values
+    that are not numbers, and dates outside the range of datetime64[ns], raise
+    SchemaDriftError rather than going missing or wrapping around.
+
+    Parameters:
+    name: column name, for error messages
+    values: list of values as decoded from JSON
+    dtype: declared dtype of the column
+    '''
+    if dtype.startswith('datetime64'):
+        try:
+            dates = parse_dates(values)
+        except OutOfBoundsDatetime:
+            dates = None
+        # Converting dates outside the range of the dtype would wrap them around silently
+        if dates is None or (len(dates) and (dates.min() < pd.Timestamp.min or dates.max() > pd.Timestamp.max)):
+            raise SchemaDriftError('Dates of ' + name + ' no longer fit in ' + dtype)
+        return dates.to_numpy(dtype)
+
+    try:
+        array = np.array(values, dtype='float64')
+    except (TypeError, ValueError):
+        # Numbers sent as text - let pandas coerce them, and count what it cannot read
+        series = pd.Series(values, dtype='object')
+        array = pd.to_numeric(series, errors='coerce').to_numpy('float64')
+        check_numeric({name: int((series.notna().to_numpy() & np.isnan(array)).sum())})
+
+    if np.dtype(dtype).kind == 'i':
+        array = np.nan_to_num(array, nan=0)
+        limits = np.iinfo(dtype)
+        if len(array) and (array.min() < limits.min or array.max() > limits.max):
+            raise SchemaDriftError('Values of ' + name + ' no longer fit in ' + dtype)
+
+    return array.astype(dtype)
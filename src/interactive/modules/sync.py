@@ -0,0 +1,114 @@
+import os
+import logging
+
+import pandas as pd
+
+from src.interactive.modules import colstore, datastore
+from src.interactive.modules.schema import SCHEMA_VERSION
+
+# Whether the resource metadata last_modified is checked before any records are requested
+METADATA_PROBE = os.environ.get('ONTARIO_METADATA_PROBE', '1') not in ('', '0')
+
+logger = logging.getLogger(__name__)
+
+
+def local_copy_name(resource_id):
+    return 'raw-' + resource_id
+
+
+def read_local_copy(resource_id):
+    ''' Read the persisted copy of a resource as (DataFrame, metadata), or None if there is none yet.'''
+    return colstore.read_frame(local_copy_name(resource_id))
+
+
+def write_local_copy(resource_id, df, meta):
+    ''' Persist a resource copy with the metadata used to skip or validate the next sync:
+
+    content: upstream digests of the copy ({'last_id', 'digest'}), see datastore.content_digests;
+        None where the Datastore does not allow SQL queries
+    last_modified: the resource metadata timestamp when the copy was taken
+    validators: ETag/Last-Modified of the last digest request and its last_id, for a conditional
+        request next time
+    '''
+    colstore.write_frame(local_copy_name(resource_id), df, dict(meta, schema_version=SCHEMA_VERSION))
+
+
+def upstream_last_modified(resource_id):
+    ''' Return the resource modification timestamp (see datastore.last_modified), or None if the probe is disabled.'''
+    if not METADATA_PROBE:
+        return None
+    return datastore.last_modified(resource_id)
+
+
+def full_reload(resource_id, last_modified=None):
+    ''' Download every record of a resource and persist it as the new local copy.'''
+    # Digests first: a row revised during the download then only causes another reload
+    try:
+        digests, _ = datastore.content_digests(resource_id)
+    except IOError:
+        logger.warning('No content digests for resource %s, every change reloads it whole', resource_id)
+        digests = None
+    df = datastore.fetch_resource(resource_id)
+    write_local_copy(resource_id, df, {'content': content_meta(digests), 'last_modified': last_modified})
+
+    return df
+
+
+def content_meta(digests):
+    if digests is None:
+        return None
+    return {'last_id': digests['last_id'], 'digest': digests['digest']}
+
+
+def sync_resource(resource_id):
+    ''' Bring the local copy of a resource up to date and return it.
+
+    If the resource metadata says nothing changed since the copy was taken, no records
+    are requested at all. Otherwise the Datastore is asked for digests of the resource
+    content (see datastore.content_digests), conditionally if it was asked the same last
+    time. If the rows already ingested no longer hash to what they hashed to then, or the
+    resource shrank, upstream has revised its history and the whole resource is downloaded
+    again; if rows were only added, just the records after the ingested ones are requested.
+    Where the digests are not available every change is a full reload.
+
+    Parameters:
+    resource_id: Datastore resource ID
+    '''
+    last_modified = upstream_last_modified(resource_id)
+    local = read_local_copy(resource_id)
+    if local is None or not len(local[0]) or local[1].get('schema_version') != SCHEMA_VERSION:
+        return full_reload(resource_id, last_modified)
+
+    df, meta = local
+    if last_modified is not None and last_modified == meta.get('last_modified'):
+        # Upstream has not changed since the copy was taken
+        return df
+
+    content = meta.get('content')
+    if content is None:
+        return full_reload(resource_id, last_modified)
+
+    # Conditional request: a 304 means the content did not change since the last sync
+    validators = meta.get('validators') if meta.get('validators', {}).get('last_id') == content['last_id'] else None
+    try:
+        digests, validators = datastore.content_digests(resource_id, content['last_id'], validators)
+    except IOError:
+        return full_reload(resource_id, last_modified)
+    validators = dict(validators or {}, last_id=content['last_id'])
+
+    if digests is None or digests['digest'] == content['digest']:
+        # Nothing changed upstream: only remember what makes the next check cheaper
+        updated_meta = dict(meta, last_modified=last_modified, validators=validators)
+        if updated_meta != meta:
+            write_local_copy(resource_id, df, updated_meta)
+        return df
+
+    if digests['rows'] < len(df) or digests['known_digest'] != content['digest']:
+        # Rows already ingested were revised or deleted
+        return full_reload(resource_id, last_modified)
+
+    new_rows = datastore.fetch_resource(resource_id, start=len(df))
+    df = pd.concat([df, new_rows], ignore_index=True)
+    write_local_copy(resource_id, df, {'content': content_meta(digests), 'last_modified': last_modified})
+
+    return df
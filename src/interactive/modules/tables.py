@@ -0,0 +1,55 @@
+import math
+
+import pandas as pd
+
+# Columns of the "Last 5 days" table, as (column, header)
+RECENT_DAYS_COLUMNS = [
+    ('Total_Cases', 'Cases'),
+    ('Resolved', 'Resolved cases'),
+    ('Active_Cases', 'Active cases'),
+    ('Deaths', 'Deaths'),
+    ('Number_hospitalized', 'Hospitalizations'),
+    ('Number_ICU', 'ICU patients'),
+    ('Total_tests_completed', 'Tests conducted'),
+    ('Percent_positive_tests', '% positive tests'),
+]
+
+# Rows per page of the raw data views
+PAGE_SIZE = 50
+
+
+def recent_days(summary_data, days=5):
+    ''' Build the "Last 5 days" table as one pre-formatted frame, newest day first.
+
+    Whole columns are formatted at once, so the table is sent to the browser as a
+    single element instead of one element per cell.
+
+    Parameters:
+    summary_data: summary DataFrame (or a date selection of it)
+    days: number of days to show
+    '''
+    rows = summary_data.iloc[::-1][:days]
+    table = pd.DataFrame(index=pd.Index(rows['Date'].dt.strftime('%Y-%m-%d').to_numpy(), name='Date'))
+    for column, header in RECENT_DAYS_COLUMNS:
+        values = rows[column]
+        if values.dtype.kind == 'f':
+            table[header] = values.round(2).astype('str').to_numpy()
+        else:
+            table[header] = values.map('{:,}'.format).to_numpy()
+
+    return table
+
+
+def page_count(rows, page_size=PAGE_SIZE):
+    return max(1, math.ceil(rows / page_size))
+
+
+def page(df, number, page_size=PAGE_SIZE):
+    ''' Return one page of a frame, numbered from 1, with the row positions as its index.
+
+    Only this slice is serialized when it is displayed, whatever the size of the frame.
+    '''
+    start = (int(number) - 1) * page_size
+    rows = df.iloc[start:start + page_size]
+
+    return rows.set_axis(pd.RangeIndex(start, start + len(rows)), axis=0)
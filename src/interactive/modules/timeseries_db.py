@@ -0,0 +1,73 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+# SQLite database of the Django project, where `manage.py ingest` stores the series
+DB_PATH = os.environ.get('ONTARIO_DB_PATH', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'covid19_dashboard', 'db.sqlite3'))
+
+# Table of the dashboard.Observation model: one (metric, date, value) row per metric and day
+TABLE = 'dashboard_observation'
+
+
+def frame_rows(df, date_column, source):
+    ''' Turn every metric column of a daily frame into (source, metric, date, value) rows.
+
+    Parameters:
+    df: DataFrame with one row per day
+    date_column: column with the dates
+    source: name of the table the frame comes from
+    '''
+    metrics = [column for column in df.columns if column != date_column]
+    dates = pd.DatetimeIndex(df[date_column]).strftime('%Y-%m-%d').to_numpy()
+    # Column-major so each metric's rows are contiguous
+    values = df[metrics].to_numpy('float64').T.ravel()
+
+    return list(zip(
+        [source] * len(values),
+        np.repeat(metrics, len(dates)).tolist(),
+        np.tile(dates, len(metrics)).tolist(),
+        values.tolist()))
+
+
+def observation_rows(dataset):
+    ''' Rows of every summary and vaccine metric of a dataset from build.load_dataset.'''
+    vaccine = dataset['vaccine'].drop(columns=['_id'])
+
+    return frame_rows(dataset['summary'], 'Date', 'COVID') + frame_rows(vaccine, 'report_date', 'Vaccine')
+
+
+def metric_names(dataset):
+    ''' Names of the metrics observation_rows stores for a dataset.'''
+    return ([column for column in dataset['summary'].columns if column != 'Date']
+            + [column for column in dataset['vaccine'].columns if column not in ('_id', 'report_date')])
+
+
+def read_series(metric, start=None, end=None, path=None):
+    ''' Read one metric between two dates (inclusive) from the time-series table, without Django.
+
+    The query is answered from the (metric, date, value) covering index.
+
+    Parameters:
+    metric: metric name, see metric_names
+    start: first date to include, None for no lower bound
+    end: last date to include, None for no upper bound
+    path: database path, defaults to DB_PATH
+
+    Returns a Series indexed by date, empty before the first ingest.
+    '''
+    connection = sqlite3.connect('file:' + os.path.abspath(path or DB_PATH) + '?mode=ro', uri=True)
+    try:
+        rows = connection.execute(
+            'SELECT date, value FROM ' + TABLE + ' WHERE metric = ? AND date >= ? AND date <= ? ORDER BY date',
+            (metric,
+             '0000-00-00' if start is None else pd.Timestamp(start).strftime('%Y-%m-%d'),
+             '9999-99-99' if end is None else pd.Timestamp(end).strftime('%Y-%m-%d'))).fetchall()
+    finally:
+        connection.close()
+
+    dates, values = zip(*rows) if rows else ((), ())
+
+    return pd.Series(values, index=pd.DatetimeIndex(dates), name=metric, dtype='float64')
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import pytest
+
+from benchmarks.stub_datastore import start_server
+from src.interactive.modules import colstore, dataset_cache, datastore
+
+# Directory of the Django project
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'covid19_dashboard')
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    ''' An empty on-disk cache for the test.'''
+    monkeypatch.setattr(colstore, 'CACHE_DIR', str(tmp_path / 'cache'))
+    return tmp_path / 'cache'
+
+
+@pytest.fixture
+def stub_datastore(monkeypatch):
+    ''' Start a stub Datastore server and point the loader at it.
+
+    Returns a function taking the numbers of records to serve (see
+    benchmarks.stub_datastore.start_server) and returning the server.
+    '''
+    servers = []
+
+    def start(rows=1000, case_rows=0):
+        server = start_server(rows, case_rows=case_rows)
+        servers.append(server)
+        monkeypatch.setattr(datastore, 'DATASTORE_URL', server.api_url)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+@pytest.fixture(scope='session')
+def django_project(tmp_path_factory):
+    ''' The Django project, set up like manage.py test does, on a migrated SQLite database of its own.
+
+    Returns the path of the database file.
+    '''
+    import django
+    from django.db import connections
+    from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+    sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'covid19_dashboard.settings')
+    django.setup()
+    path = str(tmp_path_factory.mktemp('django') / 'db.sqlite3')
+    connections['default'].settings_dict['TEST']['NAME'] = path
+    setup_test_environment()
+    databases = setup_databases(verbosity=0, interactive=False)
+    yield path
+    teardown_databases(databases, verbosity=0)
+    teardown_test_environment()
+
+
+@pytest.fixture
+def api(django_project, stub_datastore, cache_dir, monkeypatch):
+    ''' A django.test.Client of the API, serving a dataset built from the stub Datastore,
+    with an empty time-series table.'''
+    from django.test import Client
+    from dashboard.models import IngestedDataset, Observation
+
+    stub_datastore(rows=200)
+    monkeypatch.setattr(dataset_cache, '_current', {})
+    Observation.objects.all().delete()
+    IngestedDataset.objects.all().delete()
+
+    return Client()
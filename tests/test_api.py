@@ -0,0 +1,61 @@
+import pytest
+
+from src.interactive.modules import pipeline
+
+
+def test_summary(api):
+    response = api.get('/api/summary')
+
+    assert response.status_code == 200
+    assert response.json()['version'] == pipeline.current_dataset()['version']
+
+
+def test_series_is_cacheable(api):
+    response = api.get('/api/series', {'metric': 'New_Total_Cases', 'resolution': 'daily'})
+    body = response.json()
+
+    assert response.status_code == 200
+    assert response['ETag']
+    assert 'max-age=300' in response['Cache-Control'] and 'public' in response['Cache-Control']
+    assert body['metric'] == 'New_Total_Cases' and body['resolution'] == 'Daily'
+    assert len(body['dates']) == len(body['values']) == 200
+
+
+def test_series_revalidation(api):
+    etag = api.get('/api/series', {'metric': 'New_Total_Cases'})['ETag']
+    response = api.get('/api/series', {'metric': 'New_Total_Cases'}, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+    assert 'max-age=300' in response['Cache-Control']
+    # Another query is another resource
+    assert api.get('/api/series', {'metric': 'Deaths'}, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_series_of_a_vaccine_metric(api):
+    body = api.get('/api/series', {'metric': 'total_doses_administered', 'start': '2020-06-01'}).json()
+
+    assert body['dates'] and all(date >= '2020-06-01' for date in body['dates'])
+    # Every exportable metric has a series, the vaccination ones included
+    assert api.get('/api/series', {'metric': 'Coverage_fully_vaccinated'}).status_code == 200
+
+
+@pytest.mark.parametrize('query, error', [
+    ({'metric': 'New_Total_Cases', 'resolution': 'yearly'}, 'Unknown resolution: Yearly'),
+    ({'metric': 'New_Total_Cases', 'start': 'yesterday'}, 'Dates must be given as YYYY-MM-DD'),
+    ({'metric': 'Unknown'}, 'Unknown metric: Unknown'),
+    # Columns of the tables that are not metrics
+    ({'metric': '_id'}, 'Unknown metric: _id'),
+    ({'metric': 'Date'}, 'Unknown metric: Date'),
+    ({'metric': 'report_date'}, 'Unknown metric: report_date'),
+])
+def test_bad_requests_are_not_cached(api, query, error):
+    response = api.get('/api/series', query)
+
+    assert response.status_code == 400
+    assert response.json() == {'error': error}
+    assert not response.has_header('ETag') and not response.has_header('Cache-Control')
+
+
+def test_only_get_is_allowed(api):
+    assert api.post('/api/series', {'metric': 'New_Total_Cases'}).status_code == 405
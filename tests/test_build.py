@@ -0,0 +1,85 @@
+import pytest
+
+from src.interactive.modules import build, colstore, datastore, export, sync
+
+
+@pytest.fixture
+def built(stub_datastore, cache_dir):
+    ''' The version of a dataset built from the stub Datastore.'''
+    stub_datastore(rows=200)
+    return build.build_dataset()
+
+
+@pytest.fixture
+def no_build(monkeypatch):
+    def fail(refresh=False):
+        raise AssertionError('the dataset was rebuilt')
+
+    monkeypatch.setattr(build, 'build_dataset', fail)
+
+
+def test_artifacts_share_the_build_version(built):
+    for name in build.DERIVED_ARTIFACTS + [build.SUMMARY_ARTIFACT]:
+        assert colstore.current_version(name) == built
+
+
+def test_partial_build_is_not_served(built, no_build):
+    # A newer build that has written its derived tables but not yet published its summary
+    dataset = build.load_dataset(allow_stale=True)
+    version = colstore.new_version()
+    for name in build.DERIVED_ARTIFACTS:
+        colstore.write_frame(name, dataset[name], {'dataset_version': version}, version)
+
+    stale = build.load_dataset(allow_stale=True)
+    assert stale['version'] == built
+    assert stale['variants'].equals(dataset['variants'])
+
+
+def test_summary_without_its_tables_is_skipped(built, no_build):
+    dataset = build.load_dataset(allow_stale=True)
+    # A newer summary whose derived tables have already been pruned
+    colstore.write_frame(build.SUMMARY_ARTIFACT, dataset['summary'],
+                         dict(colstore.read_meta(build.SUMMARY_ARTIFACT)), colstore.new_version())
+
+    assert build.load_dataset(allow_stale=True)['version'] == built
+
+
+def test_vaccine_is_read_from_the_build(built, no_build, monkeypatch):
+    def fail(type, refresh=False):
+        raise AssertionError('the vaccine data was loaded during a request')
+
+    monkeypatch.setattr(build, 'load_data', fail)
+    vaccine = build.load_dataset(allow_stale=True)['vaccine']
+
+    assert len(vaccine) == 200
+
+
+def test_source_data_is_written_once(stub_datastore, cache_dir, monkeypatch):
+    stub_datastore(rows=200)
+    written = []
+    write_frame = colstore.write_frame
+
+    def recording_write_frame(name, *args, **kwargs):
+        written.append(name)
+        return write_frame(name, *args, **kwargs)
+
+    monkeypatch.setattr(colstore, 'write_frame', recording_write_frame)
+    covid = build.load_data('COVID')
+    # Fresh: read back from the synced local copy, without a request
+    monkeypatch.setattr(sync, 'sync_resource', None)
+    again = build.load_data('COVID')
+
+    assert written == [sync.local_copy_name(datastore.RESOURCE_IDS['COVID'])]
+    assert again.equals(covid)
+
+
+def test_export_metrics_are_listed_without_reading_the_tables(built, no_build):
+    dataset = build.load_dataset(allow_stale=True)
+    names = export.available_metrics(dataset)
+
+    assert not dataset.computed() & {'summary', 'vaccinations', 'vaccine', 'vaccine_by_date'}
+    assert names['New_Total_Cases'] == 'summary'
+    assert names['total_doses_administered'] == 'vaccine_by_date'
+    assert '_id' not in names and 'Date' not in names
+    assert set(names) == {column for table, date_column in export.EXPORT_TABLES
+                          for column in dataset[table].columns} - {'Date', 'report_date', '_id'}
@@ -0,0 +1,130 @@
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.interactive.modules import colstore
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'Date': pd.date_range('2021-03-24', periods=4),
+        'Total_Cases': [340220, 342730, 345360, 347990],
+        'Percent_positive_tests': [5.9, 6.0, 6.1, 6.2],
+        'Region': ['Toronto', 'Peel', 'York', 'Ottawa']}).set_index('Date', drop=False)
+
+
+def write_versions(name, frame, count):
+    return [colstore.write_frame(name, frame) for _ in range(count)]
+
+
+def set_age(name, version, seconds, now):
+    for path in (os.path.join(colstore.frame_dir(name), version), colstore.meta_path(name, version)):
+        if os.path.exists(path):
+            os.utime(path, (now - seconds, now - seconds))
+
+
+def test_round_trip(cache_dir, frame):
+    version = colstore.write_frame('summary', frame, {'dataset_version': 'v1'})
+    df, meta = colstore.read_frame('summary')
+
+    assert df.equals(frame)
+    assert df.index.name == 'Date'
+    assert meta['dataset_version'] == 'v1' and meta['version'] == version
+    # Mapped read-only
+    with pytest.raises(ValueError):
+        df['Total_Cases'].to_numpy()[0] = 0
+
+
+def test_read_does_not_warn(cache_dir, frame):
+    colstore.write_frame('summary', frame)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        colstore.read_frame('summary')
+
+
+def test_nothing_cached(cache_dir):
+    assert colstore.read_frame('summary') is None
+    assert colstore.current_version('summary') is None
+    assert colstore.list_versions('summary') == []
+
+
+def test_current_pointer_swap(cache_dir, frame):
+    old = colstore.write_frame('summary', frame)
+    old_frame, _ = colstore.read_frame('summary')
+    new = colstore.write_frame('summary', frame.assign(Total_Cases=0))
+
+    assert colstore.current_version('summary') == new
+    assert colstore.read_frame('summary')[0]['Total_Cases'].eq(0).all()
+    # A reader that pinned the old version still reads it in full
+    assert colstore.read_frame('summary', old)[0].equals(old_frame)
+    assert not [entry for entry in os.listdir(colstore.frame_dir('summary')) if entry.startswith('CURRENT.')]
+
+
+def test_incomplete_version_is_not_read(cache_dir, frame):
+    colstore.write_frame('summary', frame)
+    version = colstore.new_version()
+    os.makedirs(os.path.join(colstore.frame_dir('summary'), version))
+
+    assert colstore.read_frame('summary', version) is None
+
+
+def test_recently_replaced_versions_are_kept(cache_dir, frame):
+    versions = write_versions('summary', frame, colstore.KEEP_VERSIONS + 3)
+
+    assert colstore.list_versions('summary') == versions[::-1]
+
+
+def test_old_versions_are_removed(cache_dir, frame):
+    versions = write_versions('summary', frame, colstore.KEEP_VERSIONS + 3)
+    now = pd.Timestamp.now().timestamp()
+    for version in versions:
+        set_age('summary', version, colstore.RETAIN_SECONDS + 60, now)
+
+    colstore.remove_old_versions('summary', versions[-1], now)
+
+    # The newest older versions are kept however old they are
+    assert colstore.list_versions('summary') == versions[::-1][:colstore.KEEP_VERSIONS + 1]
+
+
+def test_versions_are_kept_until_replaced_for_long_enough(cache_dir, frame):
+    versions = write_versions('summary', frame, colstore.KEEP_VERSIONS + 3)
+    now = pd.Timestamp.now().timestamp()
+    for version in versions[:2]:
+        set_age('summary', version, colstore.RETAIN_SECONDS + 60, now)
+
+    colstore.remove_old_versions('summary', versions[-1], now)
+
+    # The first version was replaced by the second long ago, the second only just now
+    assert colstore.list_versions('summary') == versions[:0:-1]
+
+
+def test_versions_being_written_are_kept(cache_dir, frame):
+    versions = write_versions('summary', frame, colstore.KEEP_VERSIONS + 3)
+    writing, abandoned = colstore.new_version(), colstore.new_version()
+    for version in (writing, abandoned):
+        os.makedirs(os.path.join(colstore.frame_dir('summary'), version))
+        np.save(os.path.join(colstore.frame_dir('summary'), version, 'block0.npy'), np.zeros(4))
+    latest = colstore.write_frame('summary', frame)
+    now = pd.Timestamp.now().timestamp()
+    for version in versions + [writing, latest]:
+        set_age('summary', version, colstore.RETAIN_SECONDS + 60, now)
+    set_age('summary', abandoned, colstore.ABANDONED_SECONDS + 60, now)
+
+    colstore.remove_old_versions('summary', latest, now)
+
+    remaining = colstore.list_versions('summary')
+    assert writing in remaining and abandoned not in remaining
+    assert versions[0] not in remaining
+
+
+def test_freshness():
+    written_at = pd.Timestamp('2021-03-31 10:00', tz='America/Toronto')
+
+    assert colstore.next_publish_time(written_at) == pd.Timestamp('2021-03-31 10:30', tz='America/Toronto')
+    assert colstore.is_fresh({'written_at': written_at.isoformat()}, written_at + pd.Timedelta(minutes=20))
+    assert not colstore.is_fresh({'written_at': written_at.isoformat()}, written_at + pd.Timedelta(minutes=40))
@@ -0,0 +1,106 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.stub_datastore import COVID_FIELDS, make_records
+from src.interactive.modules import datastore
+from src.interactive.modules.schema import SchemaDriftError
+
+COVID_ID = datastore.RESOURCE_IDS['COVID']
+
+
+def response_body(records, fields=COVID_FIELDS):
+    return json.dumps({'success': True, 'result': {
+        'fields': [{'id': name, 'type': kind} for name, kind in fields],
+        'records': records,
+        'total': len(records)}}).encode('utf-8')
+
+
+def split(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def test_fetch_resource_matches_single_request(stub_datastore):
+    server = stub_datastore(rows=12345)
+    records = server.resources[COVID_ID]
+
+    df = datastore.fetch_resource(COVID_ID, page_size=1000)
+
+    assert len(df) == len(records)
+    assert df['_id'].tolist() == [record['_id'] for record in records]
+    expected = pd.json_normalize(records)
+    for column in ['Total Cases', 'Deaths', 'Resolved']:
+        assert df[column].tolist() == expected[column].fillna(0).astype('int64').tolist()
+    assert df['Reported Date'].iloc[-1] == pd.Timestamp(records[-1]['Reported Date'])
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 100, 64 * 1024])
+def test_parse_page_is_independent_of_chunk_boundaries(chunk_size):
+    records = make_records(COVID_FIELDS, 300)
+    body = response_body(records)
+
+    page = datastore.parse_page(split(body, chunk_size), 300, datastore.RESOURCE_SCHEMAS[COVID_ID])
+
+    assert page['count'] == 300
+    assert page['first_record'] == records[0]
+    assert page['last_record'] == records[-1]
+    assert page['total'] == 300
+    assert page['columns']['_id'].tolist() == list(range(1, 301))
+    assert np.array_equal(page['columns']['Total Cases'], [record['Total Cases'] for record in records])
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 33, 1000])
+def test_parse_records_handles_braces_and_unicode_in_strings(chunk_size):
+    fields = [('_id', 'int'), ('Name', 'text')]
+    names = ['plain', 'brace } inside', 'quote "}, {"x": 1', 'Montréal ✓', ']', '']
+    records = [{'_id': i + 1, 'Name': name} for i, name in enumerate(names)]
+    parsed = []
+
+    result = datastore.parse_records(split(response_body(records, fields), chunk_size), parsed.append)
+
+    assert parsed == records
+    assert result['total'] == len(records)
+
+
+def test_values_that_are_not_numbers_raise():
+    records = make_records(COVID_FIELDS, 10)
+    records[3]['Deaths'] = 'n/a'
+    records[7]['Deaths'] = 'pending'
+    records[5]['Resolved'] = None
+
+    with pytest.raises(SchemaDriftError, match=r'Deaths \(2\)') as error:
+        datastore.parse_page([response_body(records)], 10, datastore.RESOURCE_SCHEMAS[COVID_ID])
+    assert 'Resolved' not in str(error.value)
+
+
+def test_values_that_are_not_numbers_raise_outside_the_schema():
+    fields = [('_id', 'int'), ('Count', 'numeric')]
+    records = [{'_id': 1, 'Count': '12'}, {'_id': 2, 'Count': 'twelve'}]
+
+    with pytest.raises(SchemaDriftError, match=r'Count \(1\)'):
+        datastore.parse_page([response_body(records, fields)], 2)
+
+
+def test_truncated_response_raises():
+    body = response_body(make_records(COVID_FIELDS, 10))
+
+    with pytest.raises(ValueError):
+        datastore.parse_page(split(body[:len(body) // 2], 100), 10)
+
+
+def test_connection_pool_fits_concurrent_fetches():
+    pool = datastore.http.connection_from_url(datastore.DATASTORE_URL)
+
+    assert pool.pool.maxsize >= datastore.MAX_WORKERS * datastore.CONCURRENT_FETCHES
+    assert pool.block
+
+
+@pytest.mark.parametrize('date', ['2400-01-01T00:00:00', '1600-01-01T00:00:00'])
+def test_dates_out_of_range_raise(date):
+    records = make_records(COVID_FIELDS, 10)
+    records[4]['Reported Date'] = date
+
+    with pytest.raises(SchemaDriftError, match='Reported Date'):
+        datastore.parse_page([response_body(records)], 10, datastore.RESOURCE_SCHEMAS[COVID_ID])
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import pandas as pd
+
+from src.interactive.modules import export
+
+
+def slow_encoder(df):
+    for i in range(5):
+        time.sleep(0.1)
+        yield b'chunk %d\n' % i
+
+
+def frame(rows=25000):
+    return pd.DataFrame({'Date': pd.date_range('2020-01-01', periods=rows), 'Total_Cases': range(rows)})
+
+
+async def collect(chunks):
+    return b''.join([chunk async for chunk in chunks])
+
+
+def test_async_stream_matches_stream():
+    df = frame()
+
+    assert asyncio.run(collect(export.astream_export(df, 'csv'))) == b''.join(export.stream_export(df, 'csv'))
+
+
+def test_async_stream_does_not_block_the_event_loop(monkeypatch):
+    monkeypatch.setitem(export.ENCODERS, 'csv', slow_encoder)
+    ticks = []
+
+    async def tick():
+        while True:
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    async def main():
+        ticker = asyncio.ensure_future(tick())
+        body = await collect(export.astream_export(frame(10), 'csv'))
+        ticker.cancel()
+        return body
+
+    assert asyncio.run(main()) == b''.join(slow_encoder(None))
+    assert max(later - earlier for earlier, later in zip(ticks, ticks[1:])) < 0.08
+
+
+def test_abandoned_async_stream_stops_its_worker(monkeypatch):
+    produced = []
+
+    def counting_encoder(df):
+        for chunk in slow_encoder(df):
+            produced.append(chunk)
+            yield chunk
+
+    monkeypatch.setitem(export.ENCODERS, 'csv', counting_encoder)
+
+    async def first_chunk():
+        chunks = export.astream_export(frame(10), 'csv')
+        chunk = await chunks.__anext__()
+        await chunks.aclose()
+        return chunk
+
+    assert asyncio.run(first_chunk()) == b'chunk 0\n'
+    time.sleep(0.5)
+    assert len(produced) < 5
@@ -0,0 +1,46 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.interactive.modules import figures
+
+
+@pytest.fixture(autouse=True)
+def figure_cache(monkeypatch):
+    monkeypatch.setattr(figures, 'figure_cache', figures.FigureCache(figures.FIGURE_CACHE_BYTES))
+    return figures.figure_cache
+
+
+def test_figures_are_cached_as_json(figure_cache):
+    df = pd.DataFrame({'Date': pd.date_range('2020-03-01', periods=30), 'Total_Cases': np.arange(30) * 1234.5})
+
+    bar = figures.bar_chart(df, 'Date', 'Total_Cases', 'Total Cases', 'v1', resolution='Daily')
+    line = figures.line_chart(df, 'Date', 'Total_Cases', 'Total Cases', 'v1')
+
+    assert json.loads(bar)['data'][0]['type'] == 'bar'
+    assert json.loads(line)['layout']['title']['text'] == 'Total Cases'
+    assert [size for _, size in figure_cache.entries.values()] == [len(bar), len(line)]
+    # Served from the cache, not built again
+    assert figures.bar_chart(df, 'Date', 'Total_Cases', 'Total Cases', 'v1', resolution='Daily') is bar
+
+
+def test_cache_evicts_the_least_recently_used():
+    cache = figures.FigureCache(100)
+    cache.put('a', 'a' * 40, 40)
+    cache.put('b', 'b' * 40, 40)
+    cache.get('a')
+    cache.put('c', 'c' * 40, 40)
+
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.size == 80
+
+
+@pytest.mark.parametrize('resolution, points', [('Auto', 365), ('Daily', 730), ('Weekly', 105), ('Monthly', 24)])
+def test_line_chart_follows_the_resolution(resolution, points):
+    df = pd.DataFrame({'Date': pd.date_range('2021-01-01', periods=730), 'New_doses_7day_avg': np.arange(730.0)})
+
+    figure = json.loads(figures.line_chart(df, 'Date', 'New_doses_7day_avg', 'Doses', 'v1', resolution))
+
+    assert len(figure['data'][0]['x']) == points
@@ -0,0 +1,97 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+from src.interactive.modules import datastore, ingest
+
+
+@pytest.fixture
+def silent_server(monkeypatch):
+    ''' A server that accepts connections and never answers; the loader is pointed at it.'''
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(16)
+    connections = []
+
+    def accept():
+        while True:
+            try:
+                connections.append(listener.accept()[0])
+            except OSError:
+                return
+
+    threading.Thread(target=accept, daemon=True).start()
+    monkeypatch.setattr(datastore, 'DATASTORE_URL', 'http://127.0.0.1:%d/api/3/action' % listener.getsockname()[1])
+    yield
+    listener.close()
+    for connection in connections:
+        connection.close()
+
+
+def load_with(loader, timeout, retries, backoff=0.1):
+    async def load():
+        executor = ingest.ThreadPoolExecutor(max_workers=1)
+        try:
+            return await ingest.load_resource(loader, 'COVID', executor, timeout, retries, backoff)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return asyncio.run(load())
+
+
+def test_timeout_limits_requests(silent_server):
+    start = time.monotonic()
+
+    with pytest.raises(ingest.RETRYABLE_ERRORS):
+        load_with(lambda type: datastore.resource_metadata('x'), timeout=0.5, retries=1)
+
+    assert time.monotonic() - start < 2
+
+
+def test_retry_waits_for_the_previous_attempt(silent_server):
+    running = []
+    overlaps = []
+
+    def loader(type):
+        overlaps.append(len(running))
+        running.append(type)
+        try:
+            return datastore.resource_metadata('x')
+        finally:
+            # Writing the local copy, after the request gave up
+            time.sleep(0.05)
+            running.remove(type)
+
+    with pytest.raises(ingest.RETRYABLE_ERRORS):
+        load_with(loader, timeout=0.4, retries=2, backoff=0)
+
+    assert overlaps == [0, 0, 0]
+
+
+def test_stuck_attempt_is_abandoned_without_waiting():
+    start = time.monotonic()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(ingest.load_all(lambda type: time.sleep(3), ['COVID'], timeout=0.5, retries=1))
+
+    assert time.monotonic() - start < 2
+
+
+def test_deadline_reaches_page_workers(stub_datastore, monkeypatch):
+    stub_datastore(rows=2000)
+    seen = []
+    stream_page = datastore.stream_page
+
+    def recording_stream_page(*args, **kwargs):
+        seen.append(datastore.check_deadline())
+        return stream_page(*args, **kwargs)
+
+    monkeypatch.setattr(datastore, 'stream_page', recording_stream_page)
+    with datastore.deadline(30):
+        datastore.fetch_resource(datastore.RESOURCE_IDS['COVID'], page_size=500)
+
+    assert len(seen) == 4
+    assert all(remaining is not None and remaining <= 30 for remaining in seen)
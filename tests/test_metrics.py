@@ -0,0 +1,92 @@
+import pytest
+
+from src.interactive.modules import datastore, metrics
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    ''' Record measurements, from a clean slate.'''
+    monkeypatch.setattr(metrics, 'ENABLED', True)
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def no_transfers(monkeypatch):
+    monkeypatch.setattr(datastore, 'stats', {})
+
+
+def test_disabled_metrics_record_nothing(monkeypatch, no_transfers):
+    monkeypatch.setattr(metrics, 'ENABLED', False)
+    metrics.reset()
+
+    with metrics.timer('format_data'):
+        pass
+    metrics.increment('cache_misses', cache='figure')
+    metrics.cache_lookup('figure', False)
+
+    assert metrics.timer('format_data') is metrics.timer('build_figure')
+    assert metrics.stage_rows() == [] and metrics.counter_rows() == []
+
+
+def test_stage_timings(enabled):
+    for seconds in (0.5, 1.5, 1.0):
+        metrics.observe('format_data', seconds)
+    with metrics.timer('build_figure'):
+        pass
+
+    rows = {row['stage']: row for row in metrics.stage_rows()}
+    assert list(rows) == ['build_figure', 'format_data']
+    assert rows['format_data'] == {
+        'stage': 'format_data', 'count': 3, 'total_seconds': 3.0, 'mean_seconds': 1.0,
+        'max_seconds': 1.5, 'last_seconds': 1.0}
+    assert rows['build_figure']['count'] == 1
+
+
+def test_counters(enabled, no_transfers):
+    metrics.increment('rows_loaded', 10)
+    metrics.increment('rows_loaded', 5)
+    for hit in (True, False, True):
+        metrics.cache_lookup('figure', hit)
+    metrics.cache_lookup('dataset', True)
+
+    assert metrics.counter_rows() == [
+        {'name': 'cache_misses', 'labels': {'cache': 'figure'}, 'value': 1},
+        {'name': 'cache_requests', 'labels': {'cache': 'dataset'}, 'value': 1},
+        {'name': 'cache_requests', 'labels': {'cache': 'figure'}, 'value': 3},
+        {'name': 'rows_loaded', 'labels': {}, 'value': 15}]
+
+
+def test_datastore_transfers_are_counted(enabled, monkeypatch):
+    monkeypatch.setattr(datastore, 'stats', {'requests': 3, 'bytes_on_wire': 1024})
+
+    assert metrics.counter_rows() == [
+        {'name': 'datastore_bytes_on_wire', 'labels': {}, 'value': 1024},
+        {'name': 'datastore_requests', 'labels': {}, 'value': 3}]
+
+
+def test_prometheus_text(enabled, no_transfers):
+    metrics.observe('format_data', 0.25)
+    metrics.observe('format_data', 0.75)
+    metrics.cache_lookup('figure', False)
+
+    assert metrics.prometheus_text().splitlines() == [
+        '# TYPE dashboard_stage_seconds summary',
+        'dashboard_stage_seconds_count{stage="format_data"} 2',
+        'dashboard_stage_seconds_sum{stage="format_data"} 1.0',
+        '# TYPE dashboard_stage_seconds_max gauge',
+        'dashboard_stage_seconds_max{stage="format_data"} 0.75',
+        '# TYPE dashboard_cache_misses_total counter',
+        'dashboard_cache_misses_total{cache="figure"} 1',
+        '# TYPE dashboard_cache_requests_total counter',
+        'dashboard_cache_requests_total{cache="figure"} 1']
+
+
+def test_prometheus_label_values_are_escaped():
+    assert metrics.format_labels({}) == ''
+    assert metrics.format_labels({'stage': 'a"b\\c\nd'}) == '{stage="a\\"b\\\\c\\nd"}'
+
+
+def test_empty_prometheus_text(enabled, no_transfers):
+    assert metrics.prometheus_text() == '\n'
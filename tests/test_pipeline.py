@@ -0,0 +1,121 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from benchmarks import bench_pipeline, check_pipeline
+from src.interactive.modules import build, datastore, pipeline, query, tables
+
+# Baseline columns of the summary table, as renamed by format_data
+SUMMARY_COLUMNS = [
+    'Date', 'Confirmed_Positive', 'Resolved', 'Deaths', 'Total_Cases', 'Total_tests_completed',
+    'Percent_positive_tests', 'Number_hospitalized', 'Number_ICU', 'Number_ventilator',
+    'Total_Lineage_B.1.1.7_Alpha', 'Total_Lineage_B.1.351_Beta', 'Total_Lineage_P.1_Gamma', 'Active_Cases']
+
+
+def load_fixture(type, scale=1):
+    ''' Parse the recorded fixture payload of a resource like bench_pipeline and load_data do.'''
+    return bench_pipeline.load_payload(type, *bench_pipeline.scale_payload(bench_pipeline.load_fixture(type), scale))
+
+
+@pytest.fixture(scope='module')
+def summary():
+    summary_data = build.create_diff_columns(build.format_data(load_fixture('COVID')), build.SUMMARY_COLUMNS)
+
+    return build.index_by_date(build.change_dtypes(summary_data))
+
+
+@pytest.fixture(scope='module')
+def vaccine():
+    return load_fixture('Vaccine')
+
+
+def test_column_mapping(summary):
+    assert list(build.format_data(load_fixture('COVID')).columns) == SUMMARY_COLUMNS
+    assert list(summary.columns) == SUMMARY_COLUMNS + ['New_' + column for column in build.SUMMARY_COLUMNS]
+    assert (summary['Active_Cases'] == summary['Total_Cases'] - summary['Resolved'] - summary['Deaths']).all()
+    # Missing values are 0, the first day has no difference
+    assert summary['Number_hospitalized'].iloc[0] == 0
+    assert summary['New_Total_Cases'].tolist()[:2] == [0, 2510]
+
+
+def test_recent_days_columns(summary):
+    table = tables.recent_days(summary)
+
+    assert list(table.columns) == [header for _, header in tables.RECENT_DAYS_COLUMNS]
+    assert table.index.tolist() == ['2021-03-31', '2021-03-30', '2021-03-29', '2021-03-28', '2021-03-27']
+    assert table.iloc[0].to_dict() == {
+        'Cases': '347,990', 'Resolved cases': '320,600', 'Active cases': '20,120', 'Deaths': '7,270',
+        'Hospitalizations': '1,040', 'ICU patients': '365', 'Tests conducted': '57,000', '% positive tests': '6.2'}
+
+
+def test_snapshot_fields(summary, vaccine):
+    snapshot = build.create_snapshot(summary, vaccine)
+
+    assert set(snapshot) == {'date', 'today', 'yesterday', 'vaccine_date', 'vaccine'}
+    assert snapshot['date'] == snapshot['vaccine_date'] == '2021-03-31'
+    assert set(snapshot['today']) == set(snapshot['yesterday']) == set(summary.columns) - {'Date'}
+    assert snapshot['today']['New_Total_Cases'] == 2630
+    assert snapshot['yesterday']['Total_Cases'] == 345360
+    assert snapshot['vaccine']['total_individuals_fully_vaccinated'] == 314000
+    assert all(type(value) in (int, float) for value in snapshot['today'].values())
+
+
+def test_date_selection(summary):
+    assert pipeline.date_selection(summary, 'Last Week')['Date'].dt.day.tolist() == list(range(25, 32))
+    selected = pipeline.date_selection(summary, query.CUSTOM_RANGE, (pd.Timestamp('2021-03-26'), pd.Timestamp('2021-03-28')))
+    assert selected['Date'].dt.day.tolist() == [26, 27, 28]
+
+
+# Modules a plain `import pipeline` must not load
+HEAVY_MODULES = ['plotly', 'streamlit', 'django']
+
+
+@pytest.fixture(scope='module')
+def fixtures():
+    return {type: bench_pipeline.load_fixture(type) for type in datastore.RESOURCE_IDS}
+
+
+@pytest.fixture(scope='module')
+def expected():
+    with open(check_pipeline.EXPECTED_PATH, 'rb') as f:
+        return json.loads(gzip.decompress(f.read()))['outputs']
+
+
+def test_expected_outputs_are_those_of_the_baseline(fixtures, expected):
+    baseline_outputs = check_pipeline.run_baseline(fixtures)
+
+    assert set(expected) == set(baseline_outputs) | set(check_pipeline.NEW_OUTPUTS)
+    assert {name: expected[name] for name in baseline_outputs} == baseline_outputs
+
+
+def test_outputs_match_the_recorded_baseline(fixtures, expected):
+    assert check_pipeline.run_pipeline(fixtures) == expected
+
+
+def test_import_does_not_load_heavy_modules():
+    code = ('import sys\n'
+            'from src.interactive.modules import pipeline\n'
+            'print(" ".join(name for name in %r if name in sys.modules))\n' % HEAVY_MODULES)
+    result = subprocess.run([sys.executable, '-c', code], check=True, stdout=subprocess.PIPE,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    assert result.stdout.decode().split() == []
+
+
+def test_scaled_payload_continues_the_dates():
+    covid = load_fixture('COVID', scale=3)
+
+    assert len(covid) == 24
+    assert covid['_id'].tolist() == list(range(1, 25))
+    assert (covid['Reported Date'].diff().dropna() == pd.Timedelta(days=1)).all()
+
+
+def test_scales_past_the_datetime_range_are_rejected():
+    # 12,000 copies of 8 days from 2021-03-24 would end in 2283
+    with pytest.raises(ValueError, match='2262-04-11'):
+        bench_pipeline.scale_payload(bench_pipeline.load_fixture('COVID'), 12000)
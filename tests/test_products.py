@@ -0,0 +1,51 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.interactive.modules import products
+
+
+def concurrent_calls(function, count=8):
+    barrier = threading.Barrier(count)
+
+    def call():
+        barrier.wait()
+        return function()
+
+    with ThreadPoolExecutor(count) as pool:
+        futures = [pool.submit(call) for _ in range(count)]
+    return futures
+
+
+def test_concurrent_derived_computes_once():
+    dataset = products.Dataset({})
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return ['result']
+
+    results = [future.result() for future in concurrent_calls(lambda: dataset.derived('key', compute))]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_failed_derived_is_shared_then_retried():
+    dataset = products.Dataset({})
+    calls = []
+
+    def fail():
+        calls.append(1)
+        time.sleep(0.2)
+        raise ValueError('no rows')
+
+    for future in concurrent_calls(lambda: dataset.derived('key', fail)):
+        with pytest.raises(ValueError):
+            future.result()
+    assert len(calls) == 1
+
+    assert dataset.derived('key', lambda: 'computed') == 'computed'
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.interactive.modules import query
+
+
+@pytest.fixture
+def summary():
+    dates = pd.date_range('2021-02-20', '2021-03-31')
+    return pd.DataFrame({'Date': dates, 'Total_Cases': np.arange(len(dates))}, index=dates)
+
+
+@pytest.mark.parametrize('date_range, start', [
+    ('All Weeks', None),
+    ('Last Week', '2021-03-25'),
+    ('Last 2 weeks', '2021-03-18'),
+    ('Last Month', '2021-03-01'),
+    ('Last 3 Months', '2021-01-01'),
+    ('Last 6 Months', '2020-10-01'),
+])
+def test_date_range_bounds(date_range, start):
+    bounds = query.date_range_bounds(date_range, pd.Timestamp('2021-03-31'))
+
+    assert bounds == ((None, None) if start is None else (pd.Timestamp(start), pd.Timestamp('2021-03-31')))
+
+
+@pytest.mark.parametrize('latest, start', [
+    # Calendar months, not multiples of 30 days
+    ('2021-03-30', '2021-03-01'),
+    ('2021-02-28', '2021-01-29'),
+    ('2020-02-29', '2020-01-30'),
+    ('2021-05-31', '2021-05-01'),
+])
+def test_month_bounds_follow_the_calendar(latest, start):
+    assert query.date_range_bounds('Last Month', latest) == (pd.Timestamp(start), pd.Timestamp(latest))
+
+
+def test_unknown_date_range_raises():
+    with pytest.raises(KeyError):
+        query.date_range_bounds('Last Year', pd.Timestamp('2021-03-31'))
+
+
+def test_custom_date_range_bounds():
+    start, end = pd.Timestamp('2021-03-26'), pd.Timestamp('2021-03-28')
+
+    assert query.date_range_bounds(query.CUSTOM_RANGE, None, (start, end)) == (start, end)
+    # While the second date is still being picked
+    assert query.date_range_bounds(query.CUSTOM_RANGE, None, (start,)) == (start, None)
+    assert query.date_range_bounds(query.CUSTOM_RANGE, None, None) == (None, None)
+
+
+def test_select_dates_is_inclusive(summary):
+    selected = query.select_dates(summary, *query.date_range_bounds('Last Week', summary.index[-1]))
+
+    assert selected.index.day.tolist() == list(range(25, 32))
+
+
+def test_select_dates_between_rows(summary):
+    sparse = summary.iloc[::7]
+
+    selected = query.select_dates(sparse, '2021-03-01', '2021-03-15')
+    assert selected.index.equals(pd.DatetimeIndex(['2021-03-06', '2021-03-13']))
+    assert query.select_dates(sparse, '2021-03-07', '2021-03-12').empty
+
+
+def test_select_dates_open_bounds(summary):
+    assert query.select_dates(summary).equals(summary)
+    assert query.select_dates(summary, start='2021-03-30').index.day.tolist() == [30, 31]
+    assert query.select_dates(summary, end='2021-02-21').index.day.tolist() == [20, 21]
+    assert query.select_dates(summary, start='2021-04-01').empty
+
+
+def test_select_dates_is_a_view(summary):
+    selected = query.select_dates(summary, '2021-03-01', '2021-03-31')
+
+    assert np.shares_memory(selected['Total_Cases'].to_numpy(), summary['Total_Cases'].to_numpy())
@@ -0,0 +1,42 @@
+import pytest
+
+from src.interactive.modules import build, datastore, refresher, regional
+
+
+@pytest.fixture
+def builds(stub_datastore, cache_dir, monkeypatch):
+    ''' Versions built by the refresher during the test, with a stub build.'''
+    stub_datastore(rows=100)
+    versions = []
+
+    def fake_build(refresh=False):
+        versions.append('v%d' % len(versions))
+        return versions[-1]
+
+    monkeypatch.setattr(build, 'build_dataset', fake_build)
+    monkeypatch.setattr(build, 'current_version', lambda: versions[-1] if versions else None)
+    return versions
+
+
+def test_failed_regional_refresh_does_not_stop_the_rebuild(builds, monkeypatch, caplog):
+    def fail(force=False):
+        raise IOError('case resource unavailable')
+
+    monkeypatch.setattr(regional, 'ENABLED', True)
+    monkeypatch.setattr(regional, 'refresh', fail)
+
+    assert refresher.refresh_once()
+    assert builds == ['v0']
+    assert 'regional table failed' in caplog.text
+    # Unchanged upstream: the regional table is still retried, the rest is not rebuilt
+    assert not refresher.refresh_once()
+    assert builds == ['v0']
+
+
+def test_last_modified_falls_back_to_metadata_modified(monkeypatch):
+    metadata = {'last_modified': None, 'metadata_modified': '2021-06-01T12:00:00'}
+    monkeypatch.setattr(datastore, 'resource_metadata', lambda resource_id: metadata)
+
+    assert datastore.last_modified(regional.CASES_RESOURCE_ID) == '2021-06-01T12:00:00'
+    metadata['last_modified'] = '2021-06-02T08:00:00'
+    assert datastore.last_modified(regional.CASES_RESOURCE_ID) == '2021-06-02T08:00:00'
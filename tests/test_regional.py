@@ -0,0 +1,97 @@
+import pandas as pd
+import pytest
+
+from src.interactive.modules import colstore, regional
+
+
+def case_page(cases):
+    ''' Column arrays of a page of case records, from (date, PHU ID, PHU, outcome) tuples.'''
+    return dict(zip(regional.CASE_COLUMNS, (list(values) for values in zip(*cases))))
+
+
+PAGE = case_page([
+    ('2021-03-01T00:00:00', 2251, 'Ottawa', 'Resolved'),
+    ('2021-03-01T00:00:00', 2251, 'Ottawa', 'Resolved'),
+    ('2021-03-01T00:00:00', 3895, 'Toronto', 'Fatal'),
+    ('2021-03-03T00:00:00', 3895, 'Toronto', 'Not Resolved'),
+    ('2021-03-03T00:00:00', None, None, None),
+])
+
+
+def test_aggregate_page():
+    counts = regional.aggregate_page(PAGE)
+
+    assert counts.to_dict() == {
+        (pd.Timestamp('2021-03-01'), 2251, 'Ottawa', 'Resolved'): 2,
+        (pd.Timestamp('2021-03-01'), 3895, 'Toronto', 'Fatal'): 1,
+        (pd.Timestamp('2021-03-03'), 3895, 'Toronto', 'Not Resolved'): 1,
+        (pd.Timestamp('2021-03-03'), 0, 'Unknown', ''): 1}
+
+
+def test_merge_counts():
+    merged = regional.merge_counts([regional.aggregate_page(PAGE), regional.aggregate_page(PAGE)])
+
+    assert merged.to_dict() == {key: 2 * count for key, count in regional.aggregate_page(PAGE).to_dict().items()}
+
+
+def test_counts_to_series():
+    series = regional.counts_to_series(regional.aggregate_page(PAGE))
+    toronto = series[series['PHU'] == 'Toronto']
+
+    # Every PHU has a row for every day, the days without cases included
+    assert len(series) == 3 * 3
+    assert toronto.index.day.tolist() == [1, 2, 3]
+    assert toronto['New_cases'].tolist() == [1, 0, 1]
+    assert toronto['New_deaths'].tolist() == [1, 0, 0]
+    assert toronto['Total_cases'].tolist() == [1, 1, 2]
+    assert series.loc[series['PHU'] == 'Ottawa', 'New_resolved'].tolist() == [2, 0, 0]
+    assert series.index.is_monotonic_increasing
+
+
+def test_select_regions():
+    series = regional.counts_to_series(regional.aggregate_page(PAGE))
+    selected = regional.select_regions(series, ['Ottawa', 'Toronto'])
+
+    assert selected['New_cases'].tolist() == [3, 0, 1]
+    assert selected['Total_cases'].tolist() == [3, 3, 4]
+    assert selected['Date'].equals(pd.Series(selected.index, index=selected.index, name='Date'))
+
+
+@pytest.fixture
+def cases(stub_datastore, cache_dir):
+    return stub_datastore(case_rows=600)
+
+
+def test_pages_are_merged_as_they_arrive(cases, monkeypatch):
+    merged = []
+    merge_counts = regional.merge_counts
+
+    def recording_merge_counts(counts):
+        merged.append(len(counts))
+        return merge_counts(counts)
+
+    monkeypatch.setattr(regional, 'merge_counts', recording_merge_counts)
+    monkeypatch.setattr(regional, 'PAGE_SIZE', 25)
+    regional.build_regional()
+
+    # 24 pages: merged once a MERGE_EVERY accumulated, then at the end
+    assert merged == [regional.MERGE_EVERY, 24 - regional.MERGE_EVERY + 1]
+
+
+def test_merged_pages_match_a_single_page(cases, monkeypatch):
+    monkeypatch.setattr(regional, 'PAGE_SIZE', 1000)
+    whole = colstore.read_frame(regional.REGIONAL_ARTIFACT, regional.build_regional())[0]
+    monkeypatch.setattr(regional, 'PAGE_SIZE', 25)
+    paged, meta = colstore.read_frame(regional.REGIONAL_ARTIFACT, regional.build_regional())
+
+    assert meta['source_rows'] == 600
+    assert paged['New_cases'].sum() == 600
+    assert paged.equals(whole)
+
+
+def test_refresh_skips_an_unchanged_resource(cases, monkeypatch):
+    monkeypatch.setattr(regional.datastore, 'last_modified', lambda resource_id: '2021-06-01T12:00:00')
+
+    assert regional.refresh()
+    assert not regional.refresh()
+    assert regional.refresh(force=True)
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.interactive.modules import resample
+
+
+@pytest.fixture
+def daily():
+    dates = pd.date_range('2021-01-01', '2021-03-31')
+    return pd.DataFrame({
+        'Date': dates,
+        'New_Total_Cases': np.arange(len(dates)),
+        'Total_Cases': np.arange(len(dates)).cumsum(),
+        'Number_ICU': np.where(dates.day == 15, 500, 300),
+        'Percent_positive_tests': np.where(dates.day % 2 == 0, 4.0, 6.0)})
+
+
+@pytest.mark.parametrize('column, aggregation', [
+    ('New_Total_Cases', 'sum'),
+    ('previous_day_total_doses_administered', 'sum'),
+    ('New_Total_Cases_7day_avg', 'mean'),
+    ('Percent_positive_tests', 'mean'),
+    ('Number_ICU', 'max'),
+    ('Active_Cases', 'max'),
+    ('Total_Cases', 'last'),
+    ('total_individuals_fully_vaccinated', 'last'),
+])
+def test_aggregation_for(column, aggregation):
+    assert resample.aggregation_for(column) == aggregation
+
+
+@pytest.mark.parametrize('points, resolution', [
+    (1, 'Daily'),
+    (365, 'Daily'),
+    (366, 'Weekly'),
+    (365 * 7, 'Weekly'),
+    (365 * 7 + 1, 'Monthly'),
+])
+def test_choose_resolution(points, resolution):
+    assert resample.choose_resolution(points, max_points=365) == resolution
+
+
+def test_forced_resolution_is_kept():
+    assert resample.choose_resolution(10000, 'Daily') == 'Daily'
+    assert resample.choose_resolution(10, 'Monthly') == 'Monthly'
+
+
+def test_daily_resolution_keeps_the_rows(daily):
+    assert resample.aggregate(daily, 'Date', 'Total_Cases', 'Daily').equals(daily[['Date', 'Total_Cases']])
+
+
+def test_monthly_buckets(daily):
+    def monthly(column):
+        return resample.aggregate(daily, 'Date', column, 'Monthly')[column].tolist()
+
+    months = daily.groupby(daily['Date'].dt.month)
+    assert resample.aggregate(daily, 'Date', 'Total_Cases', 'Monthly')['Date'].dt.day.tolist() == [31, 28, 31]
+    assert monthly('New_Total_Cases') == months['New_Total_Cases'].sum().tolist()
+    assert monthly('Total_Cases') == months['Total_Cases'].last().tolist()
+    assert monthly('Number_ICU') == [500, 500, 500]
+    assert monthly('Percent_positive_tests') == pytest.approx(months['Percent_positive_tests'].mean().tolist())
+
+
+def test_weekly_buckets_end_on_sunday(daily):
+    weekly = resample.aggregate(daily, 'Date', 'New_Total_Cases', 'Weekly')
+
+    assert (weekly['Date'].dt.dayofweek == 6).all()
+    assert weekly['New_Total_Cases'].sum() == daily['New_Total_Cases'].sum()
+    # 2021-01-01 is a Friday: the first week holds three days
+    assert weekly['New_Total_Cases'].iloc[0] == 0 + 1 + 2
+
+
+def test_lttb_keeps_the_ends_and_the_peaks():
+    x = pd.date_range('2020-01-01', periods=1000).to_numpy()
+    y = np.sin(np.arange(1000) / 50)
+    y[500] = 10
+
+    kept = resample.lttb(x, y, 100)
+
+    assert len(kept) == 100
+    assert kept[0] == 0 and kept[-1] == 999
+    assert (np.diff(kept) > 0).all()
+    assert 500 in kept
+
+
+@pytest.mark.parametrize('threshold', [2, 10, 20])
+def test_lttb_below_the_threshold_keeps_every_point(threshold):
+    kept = resample.lttb(np.arange(10), np.arange(10), threshold)
+
+    assert kept.tolist() == list(range(10))
+
+
+def test_downsample_line(daily):
+    assert resample.downsample_line(daily, 'Date', 'Total_Cases', 100).equals(daily[['Date', 'Total_Cases']])
+    downsampled = resample.downsample_line(daily, 'Date', 'Total_Cases', 30)
+    assert len(downsampled) == 30
+    assert downsampled['Date'].is_monotonic_increasing
@@ -0,0 +1,121 @@
+import pytest
+
+from src.interactive.modules import datastore, sync
+
+COVID_ID = datastore.RESOURCE_IDS['COVID']
+
+
+@pytest.fixture
+def server(stub_datastore, cache_dir):
+    return stub_datastore(rows=1000)
+
+
+@pytest.fixture
+def requests(monkeypatch):
+    ''' Offsets of the datastore_search pages requested during the test.'''
+    offsets = []
+    stream_page = datastore.stream_page
+
+    def counting_stream_page(resource_id, offset, *args, **kwargs):
+        offsets.append(offset)
+        return stream_page(resource_id, offset, *args, **kwargs)
+
+    monkeypatch.setattr(datastore, 'stream_page', counting_stream_page)
+    return offsets
+
+
+def append_record(records):
+    record = dict(records[-1], _id=records[-1]['_id'] + 1)
+    record['Total Cases'] += 10
+    records.append(record)
+
+
+def total_cases(df):
+    return df['Total Cases'].tolist()
+
+
+def expected_total_cases(records):
+    return [record['Total Cases'] for record in records]
+
+
+def test_unchanged_resource_requests_no_records(server, requests):
+    sync.sync_resource(COVID_ID)
+    requests.clear()
+
+    df = sync.sync_resource(COVID_ID)
+
+    assert requests == []
+    assert len(df) == 1000
+
+
+def test_append_fetches_only_new_records(server, requests):
+    records = server.resources[COVID_ID]
+    sync.sync_resource(COVID_ID)
+    for _ in range(3):
+        append_record(records)
+    requests.clear()
+
+    df = sync.sync_resource(COVID_ID)
+
+    assert requests == [1000]
+    assert total_cases(df) == expected_total_cases(records)
+
+
+def test_revised_middle_row_reloads_everything(server, requests):
+    records = server.resources[COVID_ID]
+    sync.sync_resource(COVID_ID)
+    records[300] = dict(records[300], **{'Total Cases': 999999})
+    append_record(records)
+    requests.clear()
+
+    df = sync.sync_resource(COVID_ID)
+
+    assert requests[0] == 0
+    assert df['Total Cases'].iloc[300] == 999999
+    assert total_cases(df) == expected_total_cases(records)
+
+
+def test_revision_without_new_rows_is_detected(server):
+    records = server.resources[COVID_ID]
+    sync.sync_resource(COVID_ID)
+    records[10] = dict(records[10], Deaths=12345)
+
+    df = sync.sync_resource(COVID_ID)
+
+    assert df['Deaths'].iloc[10] == 12345
+
+
+def test_shrunk_resource_reloads_everything(server):
+    records = server.resources[COVID_ID]
+    sync.sync_resource(COVID_ID)
+    del records[500:]
+
+    df = sync.sync_resource(COVID_ID)
+
+    assert len(df) == 500
+    assert total_cases(df) == expected_total_cases(records)
+
+
+def test_without_sql_every_change_reloads_everything(server, requests):
+    records = server.resources[COVID_ID]
+    server.sql_enabled[0] = False
+    sync.sync_resource(COVID_ID)
+    records[300] = dict(records[300], **{'Total Cases': 999999})
+    requests.clear()
+
+    df = sync.sync_resource(COVID_ID)
+
+    assert requests[0] == 0
+    assert df['Total Cases'].iloc[300] == 999999
+
+
+def test_unchanged_digest_requests_no_records(server, requests, monkeypatch):
+    monkeypatch.setattr(sync, 'METADATA_PROBE', False)
+    sync.sync_resource(COVID_ID)
+    requests.clear()
+
+    sync.sync_resource(COVID_ID)
+    df = sync.sync_resource(COVID_ID)
+
+    assert requests == []
+    assert len(df) == 1000
@@ -0,0 +1,101 @@
+import io
+
+import pandas as pd
+import pytest
+
+from src.interactive.modules import pipeline, timeseries_db
+
+
+@pytest.fixture
+def ingest(api):
+    from django.core.management import call_command
+
+    return lambda: call_command('ingest', stdout=io.StringIO())
+
+
+@pytest.fixture
+def series_from_db(django_project, monkeypatch):
+    from django.conf import settings
+
+    monkeypatch.setattr(settings, 'DASHBOARD_SERIES_FROM_DB', True)
+    monkeypatch.setattr(pipeline, 'SERIES_FROM_DB', True)
+    monkeypatch.setattr(timeseries_db, 'DB_PATH', django_project)
+
+
+def observations():
+    from dashboard.models import Observation
+
+    return dict(((row.metric, row.date), row.value) for row in Observation.objects.all())
+
+
+def test_ingest_is_idempotent(ingest):
+    from dashboard.models import IngestedDataset
+
+    ingest()
+    first = observations()
+    ingest()
+
+    assert observations() == first
+    dataset = pipeline.current_dataset()
+    assert len(first) == 200 * len(timeseries_db.metric_names(dataset))
+    assert IngestedDataset.objects.count() == 1
+    assert IngestedDataset.current().version == dataset['version']
+
+
+def test_ingest_updates_changed_values(ingest):
+    from dashboard.models import Observation
+
+    ingest()
+    first = observations()
+    Observation.objects.filter(metric='Deaths').update(value=-1)
+    Observation.objects.filter(metric='Resolved').delete()
+    ingest()
+
+    assert observations() == first
+
+
+def test_read_series_without_django(ingest, django_project):
+    ingest()
+    dataset = pipeline.current_dataset()
+
+    series = timeseries_db.read_series('New_Total_Cases', '2020-03-01', '2020-03-31', path=django_project)
+
+    assert series.index.equals(pd.date_range('2020-03-01', '2020-03-31'))
+    assert series.equals(pipeline.series(dataset, 'New_Total_Cases', '2020-03-01', '2020-03-31'))
+    assert timeseries_db.read_series('Unknown', path=django_project).empty
+
+
+def test_pipeline_series_from_db(ingest, series_from_db):
+    ingest()
+
+    # Read from the table alone
+    series = pipeline.series(None, 'total_doses_administered', end='2020-02-29')
+
+    assert series.index.equals(pd.date_range('2020-01-26', '2020-02-29'))
+    assert series.name == 'total_doses_administered'
+
+
+def test_series_api_before_the_first_ingest(api, series_from_db):
+    response = api.get('/api/series', {'metric': 'New_Total_Cases'})
+
+    assert response.status_code == 503
+    assert not response.has_header('ETag') and not response.has_header('Cache-Control')
+
+
+def test_series_api_from_db(api, ingest, series_from_db, monkeypatch):
+    from django.conf import settings
+
+    ingest()
+    query = {'metric': 'New_Total_Cases', 'start': '2020-03-01', 'resolution': 'weekly'}
+    response = api.get('/api/series', query)
+    etag = response['ETag']
+
+    assert response.status_code == 200
+    assert pipeline.current_dataset()['version'] in etag
+    assert 'max-age=300' in response['Cache-Control']
+    assert api.get('/api/series', query, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert api.get('/api/series', {'metric': 'Unknown'}).status_code == 400
+
+    # The same body as when read from the dataset
+    monkeypatch.setattr(settings, 'DASHBOARD_SERIES_FROM_DB', False)
+    assert api.get('/api/series', query).json() == response.json()